@@ -0,0 +1,15 @@
+"""
+Caching infrastructure (Redis)
+"""
+
+from shared.cache.redis_client import RedisClientPool
+from shared.cache.dimension_cache import DimensionCache, product_cache, user_cache
+from shared.cache.idempotency import IdempotencyFilter
+
+__all__ = [
+    "RedisClientPool",
+    "DimensionCache",
+    "IdempotencyFilter",
+    "product_cache",
+    "user_cache",
+]
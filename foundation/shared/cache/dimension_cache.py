@@ -0,0 +1,301 @@
+"""
+Two-tier read-through/write-through cache for dimension lookups
+
+Lookups go in-process LRU -> Redis (one MGET per batch) -> loader (one query
+per batch for whatever is still missing). Loaded values are written back to
+both tiers, so enriching a whole ingestion batch costs at most one Redis
+round trip and one database query. Writes go to the database first and then
+to both tiers, so the cache never holds a record the database rejected.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from loguru import logger
+
+try:
+    from psycopg.rows import dict_row
+except ImportError:
+    dict_row = None
+
+from shared.cache.redis_client import RedisClientPool
+from shared.database import get_db_connection, upsert_rows
+
+Loader = Callable[[List[str]], Dict[str, Dict[str, Any]]]
+Writer = Callable[[Dict[str, Dict[str, Any]]], None]
+
+_MISSING = object()
+
+
+class LocalLRUCache:
+    """Thread-safe in-process LRU with per-entry TTL"""
+
+    def __init__(self, max_size: int = 10_000, ttl_seconds: float = 60.0):
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        """Return the cached value or the _MISSING sentinel"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class DimensionCache:
+    """Read-through/write-through cache for one dimension (e.g. products)"""
+
+    def __init__(
+        self,
+        namespace: str,
+        loader: Loader,
+        writer: Optional[Writer] = None,
+        ttl_seconds: int = 3600,
+        local_max_size: int = 10_000,
+        local_ttl_seconds: float = 60.0,
+        client=None,
+    ):
+        """
+        Args:
+            namespace: Key namespace inside the project prefix (e.g. 'product')
+            loader: Batch loader for cache misses: list of ids -> {id: record}
+            writer: Batch writer to the backing store, used by put_many
+            ttl_seconds: Redis TTL
+            local_max_size: Maximum entries in the in-process LRU
+            local_ttl_seconds: In-process TTL (bounds staleness across processes)
+            client: Redis client (defaults to the shared pool)
+        """
+        self.namespace = namespace
+        self.loader = loader
+        self.writer = writer
+        self.ttl = ttl_seconds
+        self.local = LocalLRUCache(local_max_size, local_ttl_seconds)
+        self.client = client or RedisClientPool.get_client()
+
+    def _key(self, id_: str) -> str:
+        return RedisClientPool.key(self.namespace, id_)
+
+    def get(self, id_: str) -> Optional[Dict[str, Any]]:
+        """Get a single record"""
+        return self.get_many([id_]).get(id_)
+
+    def get_many(self, ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get records for many ids with one MGET and at most one loader call.
+
+        Unknown ids are omitted from the result.
+        """
+        result: Dict[str, Dict[str, Any]] = {}
+        missing: List[str] = []
+
+        for id_ in dict.fromkeys(ids):  # De-duplicate, keep order
+            value = self.local.get(id_)
+            if value is _MISSING:
+                missing.append(id_)
+            elif value is not None:
+                result[id_] = value
+
+        if not missing:
+            return result
+
+        try:
+            cached = self.client.mget([self._key(id_) for id_ in missing])
+        except Exception as e:
+            logger.warning(f"Redis MGET failed for '{self.namespace}', falling back to loader: {e}")
+            cached = [None] * len(missing)
+
+        to_load = []
+        for id_, raw in zip(missing, cached):
+            if raw is None:
+                to_load.append(id_)
+                continue
+            value = json.loads(raw)
+            self.local.put(id_, value)
+            result[id_] = value
+
+        if to_load:
+            loaded = self.loader(to_load)
+            self._store(loaded)
+            for id_ in to_load:
+                value = loaded.get(id_)
+                # Cache unknown ids locally only, so repeated misses skip the database
+                self.local.put(id_, value)
+                if value is not None:
+                    result[id_] = value
+
+        return result
+
+    def put_many(self, records: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Write records through to the backing store, then to both cache tiers
+
+        If the write fails, the records are invalidated in both tiers (the
+        store may hold the old or the new values) and the error is raised.
+        Without a writer, the records are only cached.
+        """
+        if not records:
+            return
+        if self.writer:
+            try:
+                self.writer(records)
+            except Exception:
+                self.invalidate(records)
+                raise
+        self._store(records)
+        for id_, value in records.items():
+            self.local.put(id_, value)
+
+    def invalidate(self, ids: Iterable[str]) -> None:
+        ids = list(ids)
+        for id_ in ids:
+            self.local.invalidate(id_)
+        if not ids:
+            return
+        try:
+            self.client.delete(*[self._key(id_) for id_ in ids])
+        except Exception as e:
+            # Stale Redis entries expire with the TTL
+            logger.warning(f"Redis DELETE failed for '{self.namespace}': {e}")
+
+    def enrich(
+        self,
+        records: List[Dict[str, Any]],
+        key_field: str,
+        fields: Dict[str, str],
+    ) -> List[Dict[str, Any]]:
+        """
+        Add dimension attributes to a batch of records in place.
+
+        Args:
+            records: Event dicts (e.g. an ingestion batch)
+            key_field: Field holding the dimension id (e.g. 'product_id')
+            fields: Dimension field -> output field (e.g. {'category': 'product_category'})
+        """
+        lookup = self.get_many(r[key_field] for r in records if r.get(key_field))
+        for record in records:
+            dimension = lookup.get(record.get(key_field)) or {}
+            for source, target in fields.items():
+                record[target] = dimension.get(source)
+        return records
+
+    def _store(self, records: Dict[str, Dict[str, Any]]) -> None:
+        """Write records to Redis in one pipelined round trip"""
+        if not records:
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for id_, value in records.items():
+                pipe.set(self._key(id_), json.dumps(value, default=str), ex=self.ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Redis write failed for '{self.namespace}': {e}")
+
+
+def _load_rows(query: str, ids: List[str], key_field: str) -> Dict[str, Dict[str, Any]]:
+    with get_db_connection() as conn:
+        with conn.cursor(row_factory=dict_row) as cur:
+            cur.execute(query, (ids,))
+            return {row[key_field]: row for row in cur.fetchall()}
+
+
+def load_products(ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Batch-load products from PostgreSQL"""
+    rows = _load_rows(
+        "SELECT product_id, category, price, supplier FROM products WHERE product_id = ANY(%s)",
+        ids,
+        "product_id",
+    )
+    for row in rows.values():
+        row["price"] = float(row["price"]) if row["price"] is not None else None
+    return rows
+
+
+def load_users(ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Batch-load users from PostgreSQL"""
+    rows = _load_rows(
+        "SELECT user_id, signup_date, country, tier FROM users WHERE user_id = ANY(%s)",
+        ids,
+        "user_id",
+    )
+    for row in rows.values():
+        if row["signup_date"] is not None:
+            row["signup_date"] = row["signup_date"].isoformat()
+    return rows
+
+
+def write_products(records: Dict[str, Dict[str, Any]]) -> None:
+    """Upsert products (records shaped like load_products returns them)"""
+    with get_db_connection() as conn:
+        upsert_rows(
+            conn,
+            "products",
+            ("product_id", "category", "price", "supplier"),
+            ("varchar", "varchar", "numeric", "varchar"),
+            (
+                (
+                    id_,
+                    r["category"],
+                    None if r["price"] is None else Decimal(str(round(r["price"], 2))),
+                    r["supplier"],
+                )
+                for id_, r in records.items()
+            ),
+            key_columns=["product_id"],
+        )
+
+
+def write_users(records: Dict[str, Dict[str, Any]]) -> None:
+    """Upsert users (records shaped like load_users returns them)"""
+    with get_db_connection() as conn:
+        upsert_rows(
+            conn,
+            "users",
+            ("user_id", "signup_date", "country", "tier"),
+            ("varchar", "date", "varchar", "varchar"),
+            (
+                (
+                    id_,
+                    r["signup_date"] and date.fromisoformat(r["signup_date"][:10]),
+                    r["country"],
+                    r["tier"],
+                )
+                for id_, r in records.items()
+            ),
+            key_columns=["user_id"],
+        )
+
+
+def product_cache(**kwargs) -> DimensionCache:
+    """Read-through/write-through cache for the products dimension"""
+    return DimensionCache("product", load_products, writer=write_products, **kwargs)
+
+
+def user_cache(**kwargs) -> DimensionCache:
+    """Read-through/write-through cache for the users dimension"""
+    return DimensionCache("user", load_users, writer=write_users, **kwargs)
@@ -0,0 +1,134 @@
+"""
+Redis-based idempotency filter for at-least-once consumers
+
+Keys are checked before a batch is written and marked only after the write
+commits. A crash in between leaves the keys unmarked, so replayed records
+still reach the sink (whose ON CONFLICT handles them) instead of being lost.
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional
+from loguru import logger
+
+from shared.cache.redis_client import RedisClientPool
+
+
+class IdempotencyFilter:
+    """
+    Tracks keys already written to a sink.
+
+    Modes:
+        set: one ``SET key 1 NX EX ttl`` per key (exact, memory per key)
+        bloom: RedisBloom filter via BF.MEXISTS/BF.MADD (compact, approximate -
+            a fraction ``error_rate`` of new keys is reported as seen and dropped,
+            so only use it where that loss is acceptable)
+    """
+
+    MODES = ("set", "bloom")
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl_seconds: int = 7 * 24 * 3600,
+        mode: str = "set",
+        bloom_capacity: int = 10_000_000,
+        bloom_error_rate: float = 0.0001,
+        client=None,
+    ):
+        """
+        Args:
+            namespace: Key namespace, usually the topic (e.g. 'dedup:ecommerce_orders')
+            ttl_seconds: How long a key is remembered (set mode); should exceed
+                the longest replay window
+            mode: 'set' or 'bloom'
+            bloom_capacity: Expected number of keys (bloom mode)
+            bloom_error_rate: False positive rate (bloom mode)
+            client: Redis client (defaults to the shared pool)
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown mode '{mode}'. Choose from: {self.MODES}")
+
+        self.namespace = namespace
+        self.ttl = ttl_seconds
+        self.mode = mode
+        self.client = client or RedisClientPool.get_client()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+        if mode == "bloom":
+            self._bloom_key = RedisClientPool.key(namespace, "bloom")
+            try:
+                self.client.execute_command(
+                    "BF.RESERVE", self._bloom_key, bloom_error_rate, bloom_capacity
+                )
+            except Exception as e:
+                # Raised when the filter already exists; anything else surfaces on first use
+                logger.debug(f"BF.RESERVE {self._bloom_key}: {e}")
+
+    def _key(self, key: str) -> str:
+        return RedisClientPool.key(self.namespace, key)
+
+    def seen(self, keys: List[str]) -> List[bool]:
+        """
+        Check which keys were already marked, in one pipelined round trip.
+
+        Fails open: if Redis is unavailable every key is reported as new.
+        """
+        if not keys:
+            return []
+
+        try:
+            if self.mode == "bloom":
+                flags = self.client.execute_command("BF.MEXISTS", self._bloom_key, *keys)
+            else:
+                pipe = self.client.pipeline(transaction=False)
+                for key in keys:
+                    pipe.exists(self._key(key))
+                flags = pipe.execute()
+        except Exception as e:
+            logger.warning(f"Idempotency check failed for '{self.namespace}', passing batch: {e}")
+            flags = [0] * len(keys)
+
+        result = [bool(flag) for flag in flags]
+        hits = sum(result)
+        with self._lock:
+            self._hits += hits
+            self._misses += len(result) - hits
+        return result
+
+    def mark(self, keys: Iterable[str]) -> None:
+        """Mark keys as written (pipelined SET NX with TTL, or BF.MADD)"""
+        keys = list(keys)
+        if not keys:
+            return
+
+        try:
+            if self.mode == "bloom":
+                self.client.execute_command("BF.MADD", self._bloom_key, *keys)
+            else:
+                pipe = self.client.pipeline(transaction=False)
+                for key in keys:
+                    pipe.set(self._key(key), 1, nx=True, ex=self.ttl)
+                pipe.execute()
+        except Exception as e:
+            # Unmarked keys only cost an ON CONFLICT round trip on replay
+            logger.warning(f"Failed to mark {len(keys)} keys for '{self.namespace}': {e}")
+
+    @property
+    def hits(self) -> int:
+        """Keys reported as already written (dropped before the sink)"""
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """Keys reported as new"""
+        return self._misses
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        total = self._hits + self._misses
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / total if total else None,
+        }
@@ -0,0 +1,87 @@
+"""
+Redis client pool with project namespacing
+"""
+
+from typing import Optional, TYPE_CHECKING
+from loguru import logger
+
+try:
+    import redis
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+    logger.warning("redis is required for caching. Install with: pip install redis")
+
+if TYPE_CHECKING:
+    from shared.config.settings import Settings
+
+try:
+    from shared.config.settings import settings as default_settings
+except ImportError:
+    default_settings = None
+
+
+class RedisClientPool:
+    """
+    Shared Redis connection pool.
+
+    All clients share one pool per process. Keys are namespaced with the
+    project's REDIS_PREFIX (e.g. ``ecommerce:``) so projects never collide.
+    """
+
+    _pool = None
+    _prefix: str = ""
+
+    @classmethod
+    def initialize(cls, settings: Optional["Settings"] = None, max_connections: int = 50) -> None:
+        """
+        Initialize the connection pool.
+
+        Args:
+            settings: Settings instance (defaults to shared.config.settings)
+            max_connections: Maximum number of pooled connections
+        """
+        if not REDIS_AVAILABLE:
+            raise ImportError("redis is required. Install with: pip install redis")
+
+        if cls._pool is None:
+            settings = settings or default_settings
+            if not settings:
+                raise ValueError(
+                    "Settings must be provided or available from shared.config.settings"
+                )
+
+            cls._pool = redis.ConnectionPool(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                db=settings.REDIS_DB,
+                max_connections=max_connections,
+            )
+            cls._prefix = getattr(settings, "REDIS_PREFIX", "")
+            logger.info(
+                f"Redis connection pool initialized - "
+                f"{settings.REDIS_HOST}:{settings.REDIS_PORT}/{settings.REDIS_DB}, "
+                f"prefix='{cls._prefix}', max: {max_connections}"
+            )
+
+    @classmethod
+    def get_client(cls):
+        """Get a Redis client backed by the shared pool"""
+        if cls._pool is None:
+            cls.initialize()
+        return redis.Redis(connection_pool=cls._pool)
+
+    @classmethod
+    def key(cls, *parts: str) -> str:
+        """Build a namespaced key, e.g. key('product', 'prod_000001')"""
+        return cls._prefix + ":".join(str(part) for part in parts)
+
+    @classmethod
+    def close_all(cls):
+        """Disconnect all pooled connections"""
+        if cls._pool:
+            cls._pool.disconnect()
+            cls._pool = None
+            logger.info("Redis connection pool closed")
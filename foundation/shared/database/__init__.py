@@ -4,5 +4,22 @@ Database connection and utilities
 
 from shared.database.postgres_connection import PostgreSQLConnectionPool, get_db_connection
 from shared.database.init_db import run_migrations
+from shared.database.bulk_load import (
+    copy_rows,
+    deferred_indexes,
+    insert_missing_rows,
+    upsert_rows,
+)
+from shared.database.streaming import stream_query_arrow, stream_query_dicts
 
-__all__ = ["PostgreSQLConnectionPool", "get_db_connection", "run_migrations"]
+__all__ = [
+    "PostgreSQLConnectionPool",
+    "get_db_connection",
+    "run_migrations",
+    "copy_rows",
+    "upsert_rows",
+    "insert_missing_rows",
+    "deferred_indexes",
+    "stream_query_arrow",
+    "stream_query_dicts",
+]
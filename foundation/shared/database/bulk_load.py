@@ -0,0 +1,263 @@
+"""
+Bulk load path for PostgreSQL using binary COPY
+
+Rows are streamed into ``COPY ... FROM STDIN (FORMAT BINARY)`` as they are
+produced, so loads never materialize the full data set. Loads that may be
+re-run go through a temporary staging table instead, so rows that already
+exist are skipped rather than aborting the load or being duplicated.
+
+For large backfills into fresh tables, secondary indexes can be dropped for
+the duration of the load and rebuilt once at the end, which is much cheaper
+than maintaining them row by row.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Any, Generator, Iterable, List, Sequence, Tuple
+from loguru import logger
+
+try:
+    from psycopg import sql
+except ImportError:
+    sql = None
+
+from shared.database.postgres_connection import get_db_connection
+
+# Secondary indexes only: primary keys and constraint-backed unique indexes stay
+_SECONDARY_INDEXES_QUERY = """
+    SELECT i.indexname, i.indexdef
+    FROM pg_indexes i
+    JOIN pg_class c ON c.relname = i.indexname
+    JOIN pg_namespace n ON n.oid = c.relnamespace AND n.nspname = i.schemaname
+    WHERE i.schemaname = current_schema()
+      AND i.tablename = ANY(%s)
+      AND NOT EXISTS (SELECT 1 FROM pg_constraint con WHERE con.conindid = c.oid)
+    ORDER BY i.tablename, i.indexname
+"""
+
+
+def copy_rows(
+    conn,
+    table: str,
+    columns: Sequence[str],
+    types: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+) -> int:
+    """
+    Stream rows into a table with binary COPY
+
+    Binary COPY needs exact Python types per column (e.g. Decimal for numeric,
+    date for date); convert values before passing them in.
+
+    Args:
+        conn: Open psycopg connection (the caller owns the transaction)
+        table: Target table
+        columns: Target columns, in row order
+        types: PostgreSQL type names matching columns (e.g. 'varchar', 'numeric')
+        rows: Iterable of row tuples
+
+    Returns:
+        Number of rows copied
+    """
+    if len(columns) != len(types):
+        raise ValueError(f"Got {len(columns)} columns but {len(types)} types")
+
+    statement = sql.SQL("COPY {} ({}) FROM STDIN (FORMAT BINARY)").format(
+        sql.Identifier(table), sql.SQL(", ").join(map(sql.Identifier, columns))
+    )
+
+    count = 0
+    with conn.cursor() as cur:
+        with cur.copy(statement) as copy:
+            copy.set_types(list(types))
+            for row in rows:
+                copy.write_row(row)
+                count += 1
+    return count
+
+
+def _stage_rows(
+    conn,
+    table: str,
+    columns: Sequence[str],
+    types: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+) -> Tuple[str, int]:
+    """COPY rows into a temporary copy of table, dropped on commit; returns its name and count"""
+    staging = f"_stage_{table}"
+    with conn.cursor() as cur:
+        cur.execute(
+            sql.SQL("CREATE TEMP TABLE {} (LIKE {} INCLUDING DEFAULTS) ON COMMIT DROP").format(
+                sql.Identifier(staging), sql.Identifier(table)
+            )
+        )
+    return staging, copy_rows(conn, staging, columns, types, rows)
+
+
+def upsert_rows(
+    conn,
+    table: str,
+    columns: Sequence[str],
+    types: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    key_columns: Sequence[str],
+    update_existing: bool = True,
+) -> int:
+    """
+    COPY rows into a temporary table, then merge them with INSERT ... ON CONFLICT
+
+    Non-key columns of existing rows are overwritten (and updated_at refreshed
+    when the table has one), unless update_existing is False.
+
+    Args:
+        conn: Open psycopg connection (the caller owns the transaction)
+        table: Target table
+        columns: Columns being loaded
+        types: PostgreSQL type names matching columns
+        rows: Iterable of row tuples
+        key_columns: Conflict target (primary key columns)
+        update_existing: Overwrite existing rows (False = keep them, DO NOTHING)
+
+    Returns:
+        Number of rows copied into the staging table
+    """
+    staging, count = _stage_rows(conn, table, columns, types, rows)
+
+    updates = [
+        sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(c))
+        for c in columns
+        if c not in key_columns and update_existing
+    ]
+    with conn.cursor() as cur:
+        if update_existing:
+            cur.execute(
+                "SELECT 1 FROM information_schema.columns "
+                "WHERE table_schema = current_schema() AND table_name = %s "
+                "AND column_name = 'updated_at'",
+                (table,),
+            )
+            if cur.fetchone() and "updated_at" not in columns:
+                updates.append(sql.SQL("updated_at = CURRENT_TIMESTAMP"))
+
+        action = (
+            sql.SQL("DO UPDATE SET {}").format(sql.SQL(", ").join(updates))
+            if updates
+            else sql.SQL("DO NOTHING")
+        )
+        column_list = sql.SQL(", ").join(map(sql.Identifier, columns))
+        cur.execute(
+            sql.SQL("INSERT INTO {} ({}) SELECT {} FROM {} ON CONFLICT ({}) {}").format(
+                sql.Identifier(table),
+                column_list,
+                column_list,
+                sql.Identifier(staging),
+                sql.SQL(", ").join(map(sql.Identifier, key_columns)),
+                action,
+            )
+        )
+    return count
+
+
+def insert_missing_rows(
+    conn,
+    table: str,
+    columns: Sequence[str],
+    types: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    match_columns: Sequence[str],
+) -> int:
+    """
+    COPY rows into a temporary table, then insert those not already in table
+
+    For tables without a natural unique key (e.g. a SERIAL id), where ON
+    CONFLICT has nothing to detect: a row is skipped when a row with equal
+    match_columns exists. Match columns must be NOT NULL, and an index on a
+    leading match column keeps the check cheap.
+
+    Args:
+        conn: Open psycopg connection (the caller owns the transaction)
+        table: Target table
+        columns: Columns being loaded
+        types: PostgreSQL type names matching columns
+        rows: Iterable of row tuples
+        match_columns: Columns identifying a row
+
+    Returns:
+        Number of rows copied into the staging table
+    """
+    staging, count = _stage_rows(conn, table, columns, types, rows)
+
+    column_list = sql.SQL(", ").join(map(sql.Identifier, columns))
+    matches = sql.SQL(" AND ").join(
+        sql.SQL("t.{0} = s.{0}").format(sql.Identifier(c)) for c in match_columns
+    )
+    with conn.cursor() as cur:
+        cur.execute(
+            sql.SQL(
+                "INSERT INTO {} ({}) SELECT {} FROM {} s "
+                "WHERE NOT EXISTS (SELECT 1 FROM {} t WHERE {})"
+            ).format(
+                sql.Identifier(table),
+                column_list,
+                sql.SQL(", ").join(sql.SQL("s.{}").format(sql.Identifier(c)) for c in columns),
+                sql.Identifier(staging),
+                sql.Identifier(table),
+                matches,
+            )
+        )
+    return count
+
+
+@contextmanager
+def deferred_indexes(tables: List[str]) -> Generator[List[str], None, None]:
+    """
+    Drop secondary indexes on empty tables for the duration of a bulk load
+
+    The indexes are dropped from the live schema, so every other session
+    (ingestion, dbt, ad-hoc queries) loses them until the load ends; only use
+    this for loads into a database nothing else is using. Tables that already
+    hold rows keep their indexes, since rebuilding them would cost more than
+    the load saves and re-run loads rely on them to skip existing rows.
+
+    Indexes are recreated from their saved definitions on exit, also when the
+    load fails, so the schema is never left without them.
+
+    Args:
+        tables: Tables being loaded
+
+    Yields:
+        Names of the dropped indexes
+    """
+    if not tables:
+        yield []
+        return
+
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            empty = []
+            for table in tables:
+                cur.execute(
+                    sql.SQL("SELECT EXISTS (SELECT 1 FROM {})").format(sql.Identifier(table))
+                )
+                if cur.fetchone()[0]:
+                    logger.info(f"Keeping indexes on {table}: it already holds rows")
+                else:
+                    empty.append(table)
+            cur.execute(_SECONDARY_INDEXES_QUERY, (empty,))
+            indexes = cur.fetchall()
+            for name, _ in indexes:
+                cur.execute(sql.SQL("DROP INDEX IF EXISTS {}").format(sql.Identifier(name)))
+
+    if indexes:
+        logger.info(f"Dropped {len(indexes)} secondary indexes for bulk load: {empty}")
+
+    try:
+        yield [name for name, _ in indexes]
+    finally:
+        start = time.perf_counter()
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                for _, definition in indexes:
+                    cur.execute(definition)
+        if indexes:
+            logger.info(f"Rebuilt {len(indexes)} indexes in {time.perf_counter() - start:.1f}s")
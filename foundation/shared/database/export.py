@@ -0,0 +1,132 @@
+"""
+Export operational tables to date-partitioned Parquet with bounded memory
+
+Rows are streamed through a server-side cursor in timestamp order, so only one
+chunk and one open Parquet writer are held in memory at any time.
+"""
+
+import argparse
+from datetime import date
+from pathlib import Path
+from typing import Optional
+from loguru import logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    pc = None
+    pq = None
+    PYARROW_AVAILABLE = False
+
+from shared.database.streaming import DEFAULT_CHUNK_SIZE, stream_query_arrow
+
+# Exportable tables and the event-time column used for partitioning
+EXPORT_TABLES = {
+    "orders": "timestamp",
+    "page_views": "timestamp",
+    "inventory_changes": "timestamp",
+}
+
+
+def export_table_to_parquet(
+    table: str,
+    output_dir: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    compression: str = "snappy",
+) -> int:
+    """
+    Stream a table into ``{output_dir}/{table}/dt=YYYY-MM-DD/part-00000.parquet``.
+
+    Args:
+        table: Table name (one of EXPORT_TABLES)
+        output_dir: Root directory of the dataset
+        chunk_size: Rows fetched per round trip and written per row group
+        since: Inclusive lower bound on the event date
+        until: Exclusive upper bound on the event date
+        compression: Parquet compression codec
+
+    Returns:
+        Number of rows exported
+    """
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow is required. Install with: pip install pyarrow")
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"Unknown table '{table}'. Choose from: {sorted(EXPORT_TABLES)}")
+
+    ts_col = EXPORT_TABLES[table]
+    conditions, params = [], []
+    if since:
+        conditions.append(f'"{ts_col}" >= %s')
+        params.append(since)
+    if until:
+        conditions.append(f'"{ts_col}" < %s')
+        params.append(until)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = f'SELECT * FROM {table} {where} ORDER BY "{ts_col}"'
+
+    table_dir = Path(output_dir) / table
+    writer = None
+    current_dt = None
+    total_rows = 0
+
+    try:
+        for batch in stream_query_arrow(query, params, chunk_size=chunk_size):
+            dates = batch.column(ts_col).cast(pa.date32())
+            # Rows arrive in timestamp order, so a chunk spans at most a few dates
+            for dt in pc.unique(dates).to_pylist():
+                part = batch.filter(pc.equal(dates, pa.scalar(dt, pa.date32())))
+                if dt != current_dt:
+                    if writer:
+                        writer.close()
+                    partition_dir = table_dir / f"dt={dt.isoformat()}"
+                    partition_dir.mkdir(parents=True, exist_ok=True)
+                    writer = pq.ParquetWriter(
+                        partition_dir / "part-00000.parquet",
+                        batch.schema,
+                        compression=compression,
+                    )
+                    current_dt = dt
+                writer.write_batch(part, row_group_size=chunk_size)
+                total_rows += part.num_rows
+    finally:
+        if writer:
+            writer.close()
+
+    logger.info(f"Exported {total_rows} rows from {table} to {table_dir}")
+    return total_rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export tables to partitioned Parquet")
+    parser.add_argument("tables", nargs="+", choices=sorted(EXPORT_TABLES))
+    parser.add_argument("--output-dir", default="data/exports")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--since", type=date.fromisoformat, help="Inclusive start date")
+    parser.add_argument("--until", type=date.fromisoformat, help="Exclusive end date")
+    args = parser.parse_args(argv)
+
+    for table in args.tables:
+        export_table_to_parquet(
+            table,
+            args.output_dir,
+            chunk_size=args.chunk_size,
+            since=args.since,
+            until=args.until,
+        )
+
+
+if __name__ == "__main__":
+    from shared.database.postgres_connection import PostgreSQLConnectionPool
+
+    PostgreSQLConnectionPool.initialize()
+    try:
+        main()
+    finally:
+        PostgreSQLConnectionPool.close_all()
@@ -1,44 +1,260 @@
 """
 Initialize PostgreSQL database schema
+
+Migrations are versioned SQL files in ``migrations/`` (``NNN_description.sql``).
+Applied versions are recorded in ``schema_migrations`` together with a checksum,
+so only pending files run and edits to already-applied files are detected.
+
+Each migration runs in its own transaction. Files starting with the marker
+``-- migrate:no-transaction`` run statement by statement in autocommit mode,
+which is required for statements such as ``CREATE INDEX CONCURRENTLY``.
 """
 
-# import os
+import hashlib
+import time
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Dict, List, Optional
 from loguru import logger
-from shared.database.postgres_connection import get_db_connection
+from shared.database.postgres_connection import PostgreSQLConnectionPool
 
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+HISTORY_TABLE = "schema_migrations"
+NO_TRANSACTION_MARKER = "-- migrate:no-transaction"
 
-def run_migrations():
-    """Run database migrations"""
-    migrations_dir = Path(__file__).parent / "migrations"
+# Arbitrary constant shared by all runners so concurrent service startups
+# apply migrations one at a time
+ADVISORY_LOCK_ID = 727_001
 
-    # Get all SQL files sorted by name
-    sql_files = sorted(migrations_dir.glob("*.sql"))
 
-    if not sql_files:
-        logger.warning("No migration files found")
-        return
+@dataclass
+class Migration:
+    """A single versioned SQL migration file"""
+
+    version: str
+    name: str
+    sql: str
+    checksum: str
+    transactional: bool = True
+
+
+def load_migrations(migrations_dir: Path = MIGRATIONS_DIR) -> List[Migration]:
+    """Load migration files sorted by version"""
+    migrations = []
+    for sql_file in sorted(migrations_dir.glob("*.sql")):
+        raw = sql_file.read_bytes()
+        sql = raw.decode("utf-8", errors="ignore")
+        version = sql_file.stem.split("_", 1)[0]
+        first_line = sql.lstrip().splitlines()[0].strip().lower() if sql.strip() else ""
+        migrations.append(
+            Migration(
+                version=version,
+                name=sql_file.name,
+                sql=sql,
+                checksum=hashlib.sha256(raw).hexdigest(),
+                transactional=first_line != NO_TRANSACTION_MARKER,
+            )
+        )
+
+    versions = [m.version for m in migrations]
+    duplicates = {v for v in versions if versions.count(v) > 1}
+    if duplicates:
+        raise ValueError(f"Duplicate migration versions: {sorted(duplicates)}")
+    return migrations
+
+
+def split_sql_statements(sql: str) -> List[str]:
+    """
+    Split a SQL script into statements on top-level semicolons.
+
+    Semicolons inside quotes, dollar-quoted bodies ($$ ... $$, $fn$ ... $fn$)
+    and comments are ignored. Only used for non-transactional migrations;
+    transactional ones are sent to the server as a whole script.
+    """
+    statements = []
+    current: List[str] = []
+    i = 0
+    n = len(sql)
+
+    while i < n:
+        ch = sql[i]
+
+        # Line comment
+        if sql.startswith("--", i):
+            end = sql.find("\n", i)
+            end = n if end == -1 else end
+            current.append(sql[i:end])
+            i = end
+            continue
+
+        # Block comment
+        if sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            end = n if end == -1 else end + 2
+            current.append(sql[i:end])
+            i = end
+            continue
+
+        # Quoted string or identifier ('' and "" escape by doubling)
+        if ch in ("'", '"'):
+            j = i + 1
+            while j < n:
+                if sql[j] == ch:
+                    if j + 1 < n and sql[j + 1] == ch:
+                        j += 2
+                        continue
+                    break
+                j += 1
+            current.append(sql[i : j + 1])
+            i = j + 1
+            continue
+
+        # Dollar-quoted body
+        if ch == "$":
+            end_tag = sql.find("$", i + 1)
+            tag = sql[i : end_tag + 1] if end_tag != -1 else ""
+            label = tag[1:-1]
+            if tag and (not label or (label.replace("_", "").isalnum() and not label[0].isdigit())):
+                close = sql.find(tag, end_tag + 1)
+                close = n if close == -1 else close + len(tag)
+                current.append(sql[i:close])
+                i = close
+                continue
+
+        if ch == ";":
+            statement = "".join(current).strip()
+            if _has_code(statement):
+                statements.append(statement)
+            current = []
+        else:
+            current.append(ch)
+        i += 1
+
+    statement = "".join(current).strip()
+    if _has_code(statement):
+        statements.append(statement)
+    return statements
+
+
+def _has_code(statement: str) -> bool:
+    """True if the statement contains anything besides comments"""
+    lines = [line.strip() for line in statement.splitlines()]
+    return any(line and not line.startswith("--") for line in lines)
+
 
-    logger.info(f"Running {len(sql_files)} migration(s)...")
+def _ensure_history_table(conn) -> None:
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS {HISTORY_TABLE} (
+                version VARCHAR(50) PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                checksum CHAR(64) NOT NULL,
+                execution_ms INTEGER NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """)
 
-    with get_db_connection() as conn:
+
+def _applied_checksums(conn) -> Dict[str, str]:
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT version, checksum FROM {HISTORY_TABLE}")
+        return {version: checksum for version, checksum in cur.fetchall()}
+
+
+def get_pending_migrations(migrations: List[Migration], applied: Dict[str, str]) -> List[Migration]:
+    """Return migrations not yet applied; fail if an applied file was modified"""
+    for migration in migrations:
+        recorded = applied.get(migration.version)
+        if recorded and recorded.strip() != migration.checksum:
+            raise RuntimeError(
+                f"Checksum mismatch for applied migration {migration.name}. "
+                "Applied migrations must not be edited - add a new migration instead."
+            )
+    return [m for m in migrations if m.version not in applied]
+
+
+def _apply(conn, migration: Migration) -> None:
+    """Apply one migration and record it in the history table"""
+    started = time.perf_counter()
+
+    if migration.transactional:
+        with conn.transaction():
+            with conn.cursor() as cur:
+                # Sent as one script so functions and DO blocks stay intact
+                cur.execute(migration.sql)
+                _record(cur, migration, started)
+    else:
+        # Autocommit: each statement commits on its own, as CONCURRENTLY requires.
+        # Statements should be idempotent (IF NOT EXISTS) so a partial run can resume.
         with conn.cursor() as cur:
-            for sql_file in sql_files:
-                logger.info(f"Running migration: {sql_file.name}")
-                with open(sql_file, "r", encoding="utf-8", errors="ignore") as f:
-                    sql_content = f.read()
-                    # Execute each statement separately
-                    statements = [s.strip() for s in sql_content.split(";") if s.strip()]
-                    for statement in statements:
-                        if statement:
-                            cur.execute(statement)
-                logger.info(f"Migration {sql_file.name} completed")
+            for statement in split_sql_statements(migration.sql):
+                cur.execute(statement)
+            _record(cur, migration, started)
+
+
+def _record(cur, migration: Migration, started: float) -> None:
+    cur.execute(
+        f"INSERT INTO {HISTORY_TABLE} (version, name, checksum, execution_ms) "
+        "VALUES (%s, %s, %s, %s)",
+        (
+            migration.version,
+            migration.name,
+            migration.checksum,
+            int((time.perf_counter() - started) * 1000),
+        ),
+    )
+
+
+def run_migrations(migrations_dir: Optional[Path] = None) -> int:
+    """
+    Apply pending database migrations.
+
+    Args:
+        migrations_dir: Directory with versioned SQL files (defaults to shared migrations)
+
+    Returns:
+        Number of migrations applied
+    """
+    migrations = load_migrations(migrations_dir or MIGRATIONS_DIR)
+
+    if not migrations:
+        logger.warning("No migration files found")
+        return 0
+
+    conn = PostgreSQLConnectionPool.get_connection()
+    previous_autocommit = conn.autocommit
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_lock(%s)", (ADVISORY_LOCK_ID,))
+        try:
+            _ensure_history_table(conn)
+            pending = get_pending_migrations(migrations, _applied_checksums(conn))
+
+            if not pending:
+                logger.info(f"Database schema up to date ({len(migrations)} migration(s) applied)")
+                return 0
+
+            logger.info(f"Running {len(pending)} pending migration(s)...")
+            for migration in pending:
+                mode = "" if migration.transactional else " (no transaction)"
+                logger.info(f"Running migration: {migration.name}{mode}")
+                _apply(conn, migration)
+                logger.info(f"Migration {migration.name} completed")
+        finally:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_unlock(%s)", (ADVISORY_LOCK_ID,))
+    except Exception as e:
+        logger.error(f"Migration failed: {e}")
+        raise
+    finally:
+        conn.autocommit = previous_autocommit
+        PostgreSQLConnectionPool.return_connection(conn)
 
     logger.info("All migrations completed successfully")
+    return len(pending)
 
 
 if __name__ == "__main__":
-    from shared.database.postgres_connection import PostgreSQLConnectionPool
-
     PostgreSQLConnectionPool.initialize()
     run_migrations()
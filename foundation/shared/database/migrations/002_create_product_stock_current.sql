@@ -0,0 +1,19 @@
+-- Current stock per product, maintained incrementally by the inventory pipeline
+-- inventory_changes stays the append-only history; this table answers point lookups in O(1)
+
+CREATE TABLE IF NOT EXISTS product_stock_current (
+    product_id VARCHAR(255) PRIMARY KEY,
+    current_stock INTEGER NOT NULL,
+    warehouse_id VARCHAR(255),
+    last_event_at TIMESTAMP NOT NULL,
+    last_offset BIGINT,  -- Kafka offset of the applied change (tie-breaker for equal timestamps)
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Seed from existing history (latest change per product)
+INSERT INTO product_stock_current (product_id, current_stock, warehouse_id, last_event_at)
+SELECT DISTINCT ON (product_id)
+    product_id, current_stock, warehouse_id, timestamp
+FROM inventory_changes
+ORDER BY product_id, timestamp DESC, id DESC
+ON CONFLICT (product_id) DO NOTHING;
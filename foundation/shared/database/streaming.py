@@ -0,0 +1,199 @@
+"""
+Streaming read path for PostgreSQL using named server-side cursors
+
+Rows are fetched from the server in fixed-size chunks, so memory stays bounded
+by ``chunk_size`` no matter how large the result set is.
+"""
+
+import json
+import uuid
+from typing import Any, Callable, Dict, Generator, List, Optional, Sequence, Tuple
+from loguru import logger
+
+try:
+    import pyarrow as pa
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    PYARROW_AVAILABLE = False
+
+try:
+    from psycopg.rows import dict_row
+except ImportError:
+    dict_row = None
+
+from shared.database.postgres_connection import get_db_connection
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+# PostgreSQL type OID -> Arrow type factory (numeric is handled separately)
+_ARROW_TYPES = {
+    16: lambda: pa.bool_(),  # bool
+    17: lambda: pa.binary(),  # bytea
+    19: lambda: pa.string(),  # name
+    20: lambda: pa.int64(),  # int8
+    21: lambda: pa.int16(),  # int2
+    23: lambda: pa.int32(),  # int4
+    25: lambda: pa.string(),  # text
+    114: lambda: pa.string(),  # json (serialized)
+    700: lambda: pa.float32(),  # float4
+    701: lambda: pa.float64(),  # float8
+    1042: lambda: pa.string(),  # bpchar
+    1043: lambda: pa.string(),  # varchar
+    1082: lambda: pa.date32(),  # date
+    1083: lambda: pa.time64("us"),  # time
+    1114: lambda: pa.timestamp("us"),  # timestamp
+    1184: lambda: pa.timestamp("us", tz="UTC"),  # timestamptz
+    1186: lambda: pa.duration("us"),  # interval (months count as 30 days)
+    2950: lambda: pa.string(),  # uuid
+    3802: lambda: pa.string(),  # jsonb (serialized)
+}
+_NUMERIC_OID = 1700
+
+# Array type OID -> element type OID
+_ARRAY_ELEMENT_OIDS = {
+    1000: 16,  # bool[]
+    1001: 17,  # bytea[]
+    1005: 21,  # int2[]
+    1007: 23,  # int4[]
+    1009: 25,  # text[]
+    1014: 1042,  # bpchar[]
+    1015: 1043,  # varchar[]
+    1016: 20,  # int8[]
+    1021: 700,  # float4[]
+    1022: 701,  # float8[]
+    1115: 1114,  # timestamp[]
+    1182: 1082,  # date[]
+    1185: 1184,  # timestamptz[]
+    1231: _NUMERIC_OID,  # numeric[]
+    2951: 2950,  # uuid[]
+    3807: 3802,  # jsonb[]
+}
+
+
+def _json_text(value) -> str:
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+# Values psycopg loads as Python types Arrow cannot take as-is
+_CONVERTERS = {
+    114: _json_text,
+    2950: str,
+    3802: _json_text,
+}
+
+
+def _arrow_type(oid: int, name: str, precision=None, scale=None):
+    """Arrow type and per-value converter (or None) for a PostgreSQL type OID"""
+    if oid == _NUMERIC_OID:
+        if precision is not None and scale is not None:
+            return pa.decimal128(precision, scale), None
+        # Unconstrained numeric has no fixed scale
+        return pa.float64(), float
+    if oid in _ARRAY_ELEMENT_OIDS:
+        element_type, element_convert = _arrow_type(_ARRAY_ELEMENT_OIDS[oid], name)
+        if element_convert is None:
+            return pa.list_(element_type), None
+        return pa.list_(element_type), lambda values: [
+            None if v is None else element_convert(v) for v in values
+        ]
+    if oid not in _ARROW_TYPES:
+        raise ValueError(
+            f"Column '{name}' has PostgreSQL type OID {oid} with no Arrow mapping; "
+            f"cast it in the query (e.g. {name}::text)"
+        )
+    return _ARROW_TYPES[oid](), _CONVERTERS.get(oid)
+
+
+def _arrow_columns(description) -> Tuple["pa.Schema", List[Optional[Callable]]]:
+    """
+    Fixed Arrow schema and per-column value converters from cursor metadata
+
+    The schema comes from the query, not the data, so chunks never drift.
+
+    Raises:
+        ValueError: If a column's type has no Arrow mapping (before any row is converted)
+    """
+    fields, converters = [], []
+    for column in description:
+        arrow_type, convert = _arrow_type(
+            column.type_code, column.name, column.precision, column.scale
+        )
+        fields.append(pa.field(column.name, arrow_type))
+        converters.append(convert)
+    return pa.schema(fields), converters
+
+
+def _stream_rows(
+    query: str,
+    params: Optional[Sequence[Any]],
+    chunk_size: int,
+    row_factory=None,
+) -> Generator:
+    """Yield (description, rows) chunks from a named server-side cursor"""
+    cursor_name = f"stream_{uuid.uuid4().hex[:12]}"
+    total = 0
+
+    with get_db_connection() as conn:
+        kwargs = {"row_factory": row_factory} if row_factory else {}
+        with conn.cursor(name=cursor_name, **kwargs) as cur:
+            cur.itersize = chunk_size
+            cur.execute(query, params)
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                total += len(rows)
+                yield cur.description, rows
+
+    logger.debug(f"Streamed {total} rows in chunks of {chunk_size}")
+
+
+def stream_query_dicts(
+    query: str,
+    params: Optional[Sequence[Any]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Generator[List[Dict[str, Any]], None, None]:
+    """
+    Stream query results as lists of dicts.
+
+    Args:
+        query: SQL query
+        params: Query parameters
+        chunk_size: Rows per yielded chunk (and per server round trip)
+    """
+    for _, rows in _stream_rows(query, params, chunk_size, row_factory=dict_row):
+        yield rows
+
+
+def stream_query_arrow(
+    query: str,
+    params: Optional[Sequence[Any]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Generator["pa.RecordBatch", None, None]:
+    """
+    Stream query results as Arrow record batches with a schema fixed by the query.
+
+    uuid and json/jsonb columns arrive as strings, intervals as durations and
+    arrays as lists; other types without a mapping raise ValueError up front, so
+    cast them in the query.
+
+    Args:
+        query: SQL query
+        params: Query parameters
+        chunk_size: Rows per record batch (and per server round trip)
+    """
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow is required. Install with: pip install pyarrow")
+
+    schema = None
+    for description, rows in _stream_rows(query, params, chunk_size):
+        if schema is None:
+            schema, converters = _arrow_columns(description)
+        arrays = []
+        for values, field, convert in zip(zip(*rows), schema, converters):
+            if convert is not None:
+                values = [None if v is None else convert(v) for v in values]
+            arrays.append(pa.array(values, type=field.type))
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
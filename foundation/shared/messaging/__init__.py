@@ -4,6 +4,16 @@ Messaging infrastructure (Kafka/Redpanda)
 
 from shared.messaging.redpanda_producer import RedpandaProducer
 from shared.messaging.redpanda_consumer import RedpandaConsumer
-from shared.messaging.batch_processor import BatchProcessor
+from shared.messaging.batch_processor import Batch, BatchProcessor, MemoryBudget
+from shared.messaging.offset_tracker import OffsetTracker
+from shared.messaging.spill import SpillLog
 
-__all__ = ["RedpandaProducer", "RedpandaConsumer", "BatchProcessor"]
+__all__ = [
+    "RedpandaProducer",
+    "RedpandaConsumer",
+    "Batch",
+    "BatchProcessor",
+    "MemoryBudget",
+    "OffsetTracker",
+    "SpillLog",
+]
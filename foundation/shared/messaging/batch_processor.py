@@ -1,57 +1,495 @@
 """Generic batch processor for micro-batching patterns"""
 
+import threading
 import time
 from abc import ABC, abstractmethod
-from typing import Any, List, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, TYPE_CHECKING
 from loguru import logger
 
+if TYPE_CHECKING:
+    from shared.messaging.spill import SpillLog
+
+# Weight of the latest flush in the running output/input size ratio
+OUTPUT_RATIO_SMOOTHING = 0.3
+
+# Backoff between retries of a failed background flush
+RETRY_MAX_DELAY_SECONDS = 60.0
+
+# How often tick() probes the sink with spilled batches when nothing else succeeds
+DEFAULT_REPLAY_INTERVAL_SECONDS = 30.0
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate JSON-serialized size of a decoded message, without serializing it"""
+    if isinstance(value, (str, bytes)):
+        return len(value) + 2
+    if isinstance(value, dict):
+        return 2 + sum(len(str(key)) + 4 + estimate_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return 2 + sum(estimate_size(item) + 1 for item in value)
+    if value is None:
+        return 4
+    return 8  # Numbers and booleans
+
+
+class MemoryBudget:
+    """
+    Byte budget for buffered items, shared by processors in one process
+
+    When buffered bytes exceed the budget, the processor holding the most
+    flushes on its next add() or tick(), so small buffers are not forced into
+    tiny files. Bytes handed to background flush workers do not trigger
+    flushes; instead a hand-off waits until in-flight bytes are below the
+    limit, so memory peaks at about twice the limit (one buffered and one
+    in-flight budget) while the next batch fills during an upload.
+    """
+
+    def __init__(self, limit_bytes: int):
+        """
+        Args:
+            limit_bytes: Total buffered bytes (as estimated by the processors)
+        """
+        if limit_bytes <= 0:
+            raise ValueError(f"Memory budget must be positive, got {limit_bytes}")
+        self.limit_bytes = limit_bytes
+        self._held: Dict[int, int] = {}
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._in_flight_released = threading.Condition(self._lock)
+
+    def reserve(self, owner: object, nbytes: int) -> None:
+        with self._lock:
+            self._held[id(owner)] = self._held.get(id(owner), 0) + nbytes
+
+    def release(self, owner: object, nbytes: int) -> None:
+        with self._lock:
+            self._held[id(owner)] = max(0, self._held.get(id(owner), 0) - nbytes)
+
+    def hand_off(self, owner: object, nbytes: int) -> None:
+        """
+        Move bytes from an owner's buffer to in-flight flushes
+
+        Blocks while in-flight bytes would exceed the limit (a batch is always
+        let through when nothing else is in flight).
+        """
+        with self._lock:
+            self._in_flight_released.wait_for(
+                lambda: self._in_flight == 0 or self._in_flight + nbytes <= self.limit_bytes
+            )
+            self._held[id(owner)] = max(0, self._held.get(id(owner), 0) - nbytes)
+            self._in_flight += nbytes
+
+    def release_in_flight(self, nbytes: int) -> None:
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - nbytes)
+            self._in_flight_released.notify_all()
+
+    @property
+    def used_bytes(self) -> int:
+        with self._lock:
+            return sum(self._held.values()) + self._in_flight
+
+    def should_flush(self, owner: object) -> bool:
+        """True when buffered bytes exceed the budget and owner holds the largest buffer"""
+        with self._lock:
+            held = self._held.get(id(owner), 0)
+            return (
+                held > 0
+                and sum(self._held.values()) >= self.limit_bytes
+                and held == max(self._held.values())
+            )
+
+
+@dataclass
+class Batch:
+    """Items swapped out of the buffer, with their positions (e.g. offsets)"""
+
+    items: List[Any]
+    positions: List[Any] = field(default_factory=list)
+    nbytes: int = 0
+
 
 class BatchProcessor(ABC):
-    """Abstract batch processor with size and time-based flush triggers"""
+    """
+    Abstract batch processor with size, byte and time-based flush triggers
+
+    The timeout counts from the oldest buffered item. It is checked on add()
+    and on tick(), which callers drive from idle polls or from the optional
+    background timer, so a partial batch is flushed even when input stops.
+    All buffer access is serialized by a lock.
+
+    Byte triggers use estimated item sizes. With a target output size, the
+    processor learns the output/input ratio from the sizes subclasses report
+    via record_output_bytes() and flushes once the buffer should encode to
+    about that size.
+
+    A flush swaps the buffer out as a Batch, so add() never re-copies items.
+    With flush_workers > 0 batches go to a bounded thread pool and add()
+    keeps accepting items (it blocks only when max_pending_flushes batches,
+    or the memory budget's worth of bytes, are in flight; the buffer lock is
+    not held while it waits); a failed background flush is retried with backoff. In
+    the default synchronous mode a failed batch is kept and retried first on
+    the next flush. Either way on_flushed receives the positions of every
+    batch once it is durable, in completion order.
+
+    With a spill log, a batch whose flush fails is written to local disk
+    instead of being held in memory, and counts as durable. Spilled batches
+    are replayed oldest first after the next successful flush (the sink is
+    back) or periodically from tick(); each segment is deleted once processed.
+    """
 
     def __init__(
         self,
         batch_size: int = 5000,
         batch_timeout_seconds: int = 60,
+        max_batch_bytes: Optional[int] = None,
+        target_output_bytes: Optional[int] = None,
+        memory_budget: Optional[MemoryBudget] = None,
+        flush_workers: int = 0,
+        max_pending_flushes: Optional[int] = None,
+        on_flushed: Optional[Callable[[List[Any]], None]] = None,
+        spill_log: Optional["SpillLog"] = None,
+        replay_interval_seconds: float = DEFAULT_REPLAY_INTERVAL_SECONDS,
     ):
+        """
+        Args:
+            batch_size: Flush at this many items
+            batch_timeout_seconds: Flush when the oldest item is this old
+            max_batch_bytes: Flush at this many buffered (estimated) bytes
+            target_output_bytes: Desired size of a flushed batch's output (e.g. file size)
+            memory_budget: Budget shared with other processors
+            flush_workers: Background flush threads (0 = flush in the caller)
+            max_pending_flushes: Batches in flight before add() blocks
+                (defaults to flush_workers)
+            on_flushed: Called with a batch's positions once it is durable
+                (on the flushing thread)
+            spill_log: Local log for batches the sink rejected
+            replay_interval_seconds: Minimum time between tick()-driven replay attempts
+        """
         self.batch_size = batch_size
         self.batch_timeout = batch_timeout_seconds
+        self.max_batch_bytes = max_batch_bytes
+        self.target_output_bytes = target_output_bytes
+        self.memory_budget = memory_budget
+        self.on_flushed = on_flushed
+        self.spill_log = spill_log
+        self.replay_interval = replay_interval_seconds
+        self._replay_lock = threading.Lock()
+        self._last_replay_attempt = 0.0
         self._buffer: List[Any] = []
-        self._last_flush_time = time.time()
+        self._positions: List[Any] = []
+        self._buffer_bytes = 0
+        self._failed: Deque[Batch] = deque()
+        self._output_ratio: Optional[float] = None
+        self._ratio_lock = threading.Lock()
+        self._flush_state = threading.local()
+        self._batch_started_at = time.time()
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Thread] = None
+        self._timer_stop = threading.Event()
 
-    def add(self, item: Any) -> bool:
-        """Add item to buffer. Returns True if flush was triggered."""
-        self._buffer.append(item)
-        if self._should_flush():
-            return self.flush()
-        return False
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight = 0
+        self._in_flight_changed = threading.Condition()
+        self._stopping = threading.Event()
+        if flush_workers > 0:
+            self._executor = ThreadPoolExecutor(
+                max_workers=flush_workers, thread_name_prefix="batch-flush"
+            )
+            self._slots = threading.BoundedSemaphore(max_pending_flushes or flush_workers)
+
+    def add(self, item: Any, size: Optional[int] = None, position: Any = None) -> bool:
+        """
+        Add item to buffer. Returns True if flush was triggered.
+
+        Args:
+            item: Item to buffer
+            size: Item size in bytes if known (e.g. the raw message length);
+                estimated otherwise
+            position: Opaque position reported to on_flushed (e.g. an offset)
+        """
+        if size is None:
+            size = self._estimate_size(item)
+        with self._lock:
+            if not self._buffer:
+                self._batch_started_at = time.time()
+            self._buffer.append(item)
+            if position is not None:
+                self._positions.append(position)
+            self._buffer_bytes += size
+            if self.memory_budget:
+                self.memory_budget.reserve(self, size)
+            if not self._should_flush():
+                return False
+        # Outside the lock: a background hand-off may wait for a free worker
+        return self.flush()
+
+    def tick(self) -> bool:
+        """Enforce the timeout without new input. Returns True if a flush succeeded."""
+        self._maybe_replay(force=False)
+        with self._lock:
+            if not ((self._buffer or self._failed) and self._should_flush()):
+                return False
+        return self.flush()
+
+    def _estimate_size(self, item: Any) -> int:
+        """Size of an item in bytes; override for non-JSON-like items"""
+        return estimate_size(item)
+
+    @property
+    def byte_limit(self) -> Optional[int]:
+        """Buffered bytes that trigger a flush (None when only count/time apply)"""
+        limits = []
+        if self.max_batch_bytes:
+            limits.append(self.max_batch_bytes)
+        if self.target_output_bytes:
+            ratio = self._output_ratio or 1.0  # Until a flush has been measured
+            limits.append(int(self.target_output_bytes / ratio))
+        return min(limits) if limits else None
+
+    def record_output_bytes(self, nbytes: int) -> None:
+        """Report bytes written for the batch being flushed (call from _process_batch)"""
+        self._flush_state.output_bytes = getattr(self._flush_state, "output_bytes", 0) + nbytes
+
+    @property
+    def flushing_positions(self) -> List[Any]:
+        """Positions of the batch being flushed (call from _process_batch)"""
+        return getattr(self._flush_state, "positions", [])
+
+    def _process(self, batch: Batch) -> bool:
+        self._flush_state.positions = batch.positions
+        try:
+            return self._process_batch(batch.items)
+        finally:
+            self._flush_state.positions = []
 
     def _should_flush(self) -> bool:
         """Check if flush should be triggered"""
+        if self._failed:
+            return True
         if len(self._buffer) >= self.batch_size:
             return True
-        if time.time() - self._last_flush_time >= self.batch_timeout:
+        byte_limit = self.byte_limit
+        if byte_limit and self._buffer_bytes >= byte_limit:
+            return True
+        if self.memory_budget and self.memory_budget.should_flush(self):
+            return True
+        if time.time() - self._batch_started_at >= self.batch_timeout:
             return True
         return False
 
+    def _swap(self) -> Batch:
+        """Take the buffer as a batch and start a new one (O(1))"""
+        batch = Batch(self._buffer, self._positions, self._buffer_bytes)
+        self._buffer, self._positions, self._buffer_bytes = [], [], 0
+        return batch
+
     def flush(self) -> bool:
-        """Flush buffer using subclass implementation"""
-        if not self._buffer:
-            return True
+        """
+        Flush buffer using subclass implementation
+
+        Returns True when the batch was processed (synchronous mode) or handed
+        to a flush worker (background mode).
+        """
+        if self._executor is not None:
+            with self._lock:
+                # Batches given up on at shutdown go first, in their original order
+                batches = list(self._failed)
+                self._failed.clear()
+                if self._buffer:
+                    batches.append(self._swap())
+            return self._submit(batches)
+
+        with self._lock:
+            while self._failed:
+                batch = self._failed[0]
+                if not self._run(batch, owner=self) and not self._spill(batch, owner=self):
+                    return False
+                self._failed.popleft()
 
-        batch = self._buffer.copy()
-        logger.info(f"Flushing batch of {len(batch)} items")
+            if not self._buffer:
+                return True
+            batch = self._swap()
+            if self._run(batch, owner=self) or self._spill(batch, owner=self):
+                return True
+            self._failed.append(batch)
+            return False
+
+    def _submit(self, batches: List[Batch]) -> bool:
+        """Hand batches to the workers; called without the buffer lock held"""
+        for batch in batches:
+            self._slots.acquire()  # Backpressure: blocks add() while the pool is full
+            if self.memory_budget:
+                # Also blocks while in-flight bytes are over the budget
+                self.memory_budget.hand_off(self, batch.nbytes)
+            with self._in_flight_changed:
+                self._in_flight += 1
+            self._executor.submit(self._flush_in_background, batch)
+        return True
 
+    def _flush_in_background(self, batch: Batch) -> None:
         try:
-            success = self._process_batch(batch)
-            if success:
-                self._buffer.clear()
-                self._last_flush_time = time.time()
-                logger.info("Batch flush successful")
-            return success
+            delay = 1.0
+            while not self._run(batch, owner=None):
+                if self._spill(batch, owner=None):
+                    return
+                if self._stopping.wait(delay):
+                    # Shutting down: keep the items for a later flush(), never drop them
+                    if self.memory_budget:
+                        self.memory_budget.release_in_flight(batch.nbytes)
+                    with self._lock:
+                        self._failed.append(batch)
+                        if self.memory_budget:
+                            self.memory_budget.reserve(self, batch.nbytes)
+                    return
+                delay = min(delay * 2, RETRY_MAX_DELAY_SECONDS)
+        finally:
+            self._slots.release()
+            with self._in_flight_changed:
+                self._in_flight -= 1
+                self._in_flight_changed.notify_all()
+
+    def _run(self, batch: Batch, owner: Optional[object]) -> bool:
+        """Process one batch; on success release its memory and report its positions"""
+        logger.info(f"Flushing batch of {len(batch.items)} items ({batch.nbytes} bytes)")
+        self._flush_state.output_bytes = 0
+        try:
+            success = self._process(batch)
         except Exception as e:
             logger.error(f"Batch flush failed: {e}")
             return False
+        if not success:
+            return False
+
+        self._update_output_ratio(self._flush_state.output_bytes, batch.nbytes)
+        if self.memory_budget:
+            if owner is None:
+                self.memory_budget.release_in_flight(batch.nbytes)
+            else:
+                self.memory_budget.release(owner, batch.nbytes)
+        logger.info("Batch flush successful")
+        if self.on_flushed and batch.positions:
+            self.on_flushed(batch.positions)
+        self._maybe_replay(force=True)
+        return True
+
+    def _spill(self, batch: Batch, owner: Optional[object]) -> bool:
+        """Write a failed batch to the spill log; it then counts as durable"""
+        if self.spill_log is None or not self.spill_log.append(batch):
+            return False
+        if self.memory_budget:
+            if owner is None:
+                self.memory_budget.release_in_flight(batch.nbytes)
+            else:
+                self.memory_budget.release(owner, batch.nbytes)
+        if self.on_flushed and batch.positions:
+            self.on_flushed(batch.positions)
+        return True
+
+    def _maybe_replay(self, force: bool) -> None:
+        if self.spill_log is None or not len(self.spill_log):
+            return
+        if not force and time.time() - self._last_replay_attempt < self.replay_interval:
+            return
+        self.replay_spilled()
+
+    def replay_spilled(self) -> int:
+        """
+        Process spilled batches oldest first, stopping at the first failure
+
+        Only one replay runs at a time; concurrent calls return immediately.
+
+        Returns:
+            Number of segments replayed
+        """
+        if self.spill_log is None or not self._replay_lock.acquire(blocking=False):
+            return 0
+        replayed = 0
+        try:
+            self._last_replay_attempt = time.time()
+            for segment in self.spill_log.segments():
+                batch = self.spill_log.read(segment)
+                logger.info(f"Replaying {len(batch.items)} spilled items from {segment.name}")
+                try:
+                    success = self._process(batch)
+                except Exception as e:
+                    logger.error(f"Replay of {segment.name} failed: {e}")
+                    success = False
+                if not success:
+                    break
+                self.spill_log.remove(segment)
+                replayed += 1
+        finally:
+            self._replay_lock.release()
+        if replayed:
+            logger.info(f"Replayed {replayed} spilled batches, {len(self.spill_log)} left")
+        return replayed
+
+    def _update_output_ratio(self, output_bytes: int, input_bytes: int) -> None:
+        if not output_bytes or not input_bytes:
+            return
+        ratio = output_bytes / input_bytes
+        with self._ratio_lock:
+            if self._output_ratio is None:
+                self._output_ratio = ratio
+            else:
+                self._output_ratio += OUTPUT_RATIO_SMOOTHING * (ratio - self._output_ratio)
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        Flush what is buffered and wait for background flushes
+
+        Args:
+            timeout: Seconds to wait for in-flight batches (None = until done);
+                batches still failing after that are kept in memory, not dropped
+
+        Returns:
+            True when everything added so far is durable
+        """
+        self.stop_timer()
+        if self._executor is None:
+            return self.flush()
+
+        self.flush()
+        with self._in_flight_changed:
+            self._in_flight_changed.wait_for(lambda: self._in_flight == 0, timeout=timeout)
+        self._stopping.set()
+        self._executor.shutdown(wait=True)
+        return not self._failed and not self._buffer
+
+    def start_timer(
+        self, interval_seconds: float = 1.0, on_flush: Optional[Callable[[], None]] = None
+    ) -> None:
+        """
+        Call tick() from a daemon thread until stop_timer()
+
+        Args:
+            interval_seconds: Time between ticks (bounds the extra staleness)
+            on_flush: Called after a timer-triggered flush succeeds, on the
+                timer thread (e.g. to commit offsets with a thread-safe client)
+        """
+        if self._timer is not None:
+            raise RuntimeError("Timer already running")
+
+        def run():
+            while not self._timer_stop.wait(interval_seconds):
+                if self.tick() and on_flush:
+                    on_flush()
+
+        self._timer_stop.clear()
+        self._timer = threading.Thread(target=run, name="batch-flush-timer", daemon=True)
+        self._timer.start()
+
+    def stop_timer(self) -> None:
+        """Stop the background timer (a running flush completes first)"""
+        if self._timer is None:
+            return
+        self._timer_stop.set()
+        self._timer.join()
+        self._timer = None
 
     @abstractmethod
     def _process_batch(self, batch: List[Any]) -> bool:
@@ -60,4 +498,11 @@ class BatchProcessor(ABC):
 
     @property
     def buffer_size(self) -> int:
-        return len(self._buffer)
+        """Items neither durable nor in flight (including failed batches kept for retry)"""
+        with self._lock:
+            return len(self._buffer) + sum(len(batch.items) for batch in self._failed)
+
+    @property
+    def buffer_bytes(self) -> int:
+        with self._lock:
+            return self._buffer_bytes
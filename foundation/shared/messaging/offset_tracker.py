@@ -0,0 +1,63 @@
+"""Commit watermarks for messages that become durable out of order"""
+
+import threading
+from collections import deque
+from typing import Deque, Dict, Hashable, Iterable, Set, Tuple
+
+# (topic, partition, offset)
+Position = Tuple[str, int, int]
+
+
+class OffsetTracker:
+    """
+    Tracks consumed offsets per partition and the contiguous durable prefix
+
+    Batches may be flushed concurrently and finish in any order; a partition's
+    commit offset only advances past offsets whose batches have all completed.
+    """
+
+    def __init__(self):
+        self._pending: Dict[Hashable, Deque[int]] = {}
+        self._done: Dict[Hashable, Set[int]] = {}
+        self._watermarks: Dict[Hashable, int] = {}
+        self._committed: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+    def track(self, position: Position) -> None:
+        """Register a consumed message (offsets arrive in order per partition)"""
+        topic, partition, offset = position
+        with self._lock:
+            self._pending.setdefault((topic, partition), deque()).append(offset)
+
+    def complete(self, positions: Iterable[Position]) -> None:
+        """Mark messages durable and advance the watermarks they unblock"""
+        with self._lock:
+            touched = set()
+            for topic, partition, offset in positions:
+                key = (topic, partition)
+                self._done.setdefault(key, set()).add(offset)
+                touched.add(key)
+
+            for key in touched:
+                pending, done = self._pending.get(key), self._done[key]
+                while pending and pending[0] in done:
+                    offset = pending.popleft()
+                    done.discard(offset)
+                    self._watermarks[key] = offset + 1
+
+    def pop_committable(self) -> Dict[Tuple[str, int], int]:
+        """Next offset to commit for every partition that advanced since the last call"""
+        with self._lock:
+            changed = {
+                key: offset
+                for key, offset in self._watermarks.items()
+                if self._committed.get(key) != offset
+            }
+            self._committed.update(changed)
+            return changed
+
+    @property
+    def pending_count(self) -> int:
+        """Consumed messages not yet durable"""
+        with self._lock:
+            return sum(len(pending) for pending in self._pending.values())
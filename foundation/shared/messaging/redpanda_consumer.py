@@ -3,8 +3,9 @@ Redpanda/Kafka consumer implementation
 """
 
 import json
-from typing import Callable, Optional, Dict, Any, TYPE_CHECKING
+from typing import Callable, Optional, Dict, Any, Tuple, TYPE_CHECKING
 from kafka import KafkaConsumer
+from kafka.structs import OffsetAndMetadata, TopicPartition
 
 # from kafka.errors import KafkaError
 from loguru import logger
@@ -19,6 +20,13 @@ except ImportError:
     default_settings = None
 
 
+def _offset_and_metadata(offset: int) -> OffsetAndMetadata:
+    # kafka-python >= 2.1 added leader_epoch to OffsetAndMetadata
+    if "leader_epoch" in OffsetAndMetadata._fields:
+        return OffsetAndMetadata(offset, "", -1)
+    return OffsetAndMetadata(offset, "")
+
+
 class RedpandaConsumer:
     """Consumer for reading events from Redpanda/Kafka"""
 
@@ -96,6 +104,9 @@ class RedpandaConsumer:
         handler: Callable[[Dict[str, Any], Optional[str], int, int], None],
         max_messages: Optional[int] = None,
         timeout_ms: int = 1000,
+        on_idle: Optional[Callable[[], None]] = None,
+        close_on_exit: bool = True,
+        pass_topic: bool = False,
     ):
         """
         Consume messages and call handler for each
@@ -104,6 +115,12 @@ class RedpandaConsumer:
             handler: Function(value, key, partition, offset) -> None
             max_messages: Maximum number of messages to consume (None = unlimited)
             timeout_ms: Polling timeout in milliseconds
+            on_idle: Called after every poll that returned no messages, on the
+                consumer thread (e.g. to flush and commit time-based batches)
+            close_on_exit: Close the consumer when consuming stops (disable to
+                commit final offsets afterwards)
+            pass_topic: Also pass the message's topic as handler(..., topic=...)
+                (for consumers of several topics)
         """
         message_count = 0
 
@@ -115,9 +132,15 @@ class RedpandaConsumer:
                 message_pack = self.consumer.poll(timeout_ms=timeout_ms)
 
                 if not message_pack:
+                    if on_idle:
+                        try:
+                            on_idle()
+                        except Exception as e:
+                            logger.error(f"Error in idle callback: {e}")
                     continue
 
                 for topic_partition, messages in message_pack.items():
+                    extra = {"topic": topic_partition.topic} if pass_topic else {}
                     for message in messages:
                         try:
                             handler(
@@ -125,6 +148,7 @@ class RedpandaConsumer:
                                 key=message.key,
                                 partition=message.partition,
                                 offset=message.offset,
+                                **extra,
                             )
                             message_count += 1
 
@@ -146,7 +170,8 @@ class RedpandaConsumer:
             logger.error(f"Error consuming messages: {e}")
             raise
         finally:
-            self.close()
+            if close_on_exit:
+                self.close()
 
     def close(self):
         """Close consumer"""
@@ -156,10 +181,24 @@ class RedpandaConsumer:
         except Exception as e:
             logger.error(f"Error closing consumer: {e}")
 
-    def commit(self):
-        """Manually commit offsets (use when enable_auto_commit=False)"""
+    def commit(self, offsets: Optional[Dict[Tuple[str, int], int]] = None):
+        """
+        Manually commit offsets (use when enable_auto_commit=False)
+
+        Args:
+            offsets: (topic, partition) -> next offset to read; commits the
+                consumed position of every partition when omitted
+        """
         try:
-            self.consumer.commit()
+            if offsets is None:
+                self.consumer.commit()
+            else:
+                self.consumer.commit(
+                    {
+                        TopicPartition(topic, partition): _offset_and_metadata(offset)
+                        for (topic, partition), offset in offsets.items()
+                    }
+                )
             logger.debug("Offsets committed")
         except Exception as e:
             logger.error(f"Failed to commit offsets: {e}")
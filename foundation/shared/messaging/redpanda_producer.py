@@ -114,6 +114,10 @@ class RedpandaProducer:
         """
         Publish multiple events to topic
 
+        All events are handed to the client first and acknowledgements are
+        collected afterwards, so the client can batch them on the wire instead
+        of waiting for a round trip per event.
+
         Args:
             topic: Topic name
             events: List of event data (dicts)
@@ -122,16 +126,32 @@ class RedpandaProducer:
         Returns:
             Number of successfully published events
         """
-        success_count = 0
+        futures = []
+        errors = 0
+        last_error = None
 
         for event in events:
             key = None
             if key_extractor:
                 key = key_extractor(event)
 
-            if self.publish(topic, event, key):
+            try:
+                futures.append(self.producer.send(topic=topic, value=event, key=key))
+            except Exception as e:
+                errors += 1
+                last_error = e
+
+        success_count = 0
+        for future in futures:
+            try:
+                future.get(timeout=10)
                 success_count += 1
+            except Exception as e:
+                errors += 1
+                last_error = e
 
+        if errors:
+            logger.error(f"Failed to publish {errors} events to {topic}: {last_error}")
         logger.info(f"Published {success_count}/{len(events)} events to {topic}")
         return success_count
 
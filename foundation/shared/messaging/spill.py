@@ -0,0 +1,117 @@
+"""
+Local spill log for batches that could not be delivered
+
+Each spilled batch becomes one append-only Arrow IPC segment file holding the
+JSON-encoded items, named by a monotonically increasing sequence number, so
+replay order is spill order. Segments are written to a temporary name and
+renamed, so a crash never leaves a partial segment behind.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+from loguru import logger
+
+try:
+    import pyarrow as pa
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    PYARROW_AVAILABLE = False
+
+from shared.messaging.batch_processor import Batch
+
+SEGMENT_SUFFIX = ".arrow"
+
+
+class SpillLog:
+    """Directory of spilled batches, oldest first"""
+
+    def __init__(self, directory: str, max_bytes: Optional[int] = None):
+        """
+        Args:
+            directory: Where segments are kept (created if missing)
+            max_bytes: Disk cap; appends beyond it are refused
+        """
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow is required for the spill log")
+
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        # A crash mid-write leaves only a temporary file; it was never acknowledged
+        for leftover in self.directory.glob("*.tmp"):
+            leftover.unlink()
+
+        existing = self.segments()
+        self._next_sequence = int(existing[-1].stem) + 1 if existing else 0
+        self._count = len(existing)
+        self._size_bytes = sum(path.stat().st_size for path in existing)
+        if existing:
+            logger.info(f"Spill log has {len(existing)} segments to replay in {self.directory}")
+
+    def segments(self) -> List[Path]:
+        return sorted(self.directory.glob(f"*{SEGMENT_SUFFIX}"))
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size_bytes
+
+    def append(self, batch: Batch) -> bool:
+        """Write a batch as a new segment; False when the disk cap would be exceeded"""
+        with self._lock:
+            return self._append(batch)
+
+    def _append(self, batch: Batch) -> bool:
+        if self.max_bytes is not None and self._size_bytes + batch.nbytes > self.max_bytes:
+            logger.error(f"Spill log full ({self._size_bytes} bytes), not spilling batch")
+            return False
+
+        items = pa.array([json.dumps(item).encode("utf-8") for item in batch.items], pa.binary())
+        table = pa.Table.from_arrays([items], names=["item"]).replace_schema_metadata(
+            {"nbytes": str(batch.nbytes), "positions": json.dumps(batch.positions)}
+        )
+
+        path = self.directory / f"{self._next_sequence:012d}{SEGMENT_SUFFIX}"
+        tmp_path = path.with_suffix(".tmp")
+        with pa.OSFile(str(tmp_path), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        with open(tmp_path, "rb+") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+        self._next_sequence += 1
+        self._count += 1
+        self._size_bytes += path.stat().st_size
+        logger.warning(f"Spilled {len(batch.items)} items to {path}")
+        return True
+
+    def read(self, segment: Path) -> Batch:
+        """Load a segment back as a batch"""
+        with pa.memory_map(str(segment)) as source:
+            table = pa.ipc.open_file(source).read_all()
+        items = [json.loads(item) for item in table["item"].to_pylist()]
+        metadata = table.schema.metadata or {}
+        # Tuple positions come back as JSON lists; restore them so they compare equal
+        positions = [
+            tuple(position) if isinstance(position, list) else position
+            for position in json.loads(metadata.get(b"positions", b"[]"))
+        ]
+        return Batch(items, positions, nbytes=int(metadata.get(b"nbytes", 0)))
+
+    def remove(self, segment: Path) -> None:
+        with self._lock:
+            size = segment.stat().st_size
+            segment.unlink()
+            self._count -= 1
+            self._size_bytes = max(0, self._size_bytes - size)
@@ -5,5 +5,18 @@ Data models for e-commerce events
 from shared.models.order import Order, OrderStatus
 from shared.models.page_view import PageView
 from shared.models.inventory import Inventory
+from shared.models.bridge_event import BRIDGE_EVENT_SCHEMA
+from shared.models.ecommerce_events import INVENTORY_SCHEMA, ORDER_SCHEMA, PAGE_VIEW_SCHEMA
+from shared.models.arrow_convert import records_to_table
 
-__all__ = ["Order", "OrderStatus", "PageView", "Inventory"]
+__all__ = [
+    "Order",
+    "OrderStatus",
+    "PageView",
+    "Inventory",
+    "BRIDGE_EVENT_SCHEMA",
+    "ORDER_SCHEMA",
+    "PAGE_VIEW_SCHEMA",
+    "INVENTORY_SCHEMA",
+    "records_to_table",
+]
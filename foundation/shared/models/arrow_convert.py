@@ -0,0 +1,108 @@
+"""
+Convert JSON-like records into Arrow tables against a declared schema
+
+Columns are converted whole: values are inferred by Arrow and cast to the
+declared type with overflow/truncation checks, so a well-formed batch never
+goes through Python per value. Only a column that fails as a whole is retried
+value by value to find the offending rows, which are returned as rejects
+instead of silently changing the output schema.
+"""
+
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    pc = None
+    PYARROW_AVAILABLE = False
+
+# (row index in the input, reason)
+Reject = Tuple[int, str]
+
+
+def _convert(values: List[Any], data_type: "pa.DataType") -> "pa.Array":
+    if pa.types.is_nested(data_type):
+        # Typed construction fills missing struct keys with nulls
+        return pa.array(values, type=data_type)
+    # Infer, then cast safely (rejects 1.5 -> int64, 'abc' -> double, ...)
+    return pa.array(values).cast(data_type, safe=True)
+
+
+def _convert_per_value(
+    name: str, values: List[Any], data_type: "pa.DataType"
+) -> Tuple["pa.Array", List[Reject]]:
+    coerced, rejects = [], []
+    for index, value in enumerate(values):
+        try:
+            coerced.append(_convert([value], data_type)[0].as_py())
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            coerced.append(None)
+            rejects.append((index, f"{name}: cannot convert {value!r} to {data_type}"))
+    return pa.array(coerced, type=data_type), rejects
+
+
+def records_to_table(
+    records: Sequence[Mapping[str, Any]],
+    schema: "pa.Schema",
+    required: Sequence[str] = (),
+    allowed_values: Optional[Dict[str, Sequence[Any]]] = None,
+    value_ranges: Optional[Dict[str, Tuple[Any, Any]]] = None,
+) -> Tuple["pa.Table", List[Reject]]:
+    """
+    Build a table with exactly the given schema from a list of dicts
+
+    Missing keys become nulls and unknown keys are ignored.
+
+    Args:
+        records: Row dicts (e.g. deserialized JSON messages)
+        schema: Target schema
+        required: Columns that must not be null
+        allowed_values: Column -> permitted values
+        value_ranges: Column -> (inclusive minimum, exclusive maximum)
+
+    Returns:
+        (table of conforming rows, rejected rows as (index, reason) sorted by index)
+    """
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow is required to convert records to Arrow tables")
+
+    if not records:
+        return schema.empty_table(), []
+
+    rejects: Dict[int, str] = {}
+    arrays = {}
+    for field in schema:
+        values = [record.get(field.name) for record in records]
+        try:
+            array = _convert(values, field.type)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            array, column_rejects = _convert_per_value(field.name, values, field.type)
+            for index, reason in column_rejects:
+                rejects.setdefault(index, reason)
+        arrays[field.name] = array
+
+    checks = [(name, pc.is_null(arrays[name]), "is required") for name in required]
+    for name, permitted in (allowed_values or {}).items():
+        outside = pc.invert(pc.is_in(arrays[name], value_set=pa.array(permitted)))
+        checks.append((name, pc.and_(outside, pc.is_valid(arrays[name])), "not an allowed value"))
+    for name, (low, high) in (value_ranges or {}).items():
+        outside = pc.or_(pc.less(arrays[name], low), pc.greater_equal(arrays[name], high))
+        checks.append((name, outside, f"outside [{low}, {high})"))
+
+    for name, failed, reason in checks:
+        failed = pc.fill_null(failed, False)
+        for index in pc.indices_nonzero(failed).to_pylist():
+            rejects.setdefault(index, f"{name}: {reason}")
+
+    table = pa.Table.from_arrays(list(arrays.values()), schema=schema)
+    if rejects:
+        keep = [True] * len(records)
+        for index in rejects:
+            keep[index] = False
+        table = table.filter(pa.array(keep))
+
+    return table, sorted(rejects.items())
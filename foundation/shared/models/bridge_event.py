@@ -0,0 +1,58 @@
+"""
+Bridge event schema - the clickstream layout the Hybrid Cloud Bridge lands in GCS
+
+Single source of truth for anything that writes bridge Parquet files; it must
+stay in sync with the ``bridge.events`` source in warehouse/models/sources.yml.
+"""
+
+try:
+    import pyarrow as pa
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    PYARROW_AVAILABLE = False
+
+ACTIONS = ("view", "click", "purchase", "error")
+
+# Rows missing these, with an unknown action or a timestamp that cannot be
+# partitioned (before the epoch or after year 9999) are rejected by the bridge
+REQUIRED_COLUMNS = ["event_id", "action", "timestamp"]
+ALLOWED_VALUES = {"action": ACTIONS}
+VALUE_RANGES = {"timestamp": (0.0, 253402300800.0)}
+
+# Low-cardinality columns written with Parquet dictionary encoding
+DICTIONARY_COLUMNS = [
+    "country",
+    "device_type",
+    "action",
+    "context.referrer",
+    "context.campaign_id",
+]
+
+if PYARROW_AVAILABLE:
+    CONTEXT_TYPE = pa.struct(
+        [
+            pa.field("referrer", pa.string()),
+            pa.field("ad_id", pa.string()),
+            pa.field("campaign_id", pa.string()),
+            pa.field("url", pa.string()),
+        ]
+    )
+
+    BRIDGE_EVENT_SCHEMA = pa.schema(
+        [
+            pa.field("event_id", pa.string()),
+            pa.field("session_id", pa.string()),
+            pa.field("user_id", pa.int64()),
+            pa.field("country", pa.string()),
+            pa.field("device_type", pa.string()),
+            pa.field("action", pa.string()),
+            pa.field("value", pa.float64()),
+            pa.field("timestamp", pa.float64()),  # Unix epoch seconds
+            pa.field("context", CONTEXT_TYPE),
+        ]
+    )
+else:
+    CONTEXT_TYPE = None
+    BRIDGE_EVENT_SCHEMA = None
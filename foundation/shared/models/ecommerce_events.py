@@ -0,0 +1,68 @@
+"""
+E-commerce topic schemas - the layout the bridge lands orders, page views and
+inventory changes in
+
+Field names follow the Order, PageView and Inventory models and the JSON the
+data generator publishes; ISO timestamps without an offset are read as UTC.
+"""
+
+try:
+    import pyarrow as pa
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    PYARROW_AVAILABLE = False
+
+from shared.models.order import OrderStatus
+
+ORDER_STATUSES = tuple(status.value for status in OrderStatus)
+
+ORDER_REQUIRED_COLUMNS = ["order_id", "user_id", "product_id", "timestamp", "amount"]
+ORDER_ALLOWED_VALUES = {"status": ORDER_STATUSES}
+ORDER_DICTIONARY_COLUMNS = ["status"]
+
+PAGE_VIEW_REQUIRED_COLUMNS = ["view_id", "user_id", "timestamp", "session_id"]
+PAGE_VIEW_DICTIONARY_COLUMNS = ["page_url"]
+
+INVENTORY_REQUIRED_COLUMNS = ["product_id", "timestamp", "stock_change", "current_stock"]
+INVENTORY_DICTIONARY_COLUMNS = ["warehouse_id"]
+
+if PYARROW_AVAILABLE:
+    ORDER_SCHEMA = pa.schema(
+        [
+            pa.field("order_id", pa.string()),
+            pa.field("user_id", pa.string()),
+            pa.field("product_id", pa.string()),
+            pa.field("timestamp", pa.timestamp("us")),
+            pa.field("amount", pa.float64()),
+            pa.field("status", pa.string()),
+            pa.field("quantity", pa.int64()),
+        ]
+    )
+
+    PAGE_VIEW_SCHEMA = pa.schema(
+        [
+            pa.field("view_id", pa.string()),
+            pa.field("user_id", pa.string()),
+            pa.field("product_id", pa.string()),
+            pa.field("timestamp", pa.timestamp("us")),
+            pa.field("session_id", pa.string()),
+            pa.field("page_url", pa.string()),
+            pa.field("duration_seconds", pa.float64()),
+        ]
+    )
+
+    INVENTORY_SCHEMA = pa.schema(
+        [
+            pa.field("product_id", pa.string()),
+            pa.field("timestamp", pa.timestamp("us")),
+            pa.field("stock_change", pa.int64()),
+            pa.field("current_stock", pa.int64()),
+            pa.field("warehouse_id", pa.string()),
+        ]
+    )
+else:
+    ORDER_SCHEMA = None
+    PAGE_VIEW_SCHEMA = None
+    INVENTORY_SCHEMA = None
@@ -1,3 +1,6 @@
+from .base import BlobInfo, StorageClient, Upload
+from .commit_log import CommitLog
 from .gcs_client import GCSClient
+from .local_client import LocalStorageClient
 
-__all__ = ["GCSClient"]
+__all__ = ["BlobInfo", "CommitLog", "StorageClient", "Upload", "GCSClient", "LocalStorageClient"]
@@ -0,0 +1,186 @@
+"""Object storage interface shared by the GCS and local filesystem backends"""
+
+import base64
+import hashlib
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import google_crc32c
+
+    CRC32C_AVAILABLE = True
+except ImportError:
+    google_crc32c = None
+    CRC32C_AVAILABLE = False
+
+DEFAULT_UPLOAD_WORKERS = 8
+_READ_CHUNK_BYTES = 1024 * 1024
+
+
+@dataclass
+class Upload:
+    """One object to upload; set exactly one of data, fileobj or path"""
+
+    destination: str
+    data: Optional[bytes] = None
+    fileobj: Optional[BinaryIO] = None
+    path: Optional[str] = None
+    content_type: str = "application/octet-stream"
+    size: Optional[int] = None
+
+    def __post_init__(self):
+        sources = [self.data is not None, self.fileobj is not None, self.path is not None]
+        if sum(sources) != 1:
+            raise ValueError(f"Upload to {self.destination} needs exactly one source")
+
+    @property
+    def source(self) -> str:
+        if self.path is not None:
+            return self.path
+        return f"<{self.content_length} bytes>"
+
+    @property
+    def content_length(self) -> Optional[int]:
+        if self.data is not None:
+            return len(self.data)
+        if self.path is not None:
+            return os.path.getsize(self.path)
+        return self.size
+
+    def chunks(self) -> Iterator[bytes]:
+        """Content from the start (rewinds file objects)"""
+        if self.data is not None:
+            yield self.data
+            return
+        if self.path is not None:
+            with open(self.path, "rb") as f:
+                yield from iter(lambda: f.read(_READ_CHUNK_BYTES), b"")
+            return
+        self.fileobj.seek(0)
+        yield from iter(lambda: self.fileobj.read(_READ_CHUNK_BYTES), b"")
+
+    def checksums(self) -> Dict[str, str]:
+        """Base64 MD5 and (when available) CRC32C, in the format GCS reports them"""
+        md5 = hashlib.md5()
+        crc = google_crc32c.Checksum() if CRC32C_AVAILABLE else None
+        for chunk in self.chunks():
+            md5.update(chunk)
+            if crc is not None:
+                crc.update(chunk)
+        result = {"md5_hash": base64.b64encode(md5.digest()).decode("ascii")}
+        if crc is not None:
+            result["crc32c"] = base64.b64encode(crc.digest()).decode("ascii")
+        return result
+
+
+@dataclass
+class BlobInfo:
+    """Stored object metadata"""
+
+    name: str
+    size: int
+    generation: int
+    md5_hash: Optional[str] = None
+    crc32c: Optional[str] = None
+
+    def matches(self, checksums: Dict[str, str]) -> bool:
+        """True when the stored content has the given checksums (CRC32C preferred)"""
+        if self.crc32c and "crc32c" in checksums:
+            return self.crc32c == checksums["crc32c"]
+        return self.md5_hash is not None and self.md5_hash == checksums.get("md5_hash")
+
+
+class StorageClient(ABC):
+    """
+    Object storage with idempotent uploads
+
+    By default an upload only creates the object (generation precondition 0).
+    If it already exists with identical content, the upload counts as done,
+    so a retry after a lost response never writes twice; different content
+    is replaced under a precondition on the generation that was checked.
+    Pass if_generation_match to get a strict compare-and-swap instead.
+    """
+
+    @abstractmethod
+    def upload(self, upload: Upload, if_generation_match: Optional[int] = None) -> bool:
+        """Upload one object; True on success"""
+
+    @abstractmethod
+    def get_blob(self, name: str) -> Optional[BlobInfo]:
+        """Metadata of an object, None if it does not exist"""
+
+    @abstractmethod
+    def list_blobs(self, prefix: str = "") -> List[BlobInfo]:
+        """Objects under a prefix, sorted by name"""
+
+    @abstractmethod
+    def download_bytes(self, name: str) -> bytes:
+        """Object content"""
+
+    @abstractmethod
+    def delete(self, name: str, if_generation_match: Optional[int] = None) -> bool:
+        """Delete an object; False if it is gone or the generation changed"""
+
+    def upload_file(
+        self,
+        source_path: str,
+        destination_blob: str,
+        content_type: str = "application/octet-stream",
+    ) -> bool:
+        """Upload a local file"""
+        return self.upload(Upload(destination_blob, path=source_path, content_type=content_type))
+
+    def upload_fileobj(
+        self,
+        fileobj: BinaryIO,
+        destination_blob: str,
+        content_type: str = "application/octet-stream",
+        size: Optional[int] = None,
+    ) -> bool:
+        """
+        Upload a seekable file object (e.g. an in-memory buffer)
+
+        Args:
+            fileobj: Seekable binary file object; uploaded from position 0
+            destination_blob: Object name
+            content_type: Content type
+            size: Bytes to upload, if known
+        """
+        return self.upload(
+            Upload(destination_blob, fileobj=fileobj, content_type=content_type, size=size)
+        )
+
+    def upload_bytes(
+        self,
+        data: bytes,
+        destination_blob: str,
+        content_type: str = "application/octet-stream",
+        if_generation_match: Optional[int] = None,
+    ) -> bool:
+        """Upload bytes (optionally as a compare-and-swap on the object generation)"""
+        return self.upload(
+            Upload(destination_blob, data=data, content_type=content_type),
+            if_generation_match=if_generation_match,
+        )
+
+    def upload_many(
+        self, uploads: Iterable[Upload], max_workers: int = DEFAULT_UPLOAD_WORKERS
+    ) -> List[bool]:
+        """
+        Upload several objects concurrently
+
+        Args:
+            uploads: Objects to upload (file objects must not be shared)
+            max_workers: Concurrent uploads
+
+        Returns:
+            Success per upload, in input order
+        """
+        uploads = list(uploads)
+        if len(uploads) <= 1 or max_workers <= 1:
+            return [self.upload(upload) for upload in uploads]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(uploads))) as pool:
+            return list(pool.map(self.upload, uploads))
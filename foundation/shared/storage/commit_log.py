@@ -0,0 +1,260 @@
+"""
+Commit log of consumed offset ranges that landed in object storage
+
+A sink that writes consumed messages to files can crash after uploading
+but before committing consumer offsets, and then consumes the same messages
+again. Recording each batch's offset ranges in storage makes that safe:
+
+1. Before uploading, an intent object lists the files the batch will write.
+2. Once every file is uploaded, a commit object records the batch's offset
+   ranges and files; this is the commit point. The intent is then removed.
+3. On startup, files of intents without a commit (a crash mid-batch) are
+   deleted, and consumed messages inside committed ranges are skipped.
+
+Entries wholly below the committed consumer offsets are pruned. The log
+assumes one writer per prefix (e.g. one bridge instance per consumer group).
+"""
+
+import hashlib
+import json
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from shared.storage.base import StorageClient
+
+# topic -> partition -> sorted, disjoint inclusive (first, last) offset ranges
+OffsetRanges = Dict[str, Dict[int, List[Tuple[int, int]]]]
+
+# Parquet key-value metadata holding a file's offset ranges as JSON
+OFFSETS_METADATA_KEY = "offset_ranges"
+
+# Longer range tokens are shortened to their first range plus a digest
+MAX_TOKEN_LENGTH = 160
+
+
+def _coalesce(ranges: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    merged: List[Tuple[int, int]] = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged
+
+
+def offset_ranges(positions: Iterable[Tuple[str, int, int]]) -> OffsetRanges:
+    """Ranges covered by (topic, partition, offset) positions"""
+    offsets: Dict[str, Dict[int, List[Tuple[int, int]]]] = {}
+    for topic, partition, offset in positions:
+        offsets.setdefault(topic, {}).setdefault(partition, []).append((offset, offset))
+    return {
+        topic: {partition: _coalesce(ranges) for partition, ranges in sorted(partitions.items())}
+        for topic, partitions in sorted(offsets.items())
+    }
+
+
+def merge_ranges(*all_ranges: OffsetRanges) -> OffsetRanges:
+    """Union of several range sets"""
+    merged: Dict[str, Dict[int, List[Tuple[int, int]]]] = {}
+    for ranges in all_ranges:
+        for topic, partitions in ranges.items():
+            for partition, spans in partitions.items():
+                merged.setdefault(topic, {}).setdefault(partition, []).extend(spans)
+    return {
+        topic: {partition: _coalesce(spans) for partition, spans in sorted(partitions.items())}
+        for topic, partitions in sorted(merged.items())
+    }
+
+
+def _ranges_to_dict(ranges: OffsetRanges) -> dict:
+    return {
+        topic: {
+            str(partition): [list(span) for span in spans] for partition, spans in parts.items()
+        }
+        for topic, parts in ranges.items()
+    }
+
+
+def _ranges_from_dict(data: dict) -> OffsetRanges:
+    return {
+        topic: {
+            int(partition): [tuple(span) for span in spans] for partition, spans in parts.items()
+        }
+        for topic, parts in data.items()
+    }
+
+
+def ranges_to_json(ranges: OffsetRanges) -> str:
+    return json.dumps(_ranges_to_dict(ranges), sort_keys=True)
+
+
+def ranges_from_json(text) -> OffsetRanges:
+    return _ranges_from_dict(json.loads(text))
+
+
+def file_ranges(metadata: Optional[Dict[bytes, bytes]]) -> OffsetRanges:
+    """Offset ranges recorded in a Parquet file's key-value metadata (empty if none)"""
+    raw = (metadata or {}).get(OFFSETS_METADATA_KEY.encode("utf-8"))
+    return ranges_from_json(raw) if raw else {}
+
+
+def ranges_token(ranges: OffsetRanges) -> str:
+    """
+    Name for a batch, e.g. 'events-stream+0+100-199+1+40-87'
+
+    Each partition contributes its lowest and highest offset. A consumer's
+    batches never overlap within a partition, so tokens are unique per batch
+    and a re-run of the same range gets the same name.
+    """
+    parts = []
+    for topic, partitions in ranges.items():
+        spans = "+".join(
+            f"{partition}+{spans[0][0]}-{spans[-1][1]}" for partition, spans in partitions.items()
+        )
+        parts.append(f"{topic}+{spans}")
+    token = "+".join(parts)
+    if len(token) > MAX_TOKEN_LENGTH:
+        digest = hashlib.sha256(token.encode("utf-8")).hexdigest()[:20]
+        token = f"{token[:MAX_TOKEN_LENGTH - 21].rstrip('+')}+{digest}"
+    return token
+
+
+class CommitLog:
+    """Landed offset ranges, stored as one small JSON object per batch"""
+
+    def __init__(self, storage: StorageClient, prefix: str):
+        """
+        Args:
+            storage: Storage backend the batches are written to
+            prefix: Where commit and intent objects live (with trailing slash)
+        """
+        self.storage = storage
+        self.prefix = prefix
+        self._entries: Dict[str, OffsetRanges] = {}
+        self._committed: Dict[Tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+
+    def _commit_path(self, token: str) -> str:
+        return f"{self.prefix}{token}.json"
+
+    def _intent_path(self, token: str) -> str:
+        return f"{self.prefix}pending/{token}.json"
+
+    def recover(self) -> int:
+        """
+        Load committed ranges and roll back batches that crashed mid-upload
+
+        Returns:
+            Number of batches rolled back
+
+        Raises:
+            RuntimeError: If a rolled-back file could not be deleted
+        """
+        rolled_back = 0
+        for blob in self.storage.list_blobs(self.prefix):
+            relative = blob.name[len(self.prefix) :]
+            if "/" in relative or not relative.endswith(".json"):
+                continue
+            entry = json.loads(self.storage.download_bytes(blob.name))
+            with self._lock:
+                self._entries[relative[: -len(".json")]] = _ranges_from_dict(entry["ranges"])
+
+        for blob in self.storage.list_blobs(f"{self.prefix}pending/"):
+            token = blob.name.rsplit("/", 1)[-1][: -len(".json")]
+            if token not in self._entries:
+                for name in json.loads(self.storage.download_bytes(blob.name))["files"]:
+                    if not self.storage.delete(name) and self.storage.get_blob(name) is not None:
+                        raise RuntimeError(f"Could not roll back {name} of batch {token}")
+                logger.warning(f"Rolled back uncommitted batch {token}")
+                rolled_back += 1
+            self.storage.delete(blob.name, if_generation_match=blob.generation)
+
+        logger.info(f"Commit log holds {len(self._entries)} landed batches")
+        return rolled_back
+
+    def pending_files(self) -> Set[str]:
+        """
+        Files of batches that began but have not committed
+
+        A crashed batch's files are deleted by the next recover(), so nothing
+        else (e.g. compaction) may merge them in the meantime. List the files
+        before calling this: a batch records its intent before uploading.
+        """
+        files: Set[str] = set()
+        for blob in self.storage.list_blobs(f"{self.prefix}pending/"):
+            try:
+                intent = json.loads(self.storage.download_bytes(blob.name))
+            except Exception:
+                if self.storage.get_blob(blob.name) is None:
+                    continue  # Committed in the meantime
+                raise
+            files.update(intent["files"])
+        return files
+
+    def begin(self, token: str, files: List[str]) -> bool:
+        """Record the files a batch is about to write; False if storage refused"""
+        intent = json.dumps({"files": files}, sort_keys=True).encode("utf-8")
+        return self.storage.upload_bytes(
+            intent, self._intent_path(token), content_type="application/json"
+        )
+
+    def commit(self, token: str, ranges: OffsetRanges, files: List[str]) -> bool:
+        """Mark a batch landed once all its files are uploaded; False if storage refused"""
+        entry = {
+            "ranges": _ranges_to_dict(ranges),
+            "files": files,
+            "committed_at": datetime.now(timezone.utc).isoformat(),
+        }
+        if not self.storage.upload_bytes(
+            json.dumps(entry, sort_keys=True).encode("utf-8"),
+            self._commit_path(token),
+            content_type="application/json",
+        ):
+            return False
+        with self._lock:
+            self._entries[token] = ranges
+        self.storage.delete(self._intent_path(token))
+        return True
+
+    def covers(self, topic: str, partition: int, offset: int) -> bool:
+        """True if the message at this offset already landed"""
+        with self._lock:
+            return any(
+                first <= offset <= last
+                for ranges in self._entries.values()
+                for first, last in ranges.get(topic, {}).get(partition, ())
+            )
+
+    def prune(self, committed: Dict[Tuple[str, int], int]) -> int:
+        """
+        Drop entries the consumer offsets have moved past
+
+        Args:
+            committed: Next offset per (topic, partition), as just committed
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            self._committed.update(committed)
+            obsolete = [
+                token
+                for token, ranges in self._entries.items()
+                if all(
+                    spans[-1][1] < self._committed.get((topic, partition), 0)
+                    for topic, partitions in ranges.items()
+                    for partition, spans in partitions.items()
+                )
+            ]
+            for token in obsolete:
+                del self._entries[token]
+        for token in obsolete:
+            self.storage.delete(self._commit_path(token))
+        return len(obsolete)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
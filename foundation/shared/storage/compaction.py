@@ -0,0 +1,287 @@
+"""
+Small-file compaction for partitioned Parquet datasets in object storage
+
+Compaction of one partition (a directory such as ``raw/dt=2024-01-31/hour=09/``):
+
+1. Read the partition manifest, which records the files (name and
+   generation) that earlier compactions replaced and the outputs they
+   committed.
+2. Pick live small files, read them, sort the rows and write target-sized
+   files with deterministic names (derived from the inputs), so a crashed
+   run that is repeated re-creates the same objects instead of new copies.
+   Compacted files that no manifest committed (a crashed or concurrent run)
+   and files of writer batches that have not committed (see
+   shared.storage.commit_log) are never used as inputs.
+3. Commit by writing the manifest with a generation precondition; a
+   concurrent compactor makes the write fail and this run backs out.
+4. Delete the replaced inputs, each under its read generation, so a file
+   rewritten in the meantime is never deleted. Inputs left behind (a crash
+   or a failed delete) stay in the manifest and the next run deletes them.
+
+Only files this run read are replaced, so writers can keep adding files to
+the partition while it runs. Manifests live under their own prefix so that
+readers of the data prefix (e.g. external tables) never see them; readers
+that want an exact view skip files listed as replaced. Offset ranges in the
+inputs' metadata (see shared.storage.commit_log) carry over to the outputs.
+"""
+
+import hashlib
+import io
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+from loguru import logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    pq = None
+    PYARROW_AVAILABLE = False
+
+from shared.storage.base import BlobInfo, StorageClient
+from shared.storage.commit_log import (
+    OFFSETS_METADATA_KEY,
+    CommitLog,
+    file_ranges,
+    merge_ranges,
+    ranges_to_json,
+)
+
+DEFAULT_TARGET_FILE_BYTES = 128 * 1024 * 1024
+DEFAULT_ROW_GROUP_SIZE = 128 * 1024
+COMPACTED_PREFIX = "part-compact-"
+# Compaction history entries kept in a manifest
+MANIFEST_HISTORY = 20
+
+
+@dataclass
+class Manifest:
+    """Per-partition record of compactions; generation 0 = not written yet"""
+
+    # File name -> generation that a compaction replaced
+    replaced: Dict[str, int] = field(default_factory=dict)
+    # Compacted file name -> generation, for committed outputs still present
+    outputs: Dict[str, int] = field(default_factory=dict)
+    history: List[Dict[str, Any]] = field(default_factory=list)
+    generation: int = 0
+
+    def is_live(self, blob: BlobInfo) -> bool:
+        return self.replaced.get(blob.name) != blob.generation
+
+    def is_uncommitted_output(self, blob: BlobInfo) -> bool:
+        name = blob.name.rsplit("/", 1)[-1]
+        return name.startswith(COMPACTED_PREFIX) and blob.name not in self.outputs
+
+    def to_json(self) -> bytes:
+        return json.dumps(
+            {"replaced": self.replaced, "outputs": self.outputs, "history": self.history},
+            indent=2,
+            sort_keys=True,
+        ).encode("utf-8")
+
+
+@dataclass
+class CompactionResult:
+    partition: str
+    inputs: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+    rows: int = 0
+    committed: bool = False
+
+
+def load_manifest(storage: StorageClient, path: str) -> Manifest:
+    info = storage.get_blob(path)
+    if info is None:
+        return Manifest()
+    data = json.loads(storage.download_bytes(path))
+    return Manifest(
+        data.get("replaced", {}), data.get("outputs", {}), data.get("history", []), info.generation
+    )
+
+
+def partition_files(storage: StorageClient, prefix: str) -> List[BlobInfo]:
+    """Parquet files directly in a partition, including replaced ones not yet deleted"""
+    return [
+        blob
+        for blob in storage.list_blobs(prefix)
+        if blob.name.endswith(".parquet") and "/" not in blob.name[len(prefix) :]
+    ]
+
+
+def live_files(storage: StorageClient, prefix: str, manifest: Manifest) -> List[BlobInfo]:
+    """Parquet files directly in a partition that no compaction has replaced"""
+    return [blob for blob in partition_files(storage, prefix) if manifest.is_live(blob)]
+
+
+def list_partitions(storage: StorageClient, root: str) -> List[str]:
+    """Directories under root that hold Parquet files (with trailing slash)"""
+    return sorted(
+        {
+            blob.name.rsplit("/", 1)[0] + "/"
+            for blob in storage.list_blobs(root)
+            if blob.name.endswith(".parquet")
+        }
+    )
+
+
+def _output_names(inputs: List[BlobInfo], count: int) -> List[str]:
+    digest = hashlib.sha256(
+        "\n".join(f"{blob.name}#{blob.generation}" for blob in inputs).encode("utf-8")
+    ).hexdigest()[:20]
+    return [f"{COMPACTED_PREFIX}{digest}-{index:03d}.parquet" for index in range(count)]
+
+
+def compact_partition(
+    storage: StorageClient,
+    prefix: str,
+    manifest_path: str,
+    target_file_bytes: int = DEFAULT_TARGET_FILE_BYTES,
+    sort_by: Sequence[str] = ("timestamp",),
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    min_files: int = 2,
+    schema: Optional["pa.Schema"] = None,
+    write_options: Optional[Dict[str, Any]] = None,
+    commit_log: Optional[CommitLog] = None,
+) -> CompactionResult:
+    """
+    Merge the small files of one partition into sorted, target-sized files
+
+    Args:
+        storage: Storage backend
+        prefix: Partition directory (with trailing slash)
+        manifest_path: Object holding this partition's manifest
+        target_file_bytes: Desired output file size; files at least half this
+            size are left alone and at most this many input bytes are merged per run
+        sort_by: Columns to sort rows by (ascending), e.g. session_id or timestamp
+        row_group_size: Rows per row group in the output
+        min_files: Fewest small files worth compacting
+        schema: Schema to cast inputs to (defaults to the first file's)
+        write_options: Extra pyarrow.parquet.write_table options
+        commit_log: Commit log of the writer; files of its uncommitted batches
+            are left alone, since recovery deletes them and replays the batch
+
+    Returns:
+        What was compacted; committed is False when nothing was done
+    """
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow is required for compaction")
+
+    result = CompactionResult(prefix)
+    manifest = load_manifest(storage, manifest_path)
+
+    # Finish deleting inputs an earlier run replaced but did not delete (it
+    # crashed or the delete failed); the ones left stay recorded as replaced
+    files = partition_files(storage, prefix)
+    for blob in files:
+        if not manifest.is_live(blob):
+            storage.delete(blob.name, if_generation_match=blob.generation)
+    # Files still present, so replaced entries are dropped only once their file is gone
+    present = {blob.name: blob.generation for blob in partition_files(storage, prefix)}
+    listing = [blob for blob in files if manifest.is_live(blob)]
+    pending = commit_log.pending_files() if commit_log is not None else set()
+
+    inputs, input_bytes = [], 0
+    for blob in listing:
+        if manifest.is_uncommitted_output(blob):
+            logger.warning(f"Skipping {blob.name}: compacted file not in the manifest")
+            continue
+        if blob.name in pending:
+            logger.info(f"Skipping {blob.name}: its batch has not committed")
+            continue
+        if blob.size >= target_file_bytes // 2:
+            continue
+        if inputs and input_bytes + blob.size > target_file_bytes:
+            break
+        inputs.append(blob)
+        input_bytes += blob.size
+    if len(inputs) < min_files:
+        return result
+
+    tables = [pq.read_table(io.BytesIO(storage.download_bytes(blob.name))) for blob in inputs]
+    schema = schema or tables[0].schema
+    table = pa.concat_tables([t.select(schema.names).cast(schema) for t in tables])
+    table = table.sort_by([(column, "ascending") for column in sort_by])
+    # Outputs mix the inputs' rows, so each carries the union of their offset ranges
+    ranges = merge_ranges(*(file_ranges(t.schema.metadata) for t in tables))
+    if ranges:
+        metadata = dict(table.schema.metadata or {})
+        metadata[OFFSETS_METADATA_KEY.encode("utf-8")] = ranges_to_json(ranges).encode("utf-8")
+        table = table.replace_schema_metadata(metadata)
+
+    # Split by rows so each file lands near the target (inputs are similar Parquet)
+    files = max(1, round(input_bytes / target_file_bytes))
+    rows_per_file = -(-table.num_rows // files)
+    names = _output_names(inputs, files)
+    options = {"compression": "snappy", **(write_options or {})}
+
+    for index, name in enumerate(names):
+        buffer = io.BytesIO()
+        pq.write_table(
+            table.slice(index * rows_per_file, rows_per_file),
+            buffer,
+            row_group_size=row_group_size,
+            **options,
+        )
+        if not storage.upload_bytes(buffer.getvalue(), prefix + name):
+            logger.error(f"Compaction of {prefix} failed uploading {name}")
+            return result
+    outputs = [prefix + name for name in names]
+    output_generations = {name: storage.get_blob(name).generation for name in outputs}
+
+    # Commit point: the manifest records the swap, or a concurrent run wins
+    committed = Manifest(
+        # Entries whose files are gone no longer matter
+        replaced={
+            **{name: gen for name, gen in manifest.replaced.items() if present.get(name) == gen},
+            **{blob.name: blob.generation for blob in inputs},
+        },
+        outputs={
+            **{name: gen for name, gen in manifest.outputs.items() if present.get(name) == gen},
+            **output_generations,
+        },
+        history=(
+            manifest.history
+            + [
+                {
+                    "compacted_at": datetime.now(timezone.utc).isoformat(),
+                    "inputs": [blob.name for blob in inputs],
+                    "outputs": outputs,
+                    "rows": table.num_rows,
+                }
+            ]
+        )[-MANIFEST_HISTORY:],
+    )
+    if not storage.upload_bytes(
+        committed.to_json(),
+        manifest_path,
+        content_type="application/json",
+        if_generation_match=manifest.generation,
+    ):
+        logger.warning(f"Manifest of {prefix} changed concurrently, backing out")
+        # The same inputs give the same output names: if the other run compacted
+        # exactly these inputs, the outputs are its committed files
+        winner = load_manifest(storage, manifest_path)
+        if not all(winner.replaced.get(blob.name) == blob.generation for blob in inputs):
+            for name, generation in output_generations.items():
+                storage.delete(name, if_generation_match=generation)
+        return result
+
+    for blob in inputs:
+        if not storage.delete(blob.name, if_generation_match=blob.generation):
+            logger.warning(f"{blob.name} changed after compaction read it; left in place")
+
+    logger.info(
+        f"Compacted {len(inputs)} files ({input_bytes} bytes, {table.num_rows} rows) "
+        f"in {prefix} into {len(outputs)}"
+    )
+    result.inputs = [blob.name for blob in inputs]
+    result.outputs = outputs
+    result.rows = table.num_rows
+    result.committed = True
+    return result
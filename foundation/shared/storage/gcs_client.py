@@ -1,11 +1,26 @@
 """Google Cloud Storage client with retry logic"""
 
 import time
-from typing import Optional, TYPE_CHECKING
-from google.cloud import storage
-from google.api_core import exceptions as gcp_exceptions
+from typing import List, Optional, TYPE_CHECKING
 from loguru import logger
 
+try:
+    from google.api_core import exceptions as gcp_exceptions
+    from google.cloud import storage
+    from google.cloud.storage.retry import DEFAULT_RETRY
+
+    try:
+        from google.cloud.storage.exceptions import DataCorruption
+    except ImportError:  # google-cloud-storage < 3
+        from google.resumable_media.common import DataCorruption
+
+    GCS_AVAILABLE = True
+except ImportError:
+    storage = None
+    GCS_AVAILABLE = False
+
+from shared.storage.base import BlobInfo, StorageClient, Upload
+
 if TYPE_CHECKING:
     from shared.config.settings import Settings
 
@@ -14,8 +29,23 @@ try:
 except ImportError:
     default_settings = None
 
+# Objects at least this large use resumable uploads in chunks of CHUNK_SIZE
+# (chunk size must be a multiple of 256 KB), so a failure only resends a chunk
+RESUMABLE_THRESHOLD_BYTES = 8 * 1024 * 1024
+CHUNK_SIZE_BYTES = 8 * 1024 * 1024
+
+
+def _blob_info(blob) -> BlobInfo:
+    return BlobInfo(
+        name=blob.name,
+        size=blob.size or 0,
+        generation=blob.generation or 0,
+        md5_hash=blob.md5_hash,
+        crc32c=blob.crc32c,
+    )
+
 
-class GCSClient:
+class GCSClient(StorageClient):
     """GCS client with exponential backoff retry"""
 
     def __init__(
@@ -23,34 +53,96 @@ class GCSClient:
         bucket_name: Optional[str] = None,
         settings: Optional["Settings"] = None,
         max_retries: int = 3,
+        resumable_threshold: int = RESUMABLE_THRESHOLD_BYTES,
+        chunk_size: int = CHUNK_SIZE_BYTES,
     ):
+        """
+        Args:
+            bucket_name: Bucket (defaults to settings.GCS_BUCKET_NAME)
+            settings: Settings instance (defaults to shared.config.settings)
+            max_retries: Attempts per upload
+            resumable_threshold: Size from which uploads are resumable
+            chunk_size: Resumable upload chunk size (multiple of 256 KB)
+        """
+        if not GCS_AVAILABLE:
+            raise ImportError("google-cloud-storage is required for GCSClient")
+
         self.settings = settings or default_settings
         if not self.settings:
             raise ValueError("Settings required")
 
         self.bucket_name = bucket_name or self.settings.GCS_BUCKET_NAME
         self.max_retries = max_retries
+        self.resumable_threshold = resumable_threshold
+        self.chunk_size = chunk_size
         self.client = storage.Client()
         self.bucket = self.client.bucket(self.bucket_name)
         logger.info(f"GCS client initialized for bucket: {self.bucket_name}")
 
-    def upload_file(
-        self,
-        source_path: str,
-        destination_blob: str,
-        content_type: str = "application/octet-stream",
-    ) -> bool:
-        """Upload file with exponential backoff retry"""
+    def _send(self, upload: Upload, if_generation_match: int) -> None:
+        length = upload.content_length
+        resumable = length is None or length >= self.resumable_threshold
+        blob = self.bucket.blob(
+            upload.destination, chunk_size=self.chunk_size if resumable else None
+        )
+        # The precondition makes the client's own retries safe to use
+        options = dict(
+            content_type=upload.content_type,
+            if_generation_match=if_generation_match,
+            checksum="crc32c",
+            retry=DEFAULT_RETRY,
+        )
+        if upload.data is not None:
+            blob.upload_from_string(upload.data, **options)
+        elif upload.path is not None:
+            blob.upload_from_filename(upload.path, **options)
+        else:
+            blob.upload_from_file(upload.fileobj, rewind=True, size=upload.size, **options)
+
+    def upload(self, upload: Upload, if_generation_match: Optional[int] = None) -> bool:
+        """Upload with checksum validation, a generation precondition and backoff retry"""
+        strict = if_generation_match is not None
+        precondition = if_generation_match if strict else 0
+        target = f"gs://{self.bucket_name}/{upload.destination}"
+
         for attempt in range(self.max_retries):
             try:
-                blob = self.bucket.blob(destination_blob)
-                blob.upload_from_filename(source_path, content_type=content_type)
-                logger.info(f"Uploaded {source_path} -> gs://{self.bucket_name}/{destination_blob}")
+                self._send(upload, precondition)
+                logger.info(f"Uploaded {upload.source} -> {target}")
                 return True
-            except gcp_exceptions.GoogleAPIError as e:
-                wait_time = 2 ** attempt
+            except gcp_exceptions.PreconditionFailed:
+                if strict:
+                    logger.warning(f"{target} changed (expected generation {precondition})")
+                    return False
+                existing = self.get_blob(upload.destination)
+                if existing is not None and existing.matches(upload.checksums()):
+                    logger.info(f"{target} already holds identical content")
+                    return True
+                # Replace different content, but only the version just inspected
+                precondition = existing.generation if existing else 0
+            except (gcp_exceptions.GoogleAPIError, DataCorruption) as e:
+                wait_time = 2**attempt
                 logger.warning(f"Upload failed (attempt {attempt + 1}/{self.max_retries}): {e}")
                 if attempt < self.max_retries - 1:
                     time.sleep(wait_time)
-        logger.error(f"Upload failed after {self.max_retries} attempts: {source_path}")
+        logger.error(f"Upload failed after {self.max_retries} attempts: {upload.source}")
         return False
+
+    def get_blob(self, name: str) -> Optional[BlobInfo]:
+        blob = self.bucket.get_blob(name)
+        return _blob_info(blob) if blob is not None else None
+
+    def list_blobs(self, prefix: str = "") -> List[BlobInfo]:
+        blobs = self.client.list_blobs(self.bucket_name, prefix=prefix)
+        return sorted((_blob_info(blob) for blob in blobs), key=lambda info: info.name)
+
+    def download_bytes(self, name: str) -> bytes:
+        return self.bucket.blob(name).download_as_bytes(checksum="crc32c")
+
+    def delete(self, name: str, if_generation_match: Optional[int] = None) -> bool:
+        try:
+            self.bucket.blob(name).delete(if_generation_match=if_generation_match)
+            return True
+        except (gcp_exceptions.NotFound, gcp_exceptions.PreconditionFailed) as e:
+            logger.warning(f"Not deleted gs://{self.bucket_name}/{name}: {e}")
+            return False
@@ -0,0 +1,71 @@
+"""
+Lake layout shared by everything that writes Parquet files for the warehouse
+
+Files land under ``<prefix>dt=YYYY-MM-DD/hour=HH/`` by event time (the Hive
+layout BigQuery external tables prune on) with deterministic names, so
+re-writing the same rows replaces files instead of duplicating them.
+"""
+
+import hashlib
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    pc = None
+    PYARROW_AVAILABLE = False
+
+PARTITION_FORMAT = "dt=%Y-%m-%d/hour=%H"
+
+
+def partition_by_event_time(
+    table: "pa.Table", time_column: str = "timestamp"
+) -> List[Tuple[str, "pa.Table"]]:
+    """
+    Split a batch into per-hour partitions of its event timestamps
+
+    Args:
+        table: Rows with an event-time column
+        time_column: Float epoch seconds or an Arrow timestamp (read as UTC)
+
+    Returns:
+        (partition path such as 'dt=2024-01-31/hour=09', rows sorted by time)
+    """
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow is required to partition tables")
+
+    times = table[time_column]
+    if pa.types.is_timestamp(times.type):
+        times = times.cast(pa.timestamp("us", tz=times.type.tz))
+    else:
+        micros = pc.cast(pc.floor(pc.multiply(times, 1e6)), pa.int64())
+        times = micros.cast(pa.timestamp("us"))
+    keys = pc.strftime(times, format=PARTITION_FORMAT)
+    return [
+        (key, table.filter(pc.equal(keys, key)).sort_by(time_column))
+        for key in sorted(pc.unique(keys).to_pylist())
+    ]
+
+
+def partition_file_name(
+    table: "pa.Table", token: Optional[str] = None, key_columns: Sequence[str] = ("event_id",)
+) -> str:
+    """
+    Deterministic file name: a retried batch overwrites its own files
+
+    Args:
+        table: The partition's rows
+        token: The batch's offset range token; without one the name is a
+            digest of the row keys
+        key_columns: Columns that together identify a row
+    """
+    if token:
+        return f"part-{token}.parquet"
+    columns = [table[name].cast(pa.string()).to_pylist() for name in key_columns]
+    keys = ("\x1f".join("\\N" if v is None else v for v in row) for row in zip(*columns))
+    digest = hashlib.sha256("\n".join(keys).encode("utf-8"))
+    return f"part-{digest.hexdigest()[:20]}.parquet"
@@ -0,0 +1,111 @@
+"""
+Local filesystem storage backend with the same interface as GCSClient
+
+Objects are files under a root directory, written to a temporary name and
+renamed into place. The file's modification time in nanoseconds stands in
+for the GCS generation. Preconditions are checked without cross-process
+locking, so the backend is meant for tests, benchmarks and single-process runs.
+"""
+
+import base64
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+from loguru import logger
+
+from shared.storage.base import BlobInfo, StorageClient, Upload
+
+
+class LocalStorageClient(StorageClient):
+    """Objects stored as files under a root directory"""
+
+    def __init__(self, root_dir: str):
+        """
+        Args:
+            root_dir: Directory standing in for the bucket (created if missing)
+        """
+        self.root = Path(root_dir)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.bucket_name = str(self.root)
+        self._lock = threading.Lock()
+        logger.info(f"Local storage client initialized at: {self.root}")
+
+    def _path(self, name: str) -> Path:
+        path = (self.root / name).resolve()
+        if self.root.resolve() not in path.parents:
+            raise ValueError(f"Object name escapes the storage root: {name}")
+        return path
+
+    def _info(self, path: Path) -> BlobInfo:
+        md5 = hashlib.md5()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                md5.update(chunk)
+        stat = path.stat()
+        return BlobInfo(
+            name=path.relative_to(self.root.resolve()).as_posix(),
+            size=stat.st_size,
+            generation=stat.st_mtime_ns,
+            md5_hash=base64.b64encode(md5.digest()).decode("ascii"),
+        )
+
+    def upload(self, upload: Upload, if_generation_match: Optional[int] = None) -> bool:
+        path = self._path(upload.destination)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".upload-")
+        with os.fdopen(fd, "wb") as f:
+            for chunk in upload.chunks():
+                f.write(chunk)
+
+        with self._lock:
+            existing = self._info(path) if path.exists() else None
+            current = existing.generation if existing else 0
+            if if_generation_match is not None and if_generation_match != current:
+                os.unlink(tmp_name)
+                logger.warning(f"{path} changed (expected generation {if_generation_match})")
+                return False
+            if if_generation_match is None and existing and existing.matches(upload.checksums()):
+                os.unlink(tmp_name)
+                logger.info(f"{path} already holds identical content")
+                return True
+            os.replace(tmp_name, path)
+            # Guarantee a new generation even within the clock's resolution
+            if existing and path.stat().st_mtime_ns <= current:
+                os.utime(path, ns=(current + 1, current + 1))
+
+        logger.info(f"Uploaded {upload.source} -> {path}")
+        return True
+
+    def get_blob(self, name: str) -> Optional[BlobInfo]:
+        path = self._path(name)
+        return self._info(path) if path.is_file() else None
+
+    def list_blobs(self, prefix: str = "") -> List[BlobInfo]:
+        root = self.root.resolve()
+        infos = [
+            self._info(path)
+            for path in root.rglob("*")
+            if path.is_file()
+            and not path.name.startswith(".upload-")
+            and path.relative_to(root).as_posix().startswith(prefix)
+        ]
+        return sorted(infos, key=lambda info: info.name)
+
+    def download_bytes(self, name: str) -> bytes:
+        return self._path(name).read_bytes()
+
+    def delete(self, name: str, if_generation_match: Optional[int] = None) -> bool:
+        path = self._path(name)
+        with self._lock:
+            if not path.is_file():
+                return False
+            if if_generation_match is not None and path.stat().st_mtime_ns != if_generation_match:
+                logger.warning(f"Not deleted {path}: generation changed")
+                return False
+            path.unlink()
+        return True
@@ -31,6 +31,10 @@ class EcommerceSettings(BaseSettings):
     KAFKA_TOPIC_INVENTORY: str = "ecommerce_inventory"
     KAFKA_TOPIC_DLQ: str = "ecommerce_dlq"
 
+    # Ingestion dedup (Redis idempotency filter in front of PostgreSQL)
+    INGESTION_DEDUP_MODE: str = ""  # "" (disabled), "set" or "bloom"
+    INGESTION_DEDUP_TTL_SECONDS: int = 7 * 24 * 3600
+
     # DuckDB (Data Warehouse)
     DUCKDB_PATH: str = "data/ecommerce_warehouse.duckdb"
 
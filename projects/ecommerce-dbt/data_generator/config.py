@@ -3,7 +3,7 @@ Configuration for data generator
 """
 
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional
 
 
 @dataclass
@@ -19,6 +19,10 @@ class GeneratorConfig:
     total_users: int = 1000
     active_users_per_day: int = 200
 
+    # Sessions end after this much inactivity, or after any event with exit probability
+    session_timeout_seconds: int = 30 * 60
+    session_exit_probability: float = 0.15
+
     # Product catalog
     total_products: int = 500
     categories: List[str] = None
@@ -26,9 +30,18 @@ class GeneratorConfig:
     # Business hours pattern (higher activity during business hours)
     business_hours_multiplier: float = 2.0
 
+    # Traffic shaping (see data_generator.traffic); rates above are averages
+    traffic_shaping: bool = True
+    hourly_profile: Optional[List[float]] = None  # 24 values; None = business hours + quiet nights
+    weekday_profile: Optional[List[float]] = None  # 7 values, Monday first
+    flash_sales: Optional[List] = None  # List[traffic.FlashSale]
+
     # Conversion rate (page views → orders)
     conversion_rate: float = 0.03  # 3% conversion rate
 
+    # Random seed for reproducible catalogs and events (None = non-deterministic)
+    seed: Optional[int] = None
+
     def __post_init__(self):
         if self.categories is None:
             self.categories = [
@@ -2,10 +2,11 @@
 Generate synthetic e-commerce events (orders, page views, inventory)
 """
 
+import heapq
 import random
 import uuid
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Iterator, Tuple, Union
 
 # from dataclasses import asdict
 
@@ -16,6 +17,10 @@ from shared.models.inventory import Inventory
 from data_generator.config import GeneratorConfig
 from data_generator.user_generator import UserGenerator
 from data_generator.product_generator import ProductGenerator
+from data_generator.sessions import SessionManager, user_index
+from data_generator.traffic import TrafficProfile
+
+Event = Union[Order, PageView, Inventory]
 
 
 class EventGenerator:
@@ -23,16 +28,24 @@ class EventGenerator:
 
     def __init__(self, config: GeneratorConfig):
         self.config = config
-        self.user_gen = UserGenerator(config.total_users)
-        self.product_gen = ProductGenerator(config.total_products, config.categories)
+        # Private source: seeding never touches the global `random` state
+        self.rng = random.Random(config.seed)
+        self.user_gen = UserGenerator(config.total_users, rng=self.rng)
+        self.product_gen = ProductGenerator(config.total_products, config.categories, rng=self.rng)
 
         # Track state for realistic behavior
-        self.user_sessions: Dict[str, str] = {}  # user_id -> session_id
+        self.sessions = SessionManager(
+            config.total_users,
+            timeout_seconds=config.session_timeout_seconds,
+            exit_probability=config.session_exit_probability,
+            object_rng=self.rng,
+        )
         self.product_stock: Dict[str, int] = {}  # product_id -> current_stock
+        self.traffic = TrafficProfile.from_config(config) if config.traffic_shaping else None
 
         # Initialize stock levels
         for product in self.product_gen.products:
-            self.product_stock[product.product_id] = random.randint(50, 500)
+            self.product_stock[product.product_id] = self.rng.randint(50, 500)
 
     def generate_order(self, timestamp: Optional[datetime] = None) -> Order:
         """Generate a synthetic order"""
@@ -43,14 +56,14 @@ class EventGenerator:
         product = self.product_gen.get_random_product()
 
         # Order amount based on product price and quantity
-        quantity = random.choices(
+        quantity = self.rng.choices(
             [1, 2, 3, 4, 5], weights=[0.6, 0.2, 0.1, 0.05, 0.05]  # Most orders are single item
         )[0]
 
         amount = round(product.price * quantity, 2)
 
         # Order status distribution
-        status = random.choices(
+        status = self.rng.choices(
             [
                 OrderStatus.PENDING,
                 OrderStatus.CONFIRMED,
@@ -82,15 +95,13 @@ class EventGenerator:
             user = self.user_gen.get_random_user()
             user_id = user.user_id
 
-        # Get or create session for user
-        if user_id not in self.user_sessions:
-            self.user_sessions[user_id] = f"session_{uuid.uuid4().hex[:12]}"
-
-        session_id = self.user_sessions[user_id]
+        # Continue the user's session or start a new one
+        token = self.sessions.session_for(user_index(user_id), timestamp.timestamp())
+        session_id = f"session_{token:012x}"
 
         # Page types: homepage, category, product, cart, checkout
         page_types = ["homepage", "category", "product", "cart", "checkout"]
-        page_type = random.choices(
+        page_type = self.rng.choices(
             page_types, weights=[0.3, 0.3, 0.3, 0.05, 0.05]  # Most views are browsing
         )[0]
 
@@ -104,7 +115,7 @@ class EventGenerator:
         if page_type == "homepage":
             page_url = "/"
         elif page_type == "category":
-            category = random.choice(self.config.categories)
+            category = self.rng.choice(self.config.categories)
             page_url = f"/category/{category.lower().replace(' ', '-')}"
         elif page_type == "product":
             page_url = f"/product/{product_id}"
@@ -115,11 +126,11 @@ class EventGenerator:
 
         # Duration based on page type
         if page_type == "product":
-            duration = random.uniform(10.0, 120.0)  # Users spend time on product pages
+            duration = self.rng.uniform(10.0, 120.0)  # Users spend time on product pages
         elif page_type == "homepage":
-            duration = random.uniform(5.0, 30.0)
+            duration = self.rng.uniform(5.0, 30.0)
         else:
-            duration = random.uniform(2.0, 15.0)
+            duration = self.rng.uniform(2.0, 15.0)
 
         return PageView(
             view_id=f"view_{uuid.uuid4().hex[:12]}",
@@ -143,10 +154,10 @@ class EventGenerator:
         current_stock = self.product_stock.get(product_id, 100)
 
         # Stock changes: mostly small adjustments, occasional large restocks
-        if random.random() < 0.1:  # 10% chance of large restock
-            stock_change = random.randint(50, 200)
+        if self.rng.random() < 0.1:  # 10% chance of large restock
+            stock_change = self.rng.randint(50, 200)
         else:  # 90% chance of small adjustment
-            stock_change = random.randint(-20, 10)
+            stock_change = self.rng.randint(-20, 10)
 
         new_stock = max(0, current_stock + stock_change)
         self.product_stock[product_id] = new_stock
@@ -156,7 +167,7 @@ class EventGenerator:
             timestamp=timestamp,
             stock_change=stock_change,
             current_stock=new_stock,
-            warehouse_id=random.choice(["WH-001", "WH-002", "WH-003"]),
+            warehouse_id=self.rng.choice(["WH-001", "WH-002", "WH-003"]),
         )
 
     def generate_batch(
@@ -182,15 +193,15 @@ class EventGenerator:
 
         # Generate events with timestamps distributed over the duration
         for i in range(num_orders):
-            timestamp = start_time + timedelta(seconds=random.uniform(0, duration_seconds))
+            timestamp = start_time + timedelta(seconds=self.rng.uniform(0, duration_seconds))
             orders.append(self.generate_order(timestamp))
 
         for i in range(num_page_views):
-            timestamp = start_time + timedelta(seconds=random.uniform(0, duration_seconds))
+            timestamp = start_time + timedelta(seconds=self.rng.uniform(0, duration_seconds))
             page_views.append(self.generate_page_view(timestamp))
 
         for i in range(num_inventory):
-            timestamp = start_time + timedelta(seconds=random.uniform(0, duration_seconds))
+            timestamp = start_time + timedelta(seconds=self.rng.uniform(0, duration_seconds))
             inventory_changes.append(self.generate_inventory_change(timestamp))
 
         # Sort by timestamp
@@ -199,3 +210,55 @@ class EventGenerator:
         inventory_changes.sort(key=lambda x: x.timestamp)
 
         return orders, page_views, inventory_changes
+
+    def iter_events(
+        self, start_time: Optional[datetime] = None, duration_seconds: Optional[float] = None
+    ) -> Iterator[Tuple[str, Event]]:
+        """
+        Lazily yield events in timestamp order
+
+        Each stream is a Poisson process (exponential inter-arrival gaps at its
+        configured rate); the streams are merged on a heap, so memory stays
+        constant however long the simulated period is. With traffic shaping,
+        candidates arrive at the profile's peak rate and each is kept with
+        probability intensity / peak (thinning), which gives the same
+        hourly, weekday and flash-sale shape as the vectorized path.
+
+        Args:
+            start_time: Simulated start (defaults to now)
+            duration_seconds: Simulated duration (None = endless)
+
+        Yields:
+            (kind, event) with kind in 'order', 'page_view', 'inventory'
+        """
+        if start_time is None:
+            start_time = datetime.now()
+
+        streams = {
+            "order": (self.config.orders_per_second, self.generate_order),
+            "page_view": (self.config.page_views_per_second, self.generate_page_view),
+            "inventory": (self.config.inventory_updates_per_second, self.generate_inventory_change),
+        }
+
+        peak = self.traffic.max_intensity if self.traffic is not None else 1.0
+
+        # (offset seconds, kind); kind breaks ties deterministically
+        heap = [
+            (self.rng.expovariate(rate * peak), kind)
+            for kind, (rate, _) in streams.items()
+            if rate > 0
+        ]
+        heapq.heapify(heap)
+
+        while heap:
+            offset, kind = heap[0]
+            if duration_seconds is not None and offset >= duration_seconds:
+                return
+
+            rate, generate = streams[kind]
+            timestamp = start_time + timedelta(seconds=offset)
+            if self.traffic is None or self.rng.random() * peak < self.traffic.intensity_at(
+                timestamp
+            ):
+                yield kind, generate(timestamp)
+            heapq.heapreplace(heap, (offset + self.rng.expovariate(rate * peak), kind))
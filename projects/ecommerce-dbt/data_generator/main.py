@@ -7,9 +7,10 @@ import sys
 import time
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional
 
 # from dataclasses import asdict
+import numpy as np
 from loguru import logger
 
 # Add paths: project root and foundation
@@ -24,8 +25,16 @@ from config import settings  # Project-specific config  # noqa: E402
 # Import shared code
 from data_generator.config import GeneratorConfig  # noqa: E402
 from data_generator.event_generator import EventGenerator  # noqa: E402
+from data_generator.parallel import plan_shards, run_shards  # noqa: E402
+from data_generator.rate_controller import RateController  # noqa: E402
+from data_generator.sinks import DatabaseSink, KafkaSink, ParquetSink  # noqa: E402
+from data_generator.vectorized import VectorizedEventGenerator  # noqa: E402
+from shared.database import deferred_indexes  # noqa: E402
 from shared.messaging import RedpandaProducer  # noqa: E402
 
+# Tables whose secondary indexes a --defer-indexes backfill drops and rebuilds at the end
+FACT_TABLES = ["orders", "page_views", "inventory_changes"]
+
 
 class DataGenerator:
     """Main data generator orchestrator"""
@@ -39,105 +48,220 @@ class DataGenerator:
         self.running = False
 
     def generate_and_publish_stream(
-        self, duration_seconds: Optional[int] = None, events_per_batch: int = 10
-    ):
+        self,
+        duration_seconds: Optional[int] = None,
+        tick_seconds: float = 0.1,
+        burst_seconds: float = 1.0,
+        ramp_up_seconds: float = 0.0,
+        report_interval_seconds: float = 10.0,
+    ) -> Dict[str, Dict[str, float]]:
         """
         Generate events in real-time and publish to message queue
 
+        Emission is paced per stream by token buckets refilling at the configured
+        rates (scaled by the traffic profile when shaping is enabled); every tick
+        emits whatever tokens are available as one batch.
+
         Args:
             duration_seconds: How long to generate (None = infinite)
-            events_per_batch: How many events to generate per batch
+            tick_seconds: Pacing interval (one send batch per stream per tick)
+            burst_seconds: Catch-up allowance after a stall, in seconds of traffic
+            ramp_up_seconds: Linear ramp from 0 to the target rates
+            report_interval_seconds: How often to log achieved vs target rates
+
+        Returns:
+            Target vs achieved events per second per stream
         """
-        logger.info("Starting data generation stream...")
-        logger.info(f"Config: {events_per_batch} events per batch")
+        controller = RateController(
+            {
+                "order": self.config.orders_per_second,
+                "page_view": self.config.page_views_per_second,
+                "inventory": self.config.inventory_updates_per_second,
+            },
+            burst_seconds=burst_seconds,
+            ramp_up_seconds=ramp_up_seconds,
+        )
+        # Columnar generation keeps up with high target rates
+        stream_gen = VectorizedEventGenerator(
+            self.config,
+            self.event_gen.user_gen,
+            self.event_gen.product_gen,
+            initial_stock=self.event_gen.product_stock,
+        )
+        sink = KafkaSink(self.producer) if self.producer else None
+
+        logger.info(f"Starting data generation stream: {controller.stats()}")
 
         self.running = True
-        start_time = datetime.now()
+        started = time.monotonic()
+        last_report = started
+        window_start = datetime.now()
 
         try:
-            # Use a batch window to ensure we get orders/inventory
-            # (since rates are < 1 per second, we need multiple seconds per batch)
-            batch_window_seconds = 10  # Generate 10 seconds worth of events per batch
-            # last_publish_time = datetime.now()
-
             while self.running:
-                batch_start = datetime.now()
-
-                # Generate batch of events for the full window
-                # This ensures we get orders (0.5/sec * 10 = 5 orders)
-                # and inventory (0.1/sec * 10 = 1)
-                orders, page_views, inventory = self.event_gen.generate_batch(
-                    duration_seconds=batch_window_seconds, start_time=batch_start
-                )
-
-                # Publish immediately (batch already contains window worth of events)
-                if self.producer:
-                    self._publish_events(orders, page_views, inventory)
-                else:
-                    logger.debug(
-                        f"Generated: {len(orders)} orders, "
-                        f"{len(page_views)} page views, "
-                        f"{len(inventory)} inventory changes"
+                tick_start = time.monotonic()
+                if stream_gen.traffic is not None:
+                    controller.set_scale(stream_gen.traffic.intensity_at(datetime.now()))
+                counts = controller.take()
+
+                if any(counts.values()):
+                    # Spread this batch over the time since the previous one
+                    now = datetime.now()
+                    window = (now - window_start).total_seconds()
+                    orders = stream_gen.generate_orders(window_start, window, counts["order"])
+                    page_views = stream_gen.generate_page_views(
+                        window_start, window, counts["page_view"]
                     )
-
-                # last_publish_time = datetime.now()
+                    inventory = stream_gen.generate_inventory_changes(
+                        window_start, window, counts["inventory"]
+                    )
+                    window_start = now
+
+                    # Only acknowledged events count towards the achieved rate
+                    delivered = sink.write(orders, page_views, inventory) if sink else counts
+                    for name, count in counts.items():
+                        controller.record(name, delivered[name])
+                        if delivered[name] < count:
+                            controller.record_failed(name, count - delivered[name])
+
+                if tick_start - last_report >= report_interval_seconds:
+                    self._log_rates(controller)
+                    # Close idle sessions so the count reflects current traffic
+                    sessions = stream_gen.sessions
+                    sessions.evict(np.datetime64(window_start, "us").astype(np.int64) / 1e6)
+                    logger.info(f"  open sessions: {sessions.active_sessions():,}")
+                    last_report = tick_start
 
                 # Check if we should stop
-                if duration_seconds:
-                    elapsed = (datetime.now() - start_time).total_seconds()
-                    if elapsed >= duration_seconds:
-                        break
+                if duration_seconds and tick_start - started >= duration_seconds:
+                    break
 
-                # Sleep to maintain rate
-                time.sleep(1.0)
+                time.sleep(max(0.0, tick_seconds - (time.monotonic() - tick_start)))
 
         except KeyboardInterrupt:
             logger.info("Data generation stopped by user")
         finally:
             self.running = False
+            self._log_rates(controller)
             logger.info("Data generation stopped")
 
+        return controller.stats()
+
+    @staticmethod
+    def _log_rates(controller: RateController):
+        for name, stats in controller.stats().items():
+            logger.info(
+                f"  {name}: {stats['achieved_eps']:,.1f}/{stats['target_eps']:,.1f} eps "
+                f"({stats['emitted']:,} events, {stats['failed']:,} failed)"
+            )
+
     def generate_historical_batch(
-        self, days: int = 30, output_format: str = "events"  # "events" or "database"
+        self,
+        days: int = 30,
+        output_format: str = "events",  # "events", "database" or "parquet"
+        workers: int = 1,
+        output_dir: str = "data/bridge_events",
+        defer_indexes: bool = False,
     ):
         """
         Generate historical data batch
 
+        Days are generated as independent shards (vectorized), optionally in a
+        process pool. Output is identical for any number of workers.
+
         Args:
             days: Number of days of historical data
-            output_format: "events" (for streaming) or "database" (direct insert)
+            output_format: "events" (for streaming), "database" (direct insert) or
+                "parquet" (bridge-schema dataset, no broker needed)
+            workers: Number of worker processes (1 = in-process)
+            output_dir: Dataset root for "parquet" output
+            defer_indexes: For "database" output, drop secondary indexes on empty fact
+                tables during the load and rebuild them once at the end. The indexes
+                vanish for every other user of the database meanwhile, so only set
+                this when loading a database nothing else is reading
         """
-        logger.info(f"Generating {days} days of historical data...")
+        logger.info(f"Generating {days} days of historical data ({workers} worker(s))...")
 
         start_date = datetime.now() - timedelta(days=days)
 
-        # Generate data day by day
-        for day in range(days):
-            day_start = start_date + timedelta(days=day)
-            # day_end = day_start + timedelta(days=1)
+        root_seed = self.config.seed
+        if root_seed is None:
+            root_seed = np.random.SeedSequence().entropy
+            logger.info(f"Root seed: {root_seed} (set GeneratorConfig.seed to reproduce)")
+
+        user_gen, product_gen = self.event_gen.user_gen, self.event_gen.product_gen
+        shards = plan_shards(
+            self.config,
+            user_gen,
+            product_gen,
+            start_date,
+            days,
+            root_seed,
+            initial_stock=self.event_gen.product_stock,
+        )
 
-            logger.info(f"Generating data for day {day + 1}/{days}: {day_start.date()}")
+        # Save to database or publish to message queue
+        if output_format == "database":
+            # Binary COPY straight into PostgreSQL
+            sink = DatabaseSink()
+            sink.write_dimensions(user_gen.users, product_gen.products)
+            with deferred_indexes(FACT_TABLES if defer_indexes else []):
+                totals = run_shards(self.config, user_gen, product_gen, shards, sink, workers)
+            sink.refresh_stock_current()
+        elif output_format == "parquet":
+            sink = ParquetSink(output_dir, user_gen.users)
+            totals = run_shards(self.config, user_gen, product_gen, shards, sink, workers)
+        else:
+            sink = KafkaSink(self.producer) if self.producer else None
+            totals = run_shards(self.config, user_gen, product_gen, shards, sink, workers)
 
-            # Generate events for this day
-            orders, page_views, inventory = self.event_gen.generate_batch(
-                duration_seconds=86400, start_time=day_start  # Full day
-            )
+        logger.info(
+            f"Historical data generation completed: {totals['orders']} orders, "
+            f"{totals['page_views']} page views, {totals['inventory']} inventory changes"
+        )
 
-            logger.info(
-                f"  Generated: {len(orders)} orders, {len(page_views)} page views, "
-                f"{len(inventory)} inventory changes"
-            )
+    def stream_events(
+        self,
+        start_time: Optional[datetime] = None,
+        duration_seconds: Optional[float] = None,
+        batch_size: int = 1000,
+    ) -> int:
+        """
+        Generate events lazily and publish them in small batches as they are produced
+
+        Memory is bounded by batch_size regardless of the simulated duration.
+
+        Args:
+            start_time: Simulated start (defaults to now)
+            duration_seconds: Simulated duration (None = endless)
+            batch_size: Events buffered before each publish
 
-            # Save to database or publish to message queue
-            if output_format == "database":
-                # Direct database insert (TODO: implement)
-                pass
-            else:
-                # Publish to Redpanda/Kafka
-                if self.producer:
-                    self._publish_events(orders, page_views, inventory)
+        Returns:
+            Number of events generated
+        """
+        buffers = {"order": [], "page_view": [], "inventory": []}
+        to_dict = {
+            "order": self._order_to_dict,
+            "page_view": self._page_view_to_dict,
+            "inventory": self._inventory_to_dict,
+        }
+        buffered = 0
+        total = 0
 
-        logger.info("Historical data generation completed")
+        for kind, event in self.event_gen.iter_events(start_time, duration_seconds):
+            buffers[kind].append(to_dict[kind](event))
+            buffered += 1
+            total += 1
+
+            if buffered >= batch_size:
+                self._publish_records(buffers["order"], buffers["page_view"], buffers["inventory"])
+                buffers = {kind: [] for kind in buffers}
+                buffered = 0
+
+        if buffered:
+            self._publish_records(buffers["order"], buffers["page_view"], buffers["inventory"])
+
+        return total
 
     def _publish_events(self, orders, page_views, inventory):
         """Helper method to publish events to Redpanda"""
@@ -145,35 +269,18 @@ class DataGenerator:
             return
 
         # Convert entities to dicts and publish
-        order_events = [self._order_to_dict(order) for order in orders]
-        page_view_events = [self._page_view_to_dict(pv) for pv in page_views]
-        inventory_events = [self._inventory_to_dict(inv) for inv in inventory]
-
-        # Publish in batches (use project settings from config.py)
-        if order_events:
-            self.producer.publish_batch(
-                settings.KAFKA_TOPIC_ORDERS, order_events, key_extractor=lambda e: e.get("order_id")
-            )
-
-        if page_view_events:
-            self.producer.publish_batch(
-                settings.KAFKA_TOPIC_PAGE_VIEWS,
-                page_view_events,
-                key_extractor=lambda e: e.get("user_id"),
-            )
+        self._publish_records(
+            [self._order_to_dict(order) for order in orders],
+            [self._page_view_to_dict(pv) for pv in page_views],
+            [self._inventory_to_dict(inv) for inv in inventory],
+        )
 
-        if inventory_events:
-            self.producer.publish_batch(
-                settings.KAFKA_TOPIC_INVENTORY,
-                inventory_events,
-                key_extractor=lambda e: e.get("product_id"),
-            )
+    def _publish_records(self, order_events, page_view_events, inventory_events):
+        """Publish already-serialized event dicts to Redpanda"""
+        if not self.producer:
+            return
 
-        logger.info(
-            f"Published: {len(order_events)} orders, "
-            f"{len(page_view_events)} page views, "
-            f"{len(inventory_events)} inventory changes"
-        )
+        KafkaSink(self.producer).write_records(order_events, page_view_events, inventory_events)
 
     def _order_to_dict(self, order):
         """Convert Order entity to dict"""
@@ -227,14 +334,31 @@ if __name__ == "__main__":
 
     generator = DataGenerator(config, producer=producer)
 
+    # Opt-in: the backfill drops indexes other database users rely on
+    defer_indexes = "--defer-indexes" in sys.argv
+    args = [arg for arg in sys.argv if arg != "--defer-indexes"]
+
     try:
-        if len(sys.argv) > 1 and sys.argv[1] == "historical":
+        if len(args) > 1 and args[1] == "historical":
             # Generate historical data
-            days = int(sys.argv[2]) if len(sys.argv) > 2 else 30
-            generator.generate_historical_batch(days=days, output_format="events")
+            days = int(args[2]) if len(args) > 2 else 30
+            workers = int(args[3]) if len(args) > 3 else 1
+            output_format = args[4] if len(args) > 4 else "events"
+            generator.generate_historical_batch(
+                days=days,
+                output_format=output_format,
+                workers=workers,
+                defer_indexes=defer_indexes,
+            )
+        elif len(args) > 1 and args[1] == "replay":
+            # Stream historical data lazily, publishing as it is generated
+            days = int(args[2]) if len(args) > 2 else 1
+            generator.stream_events(
+                start_time=datetime.now() - timedelta(days=days), duration_seconds=days * 86400
+            )
         else:
             # Generate real-time stream
-            duration = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+            duration = int(args[1]) if len(args) > 1 else 60
             generator.generate_and_publish_stream(duration_seconds=duration)
     finally:
         if producer:
@@ -0,0 +1,172 @@
+"""
+Sharded historical generation
+
+History is split into one shard per day. Each shard has a seed derived from
+the root seed and the day index, so its output does not depend on which
+process generates it or in what order. Product stock is the only state that
+carries across days: a cheap pre-pass over the inventory stream computes
+every day's opening stock before any shard runs. Sessions are per shard.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from data_generator.config import GeneratorConfig
+from data_generator.user_generator import UserGenerator
+from data_generator.product_generator import ProductGenerator
+from data_generator.vectorized import Columns, VectorizedEventGenerator
+
+SHARD_SECONDS = 86400
+
+# Per-process state set by the pool initializer
+_worker: Dict = {}
+
+
+@dataclass
+class HistoryShard:
+    """One day of history"""
+
+    day: int
+    start_time: datetime
+    root_seed: int
+    opening_stock: Dict[str, int]
+
+    @property
+    def seed(self) -> np.random.SeedSequence:
+        return day_seed(self.root_seed, self.day)
+
+
+def day_seed(root_seed: int, day: int) -> np.random.SeedSequence:
+    """Independent, reproducible seed for one day"""
+    return np.random.SeedSequence(root_seed, spawn_key=(day,))
+
+
+def plan_shards(
+    config: GeneratorConfig,
+    user_gen: UserGenerator,
+    product_gen: ProductGenerator,
+    start_date: datetime,
+    days: int,
+    root_seed: int,
+    initial_stock: Optional[Dict[str, int]] = None,
+) -> List[HistoryShard]:
+    """
+    Build the shard list, replaying inventory day by day to get opening stock
+
+    Args:
+        config: Generator configuration
+        user_gen: User catalog
+        product_gen: Product catalog
+        start_date: Start of the first day
+        days: Number of days
+        root_seed: Root seed all day seeds derive from
+        initial_stock: Stock before the first day (random when omitted)
+    """
+    if initial_stock is None:
+        # Drawn from the root seed so every day's generator starts from explicit stock
+        gen = VectorizedEventGenerator(config, user_gen, product_gen, seed=root_seed)
+        initial_stock = dict(zip(gen.product_ids.tolist(), gen.stock.tolist()))
+
+    shards = []
+    stock = initial_stock
+
+    for day in range(days):
+        gen = VectorizedEventGenerator(
+            config, user_gen, product_gen, initial_stock=stock, seed=day_seed(root_seed, day)
+        )
+        opening_stock = dict(zip(gen.product_ids.tolist(), gen.stock.tolist()))
+        day_start = start_date + timedelta(days=day)
+        shards.append(HistoryShard(day, day_start, root_seed, opening_stock))
+
+        # Only the inventory stream moves stock, and it has its own RNG stream
+        gen.generate_inventory_changes(day_start, SHARD_SECONDS)
+        stock = dict(zip(gen.product_ids.tolist(), gen.stock.tolist()))
+
+    return shards
+
+
+def generate_shard(
+    config: GeneratorConfig,
+    user_gen: UserGenerator,
+    product_gen: ProductGenerator,
+    shard: HistoryShard,
+) -> Tuple[Columns, Columns, Columns]:
+    """Generate one day of (orders, page_views, inventory) columns"""
+    gen = VectorizedEventGenerator(
+        config, user_gen, product_gen, initial_stock=shard.opening_stock, seed=shard.seed
+    )
+    return gen.generate_batch(SHARD_SECONDS, shard.start_time)
+
+
+def _init_worker(config, user_gen, product_gen, sink):
+    _worker.update(config=config, user_gen=user_gen, product_gen=product_gen, sink=sink)
+
+
+def _run_shard(shard: HistoryShard) -> Tuple[int, int, int]:
+    return _write_shard(
+        _worker["config"], _worker["user_gen"], _worker["product_gen"], _worker["sink"], shard
+    )
+
+
+def _write_shard(config, user_gen, product_gen, sink, shard: HistoryShard) -> Tuple[int, int, int]:
+    orders, page_views, inventory = generate_shard(config, user_gen, product_gen, shard)
+    if sink is not None:
+        sink.write(orders, page_views, inventory)
+
+    counts = (len(orders["order_id"]), len(page_views["view_id"]), len(inventory["product_id"]))
+    logger.info(
+        f"Day {shard.day + 1} ({shard.start_time.date()}): {counts[0]} orders, "
+        f"{counts[1]} page views, {counts[2]} inventory changes"
+    )
+    return counts
+
+
+def run_shards(
+    config: GeneratorConfig,
+    user_gen: UserGenerator,
+    product_gen: ProductGenerator,
+    shards: List[HistoryShard],
+    sink=None,
+    workers: int = 1,
+) -> Dict[str, int]:
+    """
+    Generate shards and hand each one to the sink
+
+    With workers > 1 shards run in a process pool and each worker writes its
+    own output (the sink is pickled, so it opens its own connections). Workers
+    are spawned rather than forked so they never inherit the parent's
+    connection pools or producer threads.
+
+    Args:
+        config: Generator configuration
+        user_gen: User catalog (sent to each worker once)
+        product_gen: Product catalog (sent to each worker once)
+        shards: Shards from plan_shards
+        sink: Object with write(orders, page_views, inventory), or None
+        workers: Number of processes
+
+    Returns:
+        Total counts per stream
+    """
+    if workers <= 1:
+        results = [_write_shard(config, user_gen, product_gen, sink, s) for s in shards]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(config, user_gen, product_gen, sink),
+        ) as pool:
+            results = list(pool.map(_run_shard, shards))
+
+    return {
+        "orders": sum(r[0] for r in results),
+        "page_views": sum(r[1] for r in results),
+        "inventory": sum(r[2] for r in results),
+    }
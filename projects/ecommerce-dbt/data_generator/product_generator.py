@@ -3,7 +3,8 @@ Generate synthetic product catalog
 """
 
 import random
-from typing import List
+from itertools import accumulate
+from typing import List, Optional
 from dataclasses import dataclass
 
 
@@ -43,8 +44,20 @@ class ProductGenerator:
         "Food": (3.0, 100.0),
     }
 
-    def __init__(self, total_products: int = 500, categories: List[str] = None):
+    def __init__(
+        self,
+        total_products: int = 500,
+        categories: List[str] = None,
+        rng: Optional[random.Random] = None,
+    ):
+        """
+        Args:
+            total_products: Catalog size (split evenly across categories)
+            categories: Category names (defaults to the built-in list)
+            rng: Random source (a private one is created if omitted)
+        """
         self.total_products = total_products
+        self.rng = rng or random.Random()
         self.categories = categories or [
             "Electronics",
             "Clothing",
@@ -58,6 +71,11 @@ class ProductGenerator:
         self.products: List[Product] = []
         self._generate_products()
 
+        # Popularity is fixed per catalog (Pareto - few products are very popular).
+        # Cumulative weights let each draw bisect in O(log n) instead of O(n).
+        self.popularity_weights: List[float] = [self.rng.paretovariate(1.5) for _ in self.products]
+        self._popularity_cum_weights: List[float] = list(accumulate(self.popularity_weights))
+
     def _generate_products(self):
         """Generate product catalog"""
         # Distribute products across categories
@@ -71,9 +89,9 @@ class ProductGenerator:
                 )
 
                 # Price distribution (more lower-priced items)
-                price = round(random.triangular(price_min, price_max, price_min * 1.5), 2)
+                price = round(self.rng.triangular(price_min, price_max, price_min * 1.5), 2)
 
-                supplier = random.choice(self.SUPPLIERS)
+                supplier = self.rng.choice(self.SUPPLIERS)
 
                 self.products.append(
                     Product(
@@ -87,13 +105,11 @@ class ProductGenerator:
 
     def get_random_product(self) -> Product:
         """Get a random product"""
-        return random.choice(self.products)
+        return self.rng.choice(self.products)
 
     def get_popular_products(self, count: int) -> List[Product]:
         """Get popular products (weighted - some products are more popular)"""
-        # Create popularity weights (Pareto distribution - few products are very popular)
-        weights = [random.paretovariate(1.5) for _ in self.products]
-        return random.choices(self.products, weights=weights, k=count)
+        return self.rng.choices(self.products, cum_weights=self._popularity_cum_weights, k=count)
 
     def get_products_by_category(self, category: str) -> List[Product]:
         """Get all products in a category"""
@@ -0,0 +1,143 @@
+"""
+Token-bucket pacing for real-time event streams
+
+Each stream gets a bucket that refills at its target events-per-second. The
+streaming loop takes whatever whole tokens are available on every tick and
+emits that many events as one batch, so high rates cost one send batch per
+tick rather than one sleep per event.
+"""
+
+import time
+from typing import Callable, Dict, Optional
+
+
+class TokenBucket:
+    """Token bucket with a linear ramp-up to the target rate"""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        ramp_up_seconds: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            rate: Target tokens (events) per second
+            burst: Bucket capacity - the most events emitted at once after a stall
+                (defaults to one second of traffic, at least 1)
+            ramp_up_seconds: Time to go linearly from 0 to the target rate
+            clock: Monotonic clock in seconds (injectable for tests)
+        """
+        if rate < 0:
+            raise ValueError(f"Rate must be non-negative, got {rate}")
+
+        self.rate = rate
+        self.scale = 1.0  # Traffic-shaping multiplier on the target rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self.ramp_up_seconds = ramp_up_seconds
+        self.clock = clock
+
+        self.started_at = clock()
+        self._updated_at = self.started_at
+        self._tokens = 0.0
+
+    def current_rate(self, now: Optional[float] = None) -> float:
+        """Target rate at a point in time, accounting for ramp-up and scale"""
+        if now is None:
+            now = self.clock()
+        if self.ramp_up_seconds <= 0:
+            return self.rate * self.scale
+        ramp = min(1.0, (now - self.started_at) / self.ramp_up_seconds)
+        return self.rate * self.scale * ramp
+
+    def refill(self, now: float) -> None:
+        elapsed = now - self._updated_at
+        if elapsed > 0:
+            # Average rate over the interval (exact for a linear ramp)
+            rate = (self.current_rate(self._updated_at) + self.current_rate(now)) / 2
+            self._tokens = min(self.burst, self._tokens + rate * elapsed)
+            self._updated_at = now
+
+    def take_available(self) -> int:
+        """Take all whole tokens currently in the bucket"""
+        self.refill(self.clock())
+        count = int(self._tokens)
+        self._tokens -= count
+        return count
+
+    def time_until(self, tokens: float = 1.0) -> float:
+        """Seconds until the given number of tokens is available (at the current rate)"""
+        now = self.clock()
+        self.refill(now)
+        missing = tokens - self._tokens
+        if missing <= 0:
+            return 0.0
+        rate = self.current_rate(now)
+        return missing / rate if rate > 0 else float("inf")
+
+
+class RateController:
+    """Per-stream token buckets plus achieved vs target rate accounting"""
+
+    def __init__(
+        self,
+        targets: Dict[str, float],
+        burst_seconds: float = 1.0,
+        ramp_up_seconds: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            targets: Stream name -> target events per second
+            burst_seconds: Bucket capacity in seconds of traffic per stream
+            ramp_up_seconds: Linear ramp from 0 to the targets
+            clock: Monotonic clock in seconds
+        """
+        self.clock = clock
+        self.buckets = {
+            name: TokenBucket(
+                rate,
+                burst=max(rate * burst_seconds, 1.0),
+                ramp_up_seconds=ramp_up_seconds,
+                clock=clock,
+            )
+            for name, rate in targets.items()
+        }
+        self.emitted = {name: 0 for name in targets}
+        self.failed = {name: 0 for name in targets}
+        self.started_at = clock()
+
+    def take(self) -> Dict[str, int]:
+        """Events each stream may emit now"""
+        return {name: bucket.take_available() for name, bucket in self.buckets.items()}
+
+    def set_scale(self, scale: float) -> None:
+        """Scale every target rate (e.g. by the current traffic-profile intensity)"""
+        for bucket in self.buckets.values():
+            # Settle tokens at the old rate before switching
+            bucket.refill(self.clock())
+            bucket.scale = scale
+
+    def record(self, name: str, count: int) -> None:
+        """Record events actually emitted (after a successful send)"""
+        self.emitted[name] += count
+
+    def record_failed(self, name: str, count: int) -> None:
+        """Record events generated but not delivered (they do not count as achieved)"""
+        self.failed[name] += count
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Target vs achieved events per second for every stream since start"""
+        elapsed = max(self.clock() - self.started_at, 1e-9)
+        return {
+            name: {
+                "target_eps": bucket.rate,
+                "scale": bucket.scale,
+                "current_target_eps": bucket.current_rate(),
+                "achieved_eps": self.emitted[name] / elapsed,
+                "emitted": self.emitted[name],
+                "failed": self.failed[name],
+            }
+            for name, bucket in self.buckets.items()
+        }
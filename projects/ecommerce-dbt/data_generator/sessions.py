@@ -0,0 +1,133 @@
+"""
+Session tracking for generated page views
+
+State lives in fixed-size arrays indexed by user number (user_000001 -> 0),
+so memory depends only on the catalog size, not on how long a stream runs.
+A session ends after an inactivity timeout or, after any event, with a fixed
+exit probability (geometric session length), which gives the per-session
+event counts and durations that mart_session_stats measures.
+"""
+
+import random
+from typing import Optional
+
+import numpy as np
+
+DEFAULT_TIMEOUT_SECONDS = 30 * 60
+DEFAULT_EXIT_PROBABILITY = 0.15  # Mean session length ~7 events
+
+
+def user_index(user_id: str) -> int:
+    """Array index for a generated user id ('user_000042' -> 41)"""
+    return int(user_id.rsplit("_", 1)[-1]) - 1
+
+
+class SessionManager:
+    """Per-user sessions with inactivity timeout and exit probability"""
+
+    def __init__(
+        self,
+        total_users: int,
+        timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS,
+        exit_probability: float = DEFAULT_EXIT_PROBABILITY,
+        rng: Optional[np.random.Generator] = None,
+        object_rng: Optional[random.Random] = None,
+    ):
+        """
+        Args:
+            total_users: Catalog size (array length)
+            timeout_seconds: Inactivity gap that ends a session
+            exit_probability: Chance that a session ends after each event
+            rng: Random generator for session tokens (vectorized path)
+            object_rng: Random source for the object-at-a-time path
+        """
+        self.timeout = timeout_seconds
+        self.exit_probability = exit_probability
+        self.rng = rng or np.random.default_rng()
+        self.object_rng = object_rng or random.Random()
+
+        # 0 = no open session
+        self.tokens = np.zeros(total_users, dtype=np.int64)
+        self.last_seen = np.full(total_users, -np.inf)
+
+    def session_for(self, index: int, timestamp: float) -> int:
+        """
+        Session token for one event (object-at-a-time path, uses object_rng)
+
+        Args:
+            index: User index
+            timestamp: Event time in epoch seconds
+        """
+        if self.tokens[index] == 0 or timestamp - self.last_seen[index] > self.timeout:
+            self.tokens[index] = self.object_rng.getrandbits(48) or 1
+
+        token = int(self.tokens[index])
+        self.last_seen[index] = max(self.last_seen[index], timestamp)
+        if self.object_rng.random() < self.exit_probability:
+            self.tokens[index] = 0
+        return token
+
+    def assign(self, user_idx: np.ndarray, timestamps: np.ndarray) -> np.ndarray:
+        """
+        Session tokens for a batch of events, vectorized
+
+        Args:
+            user_idx: User index per event
+            timestamps: Event times in epoch seconds (any order)
+
+        Returns:
+            Session token per event, aligned with the inputs
+        """
+        n = len(user_idx)
+        if n == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        # Group events by user, in time order within each user
+        order = np.lexsort((timestamps, user_idx))
+        users = user_idx[order]
+        times = timestamps[order]
+        ended = self.rng.random(n) < self.exit_probability
+
+        first = np.ones(n, dtype=bool)
+        first[1:] = users[1:] != users[:-1]
+
+        previous = np.empty(n)
+        previous[1:] = times[:-1]
+        previous[first] = self.last_seen[users[first]]
+
+        new_session = times - previous > self.timeout
+        new_session[first] |= self.tokens[users[first]] == 0
+        new_session[1:] |= ended[:-1] & ~first[1:]
+
+        # Events before a user's first new session continue the open session
+        count = np.cumsum(new_session)
+        group_start = np.maximum.accumulate(np.where(first, np.arange(n), 0))
+        before_group = count[group_start] - new_session[group_start]
+        continuing = count == before_group
+
+        sorted_tokens = self.tokens[users]
+        if count[-1]:
+            # Skipped when every event continues an open session (nothing to index)
+            new_tokens = self.rng.integers(1, 2**48, size=int(count[-1]), dtype=np.int64)
+            sorted_tokens = np.where(
+                continuing, sorted_tokens, new_tokens[np.maximum(count - 1, 0)]
+            )
+
+        # Persist state from each user's last event
+        last = np.ones(n, dtype=bool)
+        last[:-1] = users[:-1] != users[1:]
+        self.tokens[users[last]] = np.where(ended[last], 0, sorted_tokens[last])
+        self.last_seen[users[last]] = times[last]
+
+        tokens = np.empty(n, dtype=np.int64)
+        tokens[order] = sorted_tokens
+        return tokens
+
+    def evict(self, now: float) -> int:
+        """Close sessions idle longer than the timeout; returns how many were closed"""
+        idle = (self.tokens != 0) & (now - self.last_seen > self.timeout)
+        self.tokens[idle] = 0
+        return int(idle.sum())
+
+    def active_sessions(self) -> int:
+        return int(np.count_nonzero(self.tokens))
@@ -0,0 +1,448 @@
+"""
+Output sinks for generated event batches
+
+A sink receives one batch as (orders, page_views, inventory) columns. Sinks
+open their connections lazily and drop them when pickled, so the same sink
+can be handed to worker processes and each worker gets its own connection.
+"""
+
+import os
+import zlib
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    pq = None
+    PYARROW_AVAILABLE = False
+
+from config import settings  # Project-specific config
+from shared.database import get_db_connection, insert_missing_rows, upsert_rows
+from shared.messaging import RedpandaProducer
+from shared.models.bridge_event import BRIDGE_EVENT_SCHEMA, CONTEXT_TYPE, DICTIONARY_COLUMNS
+from shared.storage.layout import partition_by_event_time, partition_file_name
+
+from data_generator.product_generator import Product
+from data_generator.user_generator import UserProfile
+from data_generator.vectorized import Columns, to_records
+
+
+class KafkaSink:
+    """Publish batches to the orders, page views and inventory topics"""
+
+    def __init__(self, producer: Optional[RedpandaProducer] = None):
+        """
+        Args:
+            producer: Existing producer (one is created on first use otherwise)
+        """
+        self.producer = producer
+        self._owns_producer = producer is None
+
+    def __getstate__(self):
+        # Producers hold sockets; each process opens its own
+        return {"producer": None, "_owns_producer": True}
+
+    def _get_producer(self) -> RedpandaProducer:
+        if self.producer is None:
+            self.producer = RedpandaProducer(settings=settings)
+        return self.producer
+
+    def write(self, orders: Columns, page_views: Columns, inventory: Columns) -> Dict[str, int]:
+        """Publish a columnar batch (dicts are built only here)"""
+        return self.write_records(to_records(orders), to_records(page_views), to_records(inventory))
+
+    def write_records(
+        self, order_events: List[Dict], page_view_events: List[Dict], inventory_events: List[Dict]
+    ) -> Dict[str, int]:
+        """
+        Publish already-serialized event dicts
+
+        Returns:
+            Events the broker acknowledged per stream ('order', 'page_view', 'inventory')
+        """
+        producer = self._get_producer()
+        delivered = {"order": 0, "page_view": 0, "inventory": 0}
+
+        # Publish in batches (use project settings from config.py)
+        if order_events:
+            delivered["order"] = producer.publish_batch(
+                settings.KAFKA_TOPIC_ORDERS, order_events, key_extractor=lambda e: e.get("order_id")
+            )
+
+        if page_view_events:
+            delivered["page_view"] = producer.publish_batch(
+                settings.KAFKA_TOPIC_PAGE_VIEWS,
+                page_view_events,
+                key_extractor=lambda e: e.get("user_id"),
+            )
+
+        if inventory_events:
+            delivered["inventory"] = producer.publish_batch(
+                settings.KAFKA_TOPIC_INVENTORY,
+                inventory_events,
+                key_extractor=lambda e: e.get("product_id"),
+            )
+
+        logger.info(
+            f"Published: {delivered['order']}/{len(order_events)} orders, "
+            f"{delivered['page_view']}/{len(page_view_events)} page views, "
+            f"{delivered['inventory']}/{len(inventory_events)} inventory changes"
+        )
+        return delivered
+
+    def close(self) -> None:
+        if self.producer is not None and self._owns_producer:
+            self.producer.close()
+            self.producer = None
+
+
+def _decimals(values: np.ndarray) -> List[Decimal]:
+    """Money/duration columns as 2-place Decimals (binary COPY into numeric needs Decimal)"""
+    cents = np.round(np.asarray(values, dtype=np.float64) * 100).astype(np.int64)
+    return [Decimal(c).scaleb(-2) for c in cents.tolist()]
+
+
+class DatabaseSink:
+    """
+    Load batches straight into PostgreSQL with binary COPY
+
+    Batches are staged and merged, so re-running a backfill skips rows that
+    already landed instead of failing on the primary key or duplicating them.
+    """
+
+    ORDER_COLUMNS = (
+        ("order_id", "varchar"),
+        ("user_id", "varchar"),
+        ("product_id", "varchar"),
+        ("timestamp", "timestamp"),
+        ("amount", "numeric"),
+        ("status", "varchar"),
+        ("quantity", "int4"),
+    )
+    PAGE_VIEW_COLUMNS = (
+        ("view_id", "varchar"),
+        ("user_id", "varchar"),
+        ("product_id", "varchar"),
+        ("timestamp", "timestamp"),
+        ("session_id", "varchar"),
+        ("page_url", "text"),
+        ("duration_seconds", "numeric"),
+    )
+    INVENTORY_COLUMNS = (
+        ("product_id", "varchar"),
+        ("timestamp", "timestamp"),
+        ("stock_change", "int4"),
+        ("current_stock", "int4"),
+        ("warehouse_id", "varchar"),
+    )
+    USER_COLUMNS = (
+        ("user_id", "varchar"),
+        ("signup_date", "date"),
+        ("country", "varchar"),
+        ("tier", "varchar"),
+    )
+    PRODUCT_COLUMNS = (
+        ("product_id", "varchar"),
+        ("category", "varchar"),
+        ("price", "numeric"),
+        ("supplier", "varchar"),
+    )
+
+    # Latest loaded change per product, applied with the same forward-only rule
+    # as the inventory pipeline (backfilled rows carry no Kafka offset)
+    REFRESH_STOCK_QUERY = """
+        INSERT INTO product_stock_current (product_id, current_stock, warehouse_id, last_event_at)
+        SELECT DISTINCT ON (product_id) product_id, current_stock, warehouse_id, timestamp
+        FROM inventory_changes
+        ORDER BY product_id, timestamp DESC, id DESC
+        ON CONFLICT (product_id) DO UPDATE SET
+            current_stock = EXCLUDED.current_stock,
+            warehouse_id = EXCLUDED.warehouse_id,
+            last_event_at = EXCLUDED.last_event_at,
+            last_offset = NULL,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE EXCLUDED.last_event_at > product_stock_current.last_event_at
+    """
+
+    # Fact rows are skipped when already loaded: by primary key where there is a
+    # natural one, by content for inventory changes (keyed by a SERIAL id)
+    PRIMARY_KEYS = {"orders": ["order_id"], "page_views": ["view_id"]}
+    MATCH_COLUMNS = {
+        "inventory_changes": ["product_id", "timestamp", "stock_change", "current_stock"]
+    }
+
+    @classmethod
+    def _load(cls, conn, table, spec, columns: List[list]) -> int:
+        names, types = zip(*spec)
+        rows = zip(*columns)
+        if table in cls.PRIMARY_KEYS:
+            return upsert_rows(
+                conn, table, names, types, rows, cls.PRIMARY_KEYS[table], update_existing=False
+            )
+        return insert_missing_rows(conn, table, names, types, rows, cls.MATCH_COLUMNS[table])
+
+    def write(self, orders: Columns, page_views: Columns, inventory: Columns) -> None:
+        """Load one batch; the three tables commit together"""
+        with get_db_connection() as conn:
+            self._load(
+                conn,
+                "orders",
+                self.ORDER_COLUMNS,
+                [
+                    orders["order_id"].tolist(),
+                    orders["user_id"].tolist(),
+                    orders["product_id"].tolist(),
+                    orders["timestamp"].tolist(),
+                    _decimals(orders["amount"]),
+                    orders["status"].tolist(),
+                    orders["quantity"].tolist(),
+                ],
+            )
+            self._load(
+                conn,
+                "page_views",
+                self.PAGE_VIEW_COLUMNS,
+                [
+                    page_views["view_id"].tolist(),
+                    page_views["user_id"].tolist(),
+                    page_views["product_id"].tolist(),
+                    page_views["timestamp"].tolist(),
+                    page_views["session_id"].tolist(),
+                    page_views["page_url"].tolist(),
+                    _decimals(page_views["duration_seconds"]),
+                ],
+            )
+            self._load(
+                conn,
+                "inventory_changes",
+                self.INVENTORY_COLUMNS,
+                [
+                    inventory["product_id"].tolist(),
+                    inventory["timestamp"].tolist(),
+                    inventory["stock_change"].tolist(),
+                    inventory["current_stock"].tolist(),
+                    inventory["warehouse_id"].tolist(),
+                ],
+            )
+
+        logger.info(
+            f"Loaded: {len(orders['order_id'])} orders, {len(page_views['view_id'])} page views, "
+            f"{len(inventory['product_id'])} inventory changes"
+        )
+
+    def write_dimensions(self, users: List[UserProfile], products: List[Product]) -> None:
+        """Upsert the user and product catalogs"""
+        with get_db_connection() as conn:
+            user_names, user_types = zip(*self.USER_COLUMNS)
+            upsert_rows(
+                conn,
+                "users",
+                user_names,
+                user_types,
+                ((u.user_id, u.signup_date.date(), u.country, u.tier) for u in users),
+                key_columns=["user_id"],
+            )
+            product_names, product_types = zip(*self.PRODUCT_COLUMNS)
+            prices = _decimals([p.price for p in products])
+            upsert_rows(
+                conn,
+                "products",
+                product_names,
+                product_types,
+                (
+                    (p.product_id, p.category, price, p.supplier)
+                    for p, price in zip(products, prices)
+                ),
+                key_columns=["product_id"],
+            )
+
+        logger.info(f"Upserted {len(users)} users and {len(products)} products")
+
+    def refresh_stock_current(self) -> None:
+        """Bring product_stock_current up to date after loading inventory history"""
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(self.REFRESH_STOCK_QUERY)
+
+    def close(self) -> None:
+        pass
+
+
+class ParquetSink:
+    """
+    Write batches as a Hive-partitioned Parquet dataset in the bridge event schema
+
+    Orders become 'purchase' events and page views 'view'/'click' events (cart and
+    checkout pages count as clicks); inventory changes are not user events and
+    are skipped. Files land in ``{output_dir}/dt=YYYY-MM-DD/hour=HH/`` by event
+    time, the layout the bridge writes under raw/, so a backfill can be copied
+    next to streamed data.
+    """
+
+    BASE_URL = "https://shop.com"
+    DEVICE_TYPES = ["mobile", "desktop", "tablet"]
+    REFERRERS = ["google", "facebook", "direct", "email", "twitter", None]
+    PAID_REFERRERS = {"google", "facebook", "twitter"}
+    CAMPAIGNS = ["summer", "blackfriday", "welcome"]
+    CLICK_PAGES = ["/cart", "/checkout"]
+
+    def __init__(
+        self,
+        output_dir: str,
+        users: List[UserProfile],
+        row_group_size: int = 100_000,
+        compression: str = "snappy",
+    ):
+        """
+        Args:
+            output_dir: Dataset root
+            users: User catalog (country per user)
+            row_group_size: Maximum rows per row group
+            compression: Parquet codec
+        """
+        if not PYARROW_AVAILABLE:
+            raise ImportError(
+                "pyarrow is required for Parquet output. Install with: pip install pyarrow"
+            )
+
+        self.output_dir = Path(output_dir)
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.countries = {u.user_id: u.country for u in users}
+
+    def _session_context(self, session_ids: np.ndarray, countries: np.ndarray) -> Dict[str, list]:
+        """Referrer and campaign per session, derived from the session id (stable across runs)"""
+        referrers, ad_ids, campaigns = [], [], []
+        for session_id, country in zip(session_ids.tolist(), countries.tolist()):
+            h = zlib.crc32(session_id.encode())
+            referrer = self.REFERRERS[h % len(self.REFERRERS)]
+            referrers.append(referrer)
+            if referrer in self.PAID_REFERRERS:
+                ad_ids.append(f"ad_{1000 + (h >> 8) % 9000}")
+                campaigns.append(f"cmp_{country}_{self.CAMPAIGNS[(h >> 4) % len(self.CAMPAIGNS)]}")
+            else:
+                ad_ids.append(None)
+                campaigns.append(None)
+        return {"referrer": referrers, "ad_id": ad_ids, "campaign_id": campaigns}
+
+    @staticmethod
+    def _order_sessions(orders: Columns, page_views: Columns) -> np.ndarray:
+        """
+        Orders carry no session; attribute each one to the session of the user's
+        latest page view at or before the order (vectorized as-of join)
+        """
+        n_views = len(page_views["view_id"])
+        _, codes = np.unique(
+            np.concatenate([page_views["user_id"], orders["user_id"]]), return_inverse=True
+        )
+        view_codes, order_codes = codes[:n_views], codes[n_views:]
+
+        view_times = page_views["timestamp"].astype(np.int64)
+        order_times = orders["timestamp"].astype(np.int64)
+        times = np.concatenate([view_times, order_times])
+        base = times.min(initial=0)
+        span = times.max(initial=0) - base + 1
+
+        # Composite (user, time) key; sorted views allow one searchsorted for all orders
+        view_keys = view_codes * span + (view_times - base)
+        order_by_key = np.argsort(view_keys, kind="stable")
+        view_keys = view_keys[order_by_key]
+        position = np.searchsorted(view_keys, order_codes * span + (order_times - base), "right")
+        position -= 1
+
+        matched = position >= 0
+        matched[matched] = view_codes[order_by_key[position[matched]]] == order_codes[matched]
+        sessions = np.char.add("session_", orders["user_id"].astype(str)).astype(object)
+        sessions[matched] = page_views["session_id"][order_by_key[position[matched]]]
+        return sessions
+
+    def to_table(self, orders: Columns, page_views: Columns) -> "pa.Table":
+        """Convert one batch to a bridge-schema table sorted by timestamp"""
+        order_sessions = self._order_sessions(orders, page_views)
+
+        is_click = np.isin(page_views["page_url"].astype(str), self.CLICK_PAGES)
+        n_orders = len(orders["order_id"])
+
+        event_id = np.concatenate([orders["order_id"], page_views["view_id"]])
+        session_id = np.concatenate([order_sessions, page_views["session_id"]])
+        user = np.concatenate([orders["user_id"], page_views["user_id"]])
+        action = np.concatenate(
+            [np.full(n_orders, "purchase"), np.where(is_click, "click", "view")]
+        )
+        value = np.concatenate([orders["amount"], np.where(is_click, 0.50, 0.01)])
+        timestamp = np.concatenate([orders["timestamp"], page_views["timestamp"]])
+        url = np.concatenate(
+            [
+                np.full(n_orders, f"{self.BASE_URL}/checkout", dtype=object),
+                np.char.add(self.BASE_URL, page_views["page_url"].astype(str)).astype(object),
+            ]
+        )
+
+        # Per-user and per-session attributes are computed once per distinct value
+        users, user_idx = np.unique(user, return_inverse=True)
+        user_numbers = np.array([int(u.rsplit("_", 1)[-1]) for u in users.tolist()])
+        user_countries = np.array([self.countries.get(u, "XX") for u in users.tolist()])
+        sessions, session_idx = np.unique(session_id, return_inverse=True)
+        session_users = np.empty(len(sessions), dtype=np.int64)
+        session_users[session_idx] = user_idx
+        context = self._session_context(sessions, user_countries[session_users])
+
+        order = np.argsort(timestamp, kind="stable")
+        session_idx = session_idx[order]
+        user_idx = user_idx[order]
+
+        context_array = pa.StructArray.from_arrays(
+            [
+                pa.array(np.array(context["referrer"], dtype=object)[session_idx], pa.string()),
+                pa.array(np.array(context["ad_id"], dtype=object)[session_idx], pa.string()),
+                pa.array(np.array(context["campaign_id"], dtype=object)[session_idx], pa.string()),
+                pa.array(url[order], pa.string()),
+            ],
+            fields=list(CONTEXT_TYPE),
+        )
+
+        return pa.Table.from_arrays(
+            [
+                pa.array(event_id[order], pa.string()),
+                pa.array(session_id[order], pa.string()),
+                pa.array(user_numbers[user_idx], pa.int64()),
+                pa.array(user_countries[user_idx], pa.string()),
+                pa.array(np.array(self.DEVICE_TYPES)[user_numbers % 3][user_idx], pa.string()),
+                pa.array(action[order], pa.string()),
+                pa.array(np.round(value[order], 2), pa.float64()),
+                pa.array(timestamp[order].astype("datetime64[us]").astype(np.int64) / 1e6),
+                context_array,
+            ],
+            schema=BRIDGE_EVENT_SCHEMA,
+        )
+
+    def write(self, orders: Columns, page_views: Columns, inventory: Columns) -> None:
+        """Write one batch, one file per event hour"""
+        table = self.to_table(orders, page_views)
+        if table.num_rows == 0:
+            return
+
+        for partition, rows in partition_by_event_time(table):
+            # Named by the event ids, so re-running a seeded backfill overwrites
+            path = self.output_dir / partition / partition_file_name(rows)
+            os.makedirs(path.parent, exist_ok=True)
+            pq.write_table(
+                rows,
+                path,
+                row_group_size=self.row_group_size,
+                compression=self.compression,
+                use_dictionary=DICTIONARY_COLUMNS,
+            )
+            logger.info(f"Wrote {rows.num_rows} events to {path}")
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,141 @@
+"""
+Traffic shaping - time-varying intensity for event arrival rates
+
+Configured rates are averages; the profile scales them by hour of day, day of
+week and flash sales. Hourly and weekday profiles are normalized to a mean of
+1, so a full week still produces the configured number of events on average.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from data_generator.config import GeneratorConfig
+
+# Arrival timestamps are sampled per bin of this many seconds
+BIN_SECONDS = 60
+
+BUSINESS_HOURS = range(9, 18)
+NIGHT_HOURS = range(0, 7)
+NIGHT_MULTIPLIER = 0.25
+
+# Monday first; weekends are quieter by default
+DEFAULT_WEEKDAY_PROFILE = [1.0, 1.0, 1.0, 1.0, 1.1, 0.8, 0.8]
+
+
+@dataclass
+class FlashSale:
+    """A time window with boosted traffic"""
+
+    start: datetime
+    duration_minutes: float
+    multiplier: float = 5.0
+
+
+def _normalized(values: Sequence[float], length: int, name: str) -> np.ndarray:
+    array = np.asarray(values, dtype=np.float64)
+    if array.shape != (length,) or (array < 0).any() or array.sum() == 0:
+        raise ValueError(f"{name} must have {length} non-negative values, got {list(values)}")
+    return array / array.mean()
+
+
+class TrafficProfile:
+    """Intensity multiplier over time: hourly x weekday x flash sales"""
+
+    def __init__(
+        self,
+        hourly: Sequence[float],
+        weekday: Optional[Sequence[float]] = None,
+        flash_sales: Optional[List[FlashSale]] = None,
+    ):
+        """
+        Args:
+            hourly: 24 relative intensities (hour 0 first)
+            weekday: 7 relative intensities (Monday first)
+            flash_sales: Windows with extra multipliers
+        """
+        self.hourly = _normalized(hourly, 24, "hourly profile")
+        self.weekday = _normalized(weekday or DEFAULT_WEEKDAY_PROFILE, 7, "weekday profile")
+        self.flash_sales = flash_sales or []
+
+    @classmethod
+    def from_config(cls, config: GeneratorConfig) -> "TrafficProfile":
+        """Profile from config, defaulting to business-hours peaks and quiet nights"""
+        hourly = config.hourly_profile
+        if hourly is None:
+            hourly = [
+                (
+                    config.business_hours_multiplier
+                    if hour in BUSINESS_HOURS
+                    else NIGHT_MULTIPLIER if hour in NIGHT_HOURS else 1.0
+                )
+                for hour in range(24)
+            ]
+        return cls(hourly, config.weekday_profile, config.flash_sales)
+
+    @property
+    def max_intensity(self) -> float:
+        """Upper bound of the multiplier (as if every flash sale overlapped the peak hour)"""
+        peak = float(self.hourly.max() * self.weekday.max())
+        for sale in self.flash_sales:
+            peak *= max(sale.multiplier, 1.0)
+        return peak
+
+    def intensity(self, timestamps: np.ndarray) -> np.ndarray:
+        """Multiplier for each datetime64 timestamp"""
+        timestamps = np.asarray(timestamps, dtype="datetime64[us]")
+        hours = timestamps.astype("datetime64[h]").astype(np.int64)
+        days = timestamps.astype("datetime64[D]").astype(np.int64)
+        # 1970-01-01 was a Thursday (index 3 with Monday = 0)
+        result = self.hourly[hours % 24] * self.weekday[(days + 3) % 7]
+
+        for sale in self.flash_sales:
+            start = np.datetime64(sale.start, "us")
+            end = start + np.timedelta64(int(sale.duration_minutes * 60e6), "us")
+            result = np.where(
+                (timestamps >= start) & (timestamps < end), result * sale.multiplier, result
+            )
+        return result
+
+    def intensity_at(self, moment: datetime) -> float:
+        """Multiplier at one point in time"""
+        return float(self.intensity(np.array([np.datetime64(moment, "us")]))[0])
+
+    def sample_timestamps(
+        self,
+        rng: np.random.Generator,
+        start_time: datetime,
+        duration_seconds: float,
+        rate: float,
+    ) -> np.ndarray:
+        """
+        Draw sorted arrival times from the non-homogeneous Poisson process
+
+        The window is split into bins with constant intensity; the event count
+        is Poisson, each event picks a bin by inverse CDF of the expected
+        counts and a uniform offset inside it.
+
+        Args:
+            rng: Random generator
+            start_time: Window start
+            duration_seconds: Window length
+            rate: Average events per second before shaping
+
+        Returns:
+            Sorted datetime64[us] timestamps
+        """
+        start = np.datetime64(start_time, "us")
+        edges = np.arange(0, duration_seconds, BIN_SECONDS, dtype=np.float64)
+        widths = np.minimum(BIN_SECONDS, duration_seconds - edges)
+        bin_starts = start + (edges * 1e6).astype("timedelta64[us]")
+
+        expected = rate * widths * self.intensity(bin_starts)
+        total = expected.sum()
+        n = int(rng.poisson(total)) if total > 0 else 0
+
+        cdf = np.cumsum(expected) / total if total > 0 else expected
+        bins = np.minimum(np.searchsorted(cdf, rng.random(n), side="right"), len(edges) - 1)
+        offsets = np.sort(edges[bins] + rng.random(n) * widths[bins])
+        return start + (offsets * 1e6).astype("timedelta64[us]")
@@ -4,7 +4,7 @@ Generate synthetic user data
 
 import random
 from datetime import datetime, timedelta
-from typing import List
+from typing import List, Optional
 from dataclasses import dataclass
 
 
@@ -26,8 +26,14 @@ class UserGenerator:
     TIERS = ["bronze", "silver", "gold", "platinum"]
     TIER_WEIGHTS = [0.5, 0.3, 0.15, 0.05]  # Most users are bronze
 
-    def __init__(self, total_users: int = 1000):
+    def __init__(self, total_users: int = 1000, rng: Optional[random.Random] = None):
+        """
+        Args:
+            total_users: Number of users to generate
+            rng: Random source (a private one is created if omitted)
+        """
         self.total_users = total_users
+        self.rng = rng or random.Random()
         self.users: List[UserProfile] = []
         self._generate_users()
 
@@ -39,16 +45,16 @@ class UserGenerator:
             user_id = f"user_{i:06d}"
 
             # Signup date distributed over last year
-            days_ago = random.randint(0, 365)
+            days_ago = self.rng.randint(0, 365)
             signup_date = base_date + timedelta(days=days_ago)
 
             # Country distribution (weighted towards US)
-            country = random.choices(
+            country = self.rng.choices(
                 self.COUNTRIES, weights=[0.4, 0.15, 0.1, 0.1, 0.08, 0.05, 0.05, 0.04, 0.02, 0.01]
             )[0]
 
             # Tier distribution
-            tier = random.choices(self.TIERS, weights=self.TIER_WEIGHTS)[0]
+            tier = self.rng.choices(self.TIERS, weights=self.TIER_WEIGHTS)[0]
 
             self.users.append(
                 UserProfile(user_id=user_id, signup_date=signup_date, country=country, tier=tier)
@@ -56,7 +62,7 @@ class UserGenerator:
 
     def get_random_user(self) -> UserProfile:
         """Get a random user"""
-        return random.choice(self.users)
+        return self.rng.choice(self.users)
 
     def get_active_users(self, count: int) -> List[UserProfile]:
         """Get random active users (weighted by tier - higher tier = more active)"""
@@ -66,4 +72,4 @@ class UserGenerator:
             tier_weight = {"platinum": 4, "gold": 3, "silver": 2, "bronze": 1}[user.tier]
             weights.append(tier_weight)
 
-        return random.choices(self.users, weights=weights, k=count)
+        return self.rng.choices(self.users, weights=weights, k=count)
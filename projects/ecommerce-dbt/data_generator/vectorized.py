@@ -0,0 +1,328 @@
+"""
+Vectorized (NumPy) event generation engine
+
+Generates whole batches as columns - timestamps, user/product indices,
+quantities, statuses, amounts and IDs - with the same distributions as
+EventGenerator. Conversion to dicts or model objects happens only at the edge.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from shared.models.order import Order, OrderStatus
+from shared.models.page_view import PageView
+from shared.models.inventory import Inventory
+
+from data_generator.config import GeneratorConfig
+from data_generator.user_generator import UserGenerator
+from data_generator.product_generator import ProductGenerator
+from data_generator.sessions import SessionManager
+from data_generator.traffic import TrafficProfile
+
+# One generated stream as named columns of equal length
+Columns = Dict[str, np.ndarray]
+
+_HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+
+
+def format_ids(prefix: str, values: np.ndarray, width: int = 12) -> np.ndarray:
+    """Format integers as '{prefix}{hex}' strings without a Python-level loop"""
+    shifts = np.arange(4 * (width - 1), -1, -4, dtype=np.int64)
+    nibbles = (values.astype(np.int64)[:, None] >> shifts) & 0xF
+    prefix_bytes = np.frombuffer(prefix.encode("ascii"), dtype=np.uint8)
+
+    chars = np.empty((len(values), len(prefix_bytes) + width), dtype=np.uint8)
+    chars[:, : len(prefix_bytes)] = prefix_bytes
+    chars[:, len(prefix_bytes) :] = _HEX_DIGITS[nibbles]
+    return chars.view(f"S{chars.shape[1]}").ravel().astype(str)
+
+
+class VectorizedEventGenerator:
+    """Generate columnar batches of orders, page views and inventory changes"""
+
+    # Distributions mirror EventGenerator
+    QUANTITIES = np.array([1, 2, 3, 4, 5])
+    QUANTITY_WEIGHTS = np.array([0.6, 0.2, 0.1, 0.05, 0.05])
+
+    STATUSES = np.array(
+        [
+            OrderStatus.PENDING.value,
+            OrderStatus.CONFIRMED.value,
+            OrderStatus.SHIPPED.value,
+            OrderStatus.DELIVERED.value,
+            OrderStatus.CANCELLED.value,
+        ]
+    )
+    STATUS_WEIGHTS = np.array([0.05, 0.15, 0.20, 0.55, 0.05])
+
+    # homepage, category, product, cart, checkout
+    PAGE_TYPE_WEIGHTS = np.array([0.3, 0.3, 0.3, 0.05, 0.05])
+    PAGE_DURATION_RANGES = np.array(
+        [[5.0, 30.0], [2.0, 15.0], [10.0, 120.0], [2.0, 15.0], [2.0, 15.0]]
+    )
+    HOMEPAGE, CATEGORY, PRODUCT, CART, CHECKOUT = range(5)
+
+    WAREHOUSES = np.array(["WH-001", "WH-002", "WH-003"])
+
+    # spawn_key tag for the per-date active user sets (shared by all shards of a run)
+    ACTIVE_USERS_KEY = 0x61637469
+
+    def __init__(
+        self,
+        config: GeneratorConfig,
+        user_gen: UserGenerator,
+        product_gen: ProductGenerator,
+        initial_stock: Optional[Dict[str, int]] = None,
+        seed: Optional[Union[int, np.random.SeedSequence]] = None,
+    ):
+        """
+        Args:
+            config: Generator configuration
+            user_gen: User catalog (shared with EventGenerator)
+            product_gen: Product catalog (shared with EventGenerator)
+            initial_stock: product_id -> stock (defaults to random 50-500)
+            seed: Seed or SeedSequence for reproducible output (defaults to config.seed)
+        """
+        self.config = config
+        if seed is None:
+            seed = config.seed
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        # Inventory draws from its own stream so stock can be replayed without
+        # generating orders and page views (see data_generator.parallel)
+        self._root_entropy = seed.entropy
+        events_seed, inventory_seed = seed.spawn(2)
+        self.rng = np.random.default_rng(events_seed)
+        self.inventory_rng = np.random.default_rng(inventory_seed)
+
+        self.user_ids = np.array([u.user_id for u in user_gen.users])
+        self.product_ids = np.array([p.product_id for p in product_gen.products])
+        self.prices = np.array([p.price for p in product_gen.products])
+        popularity = np.cumsum(np.asarray(product_gen.popularity_weights, dtype=np.float64))
+        self.popularity_cdf = popularity / popularity[-1]
+        self.category_paths = np.array(
+            [f"/category/{c.lower().replace(' ', '-')}" for c in config.categories]
+        )
+
+        if initial_stock is not None:
+            self.stock = np.array([initial_stock.get(pid, 100) for pid in self.product_ids])
+        else:
+            self.stock = self.inventory_rng.integers(50, 501, size=len(self.product_ids))
+
+        self.traffic = TrafficProfile.from_config(config) if config.traffic_shaping else None
+        self._active_users: Dict[np.datetime64, np.ndarray] = {}
+
+        self.sessions = SessionManager(
+            len(self.user_ids),
+            timeout_seconds=config.session_timeout_seconds,
+            exit_probability=config.session_exit_probability,
+            rng=self.rng,
+        )
+
+    def _timestamps(
+        self,
+        start_time: datetime,
+        duration_seconds: float,
+        n: int,
+        rng: Optional[np.random.Generator] = None,
+    ) -> np.ndarray:
+        """Sorted uniform timestamps over the window, as datetime64[us]"""
+        rng = rng or self.rng
+        offsets_us = np.sort(rng.uniform(0, duration_seconds * 1e6, size=n))
+        return np.datetime64(start_time, "us") + offsets_us.astype("timedelta64[us]")
+
+    def _arrivals(
+        self,
+        start_time: datetime,
+        duration_seconds: float,
+        rate: float,
+        n: Optional[int],
+    ) -> np.ndarray:
+        """Event timestamps: shaped by the traffic profile unless a count is forced"""
+        if n is not None:
+            return self._timestamps(start_time, duration_seconds, n)
+        if self.traffic is None:
+            return self._timestamps(start_time, duration_seconds, int(rate * duration_seconds))
+        return self.traffic.sample_timestamps(self.rng, start_time, duration_seconds, rate)
+
+    def active_users(self, day: np.datetime64) -> np.ndarray:
+        """
+        Indices of the users active on a date (config.active_users_per_day of them)
+
+        Derived from the root seed and the date, so every shard and stream of a
+        run agrees on who is active on a given day.
+        """
+        day = np.datetime64(day, "D")
+        active = self._active_users.get(day)
+        if active is None:
+            total = len(self.user_ids)
+            size = min(self.config.active_users_per_day or total, total)
+            seed = np.random.SeedSequence(
+                self._root_entropy, spawn_key=(self.ACTIVE_USERS_KEY, int(day.astype(np.int64)))
+            )
+            active = np.random.default_rng(seed).choice(total, size=size, replace=False)
+            if len(self._active_users) > 7:
+                self._active_users.clear()
+            self._active_users[day] = active
+        return active
+
+    def _draw_users(self, timestamps: np.ndarray) -> np.ndarray:
+        """User index per event, drawn from the active users of the event's date"""
+        days = timestamps.astype("datetime64[D]")
+        user_idx = np.empty(len(timestamps), dtype=np.int64)
+        for day in np.unique(days):
+            mask = days == day
+            active = self.active_users(day)
+            user_idx[mask] = active[self.rng.integers(0, len(active), size=int(mask.sum()))]
+        return user_idx
+
+    def _random_ids(self, prefix: str, n: int) -> np.ndarray:
+        return format_ids(prefix, self.rng.integers(0, 2**48, size=n, dtype=np.int64))
+
+    def generate_orders(
+        self, start_time: datetime, duration_seconds: float, n: Optional[int] = None
+    ) -> Columns:
+        timestamps = self._arrivals(start_time, duration_seconds, self.config.orders_per_second, n)
+        n = len(timestamps)
+        product_idx = self.rng.integers(0, len(self.product_ids), size=n)
+        quantity = self.rng.choice(self.QUANTITIES, size=n, p=self.QUANTITY_WEIGHTS)
+
+        return {
+            "order_id": self._random_ids("order_", n),
+            "user_id": self.user_ids[self._draw_users(timestamps)],
+            "product_id": self.product_ids[product_idx],
+            "timestamp": timestamps,
+            "amount": np.round(self.prices[product_idx] * quantity, 2),
+            "status": self.rng.choice(self.STATUSES, size=n, p=self.STATUS_WEIGHTS),
+            "quantity": quantity,
+        }
+
+    def generate_page_views(
+        self, start_time: datetime, duration_seconds: float, n: Optional[int] = None
+    ) -> Columns:
+        timestamps = self._arrivals(
+            start_time, duration_seconds, self.config.page_views_per_second, n
+        )
+        n = len(timestamps)
+        user_idx = self._draw_users(timestamps)
+        page_type = self.rng.choice(5, size=n, p=self.PAGE_TYPE_WEIGHTS)
+
+        epoch_seconds = timestamps.astype(np.int64) / 1e6
+        session_id = format_ids("session_", self.sessions.assign(user_idx, epoch_seconds))
+
+        has_product = page_type >= self.PRODUCT
+        product_id = np.full(n, None, dtype=object)
+        popular_idx = np.searchsorted(self.popularity_cdf, self.rng.random(int(has_product.sum())))
+        product_id[has_product] = self.product_ids[popular_idx]
+
+        page_url = np.full(n, "/", dtype=object)
+        is_category = page_type == self.CATEGORY
+        page_url[is_category] = self.rng.choice(self.category_paths, size=int(is_category.sum()))
+        is_product = page_type == self.PRODUCT
+        page_url[is_product] = np.char.add("/product/", product_id[is_product].astype(str))
+        page_url[page_type == self.CART] = "/cart"
+        page_url[page_type == self.CHECKOUT] = "/checkout"
+
+        low, high = self.PAGE_DURATION_RANGES[page_type].T
+
+        return {
+            "view_id": self._random_ids("view_", n),
+            "user_id": self.user_ids[user_idx],
+            "product_id": product_id,
+            "timestamp": timestamps,
+            "session_id": session_id,
+            "page_url": page_url,
+            "duration_seconds": np.round(self.rng.uniform(low, high), 2),
+        }
+
+    def generate_inventory_changes(
+        self, start_time: datetime, duration_seconds: float, n: Optional[int] = None
+    ) -> Columns:
+        rng = self.inventory_rng
+        if n is None:
+            n = int(self.config.inventory_updates_per_second * duration_seconds)
+        product_idx = rng.integers(0, len(self.product_ids), size=n)
+
+        # 10% large restocks, otherwise small adjustments
+        restock = rng.random(n) < 0.1
+        stock_change = np.where(
+            restock,
+            rng.integers(50, 201, size=n),
+            rng.integers(-20, 11, size=n),
+        )
+
+        # Clamped running stock is order-dependent; n is small (~0.1/s) so loop
+        current_stock = np.empty(n, dtype=np.int64)
+        stock = self.stock
+        for i, (p, change) in enumerate(zip(product_idx.tolist(), stock_change.tolist())):
+            stock[p] = max(0, stock[p] + change)
+            current_stock[i] = stock[p]
+
+        return {
+            "product_id": self.product_ids[product_idx],
+            "timestamp": self._timestamps(start_time, duration_seconds, n, rng),
+            "stock_change": stock_change,
+            "current_stock": current_stock,
+            "warehouse_id": rng.choice(self.WAREHOUSES, size=n),
+        }
+
+    def generate_batch(
+        self, duration_seconds: int = 60, start_time: Optional[datetime] = None
+    ) -> Tuple[Columns, Columns, Columns]:
+        """
+        Generate a batch of events over a time period as columns
+
+        Returns:
+            Tuple of (orders, page_views, inventory_changes) columns, each sorted by time
+        """
+        if start_time is None:
+            start_time = datetime.now()
+
+        return (
+            self.generate_orders(start_time, duration_seconds),
+            self.generate_page_views(start_time, duration_seconds),
+            self.generate_inventory_changes(start_time, duration_seconds),
+        )
+
+
+def to_records(columns: Columns) -> List[Dict]:
+    """Convert columns to JSON-ready dicts (timestamps as ISO strings)"""
+    names = list(columns)
+    values = []
+    for name in names:
+        column = columns[name]
+        if np.issubdtype(column.dtype, np.datetime64):
+            column = np.datetime_as_string(column, unit="us")
+        values.append(column.tolist())
+    return [dict(zip(names, row)) for row in zip(*values)]
+
+
+def to_orders(columns: Columns) -> List[Order]:
+    return [
+        Order(
+            order_id=r["order_id"],
+            user_id=r["user_id"],
+            product_id=r["product_id"],
+            timestamp=datetime.fromisoformat(r["timestamp"]),
+            amount=r["amount"],
+            status=OrderStatus(r["status"]),
+            quantity=r["quantity"],
+        )
+        for r in to_records(columns)
+    ]
+
+
+def to_page_views(columns: Columns) -> List[PageView]:
+    records = to_records(columns)
+    for r in records:
+        r["timestamp"] = datetime.fromisoformat(r["timestamp"])
+    return [PageView(**r) for r in records]
+
+
+def to_inventory(columns: Columns) -> List[Inventory]:
+    records = to_records(columns)
+    for r in records:
+        r["timestamp"] = datetime.fromisoformat(r["timestamp"])
+    return [Inventory(**r) for r in records]
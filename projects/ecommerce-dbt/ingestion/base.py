@@ -17,6 +17,7 @@ from functools import wraps
 
 from shared.messaging import RedpandaConsumer, RedpandaProducer
 from shared.database import PostgreSQLConnectionPool
+from shared.cache import IdempotencyFilter
 from config import settings
 
 
@@ -47,13 +48,21 @@ def retry_with_backoff(retries=3, backoff_in_seconds=1):
 class BaseIngestionPipeline(ABC):
     """Base class for all ingestion pipelines"""
 
-    def __init__(self, topic: str, consumer_group: str, batch_size: int = 100):
+    def __init__(
+        self,
+        topic: str,
+        consumer_group: str,
+        batch_size: int = 100,
+        dedup_filter: Optional[IdempotencyFilter] = None,
+    ):
         self.topic = topic
         self.consumer_group = consumer_group
         self.batch_size = batch_size
         self.batch: List[Dict[str, Any]] = []
+        self.batch_offsets: List[int] = []  # Kafka offset of each batch item
         self.consumer: Optional[RedpandaConsumer] = None
         self.dlq_producer: Optional[RedpandaProducer] = None
+        self.dedup_filter = dedup_filter
 
     @abstractmethod
     def _insert_batch(self):
@@ -66,6 +75,15 @@ class BaseIngestionPipeline(ABC):
         """
         pass
 
+    def _dedup_key(self, record: Dict[str, Any]) -> Optional[str]:
+        """Idempotency key of a record; pipelines without one are never deduplicated"""
+        return None
+
+    def _clear_batch(self):
+        """Clear the batch after a successful insert"""
+        self.batch.clear()
+        self.batch_offsets.clear()
+
     def _send_to_dlq(self, event: Dict[str, Any], error: Exception):
         """Send a failed event to the Dead Letter Queue"""
         try:
@@ -104,9 +122,10 @@ class BaseIngestionPipeline(ABC):
             try:
                 logger.debug(f"Processing message from {self.topic}")
                 self.batch.append(value)
+                self.batch_offsets.append(offset)
 
                 if len(self.batch) >= self.batch_size:
-                    self._insert_batch_with_retry()
+                    self._flush_batch()
             except Exception as e:
                 logger.error(f"Error processing message from {self.topic}: {e}")
                 self._send_to_dlq(value, e)
@@ -117,11 +136,41 @@ class BaseIngestionPipeline(ABC):
             # Insert any remaining items in batch
             if self.batch:
                 try:
-                    self._insert_batch_with_retry()
+                    self._flush_batch()
                 except Exception as e:
                     logger.error(f"Failed to insert final batch: {e}")
                     # In a real scenario, we might want to DLQ the whole batch or dump to disk
 
+    def _flush_batch(self):
+        """Drop already-written records (if dedup is enabled) and insert the rest"""
+        if not self.dedup_filter:
+            self._insert_batch_with_retry()
+            return
+
+        self._drop_known_records()
+        keys = [key for key in map(self._dedup_key, self.batch) if key]
+        self._insert_batch_with_retry()
+        # Mark only after the insert committed, so a crash in between never loses records
+        self.dedup_filter.mark(keys)
+
+    def _drop_known_records(self):
+        """Remove records whose idempotency key is already marked in Redis"""
+        keys = [self._dedup_key(record) for record in self.batch]
+        checked = [key for key in keys if key]
+        known = {key for key, seen in zip(checked, self.dedup_filter.seen(checked)) if seen}
+        if not known:
+            return
+
+        has_offsets = len(self.batch_offsets) == len(self.batch)
+        kept = [i for i, key in enumerate(keys) if key not in known]
+        self.batch = [self.batch[i] for i in kept]
+        if has_offsets:
+            self.batch_offsets = [self.batch_offsets[i] for i in kept]
+        logger.info(
+            f"Dropped {len(keys) - len(kept)} already-ingested records from {self.topic} "
+            f"(dedup stats: {self.dedup_filter.stats()})"
+        )
+
     @retry_with_backoff(retries=3, backoff_in_seconds=1)
     def _insert_batch_with_retry(self):
         """Wrapper for _insert_batch with retry logic"""
@@ -136,7 +185,7 @@ class BaseIngestionPipeline(ABC):
         """Stop the pipeline"""
         if self.batch:
             try:
-                self._insert_batch_with_retry()
+                self._flush_batch()
             except Exception as e:
                 logger.error(f"Error flushing batch on stop: {e}")
 
@@ -3,6 +3,7 @@ Kafka consumer pipeline for ingesting events into data warehouse
 """
 
 from datetime import datetime
+from typing import Any, Dict, List, Optional
 from loguru import logger
 
 # Add foundation to path
@@ -15,6 +16,7 @@ sys.path.insert(0, str(foundation_path))
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from shared.database import get_db_connection  # noqa: E402
+from shared.cache import IdempotencyFilter  # noqa: E402
 from config import settings  # noqa: E402
 from ingestion.base import BaseIngestionPipeline, retry_with_backoff  # noqa: E402
 
@@ -22,11 +24,23 @@ from ingestion.base import BaseIngestionPipeline, retry_with_backoff  # noqa: E4
 class OrdersIngestionPipeline(BaseIngestionPipeline):
     """Pipeline to ingest orders from Kafka to data warehouse"""
 
-    def __init__(self, consumer_group: str = "orders_ingestion", batch_size: int = 100):
+    def __init__(
+        self,
+        consumer_group: str = "orders_ingestion",
+        batch_size: int = 100,
+        dedup_filter: Optional[IdempotencyFilter] = None,
+    ):
         super().__init__(
-            topic=settings.KAFKA_TOPIC_ORDERS, consumer_group=consumer_group, batch_size=batch_size
+            topic=settings.KAFKA_TOPIC_ORDERS,
+            consumer_group=consumer_group,
+            batch_size=batch_size,
+            dedup_filter=dedup_filter,
         )
 
+    def _dedup_key(self, record: Dict[str, Any]) -> Optional[str]:
+        # Status is part of the key: a status change is an update, not a replay
+        return f"{record['order_id']}:{record['status']}"
+
     @retry_with_backoff(retries=3, backoff_in_seconds=1)
     def _insert_batch(self):
         """Insert batch of orders into PostgreSQL"""
@@ -62,19 +76,28 @@ class OrdersIngestionPipeline(BaseIngestionPipeline):
 
                 cur.executemany(insert_query, values)
                 logger.info(f"Inserted {len(self.batch)} orders into PostgreSQL")
-                self.batch.clear()
+                self._clear_batch()
 
 
 class PageViewsIngestionPipeline(BaseIngestionPipeline):
     """Pipeline to ingest page views from Kafka to data warehouse"""
 
-    def __init__(self, consumer_group: str = "page_views_ingestion", batch_size: int = 100):
+    def __init__(
+        self,
+        consumer_group: str = "page_views_ingestion",
+        batch_size: int = 100,
+        dedup_filter: Optional[IdempotencyFilter] = None,
+    ):
         super().__init__(
             topic=settings.KAFKA_TOPIC_PAGE_VIEWS,
             consumer_group=consumer_group,
             batch_size=batch_size,
+            dedup_filter=dedup_filter,
         )
 
+    def _dedup_key(self, record: Dict[str, Any]) -> Optional[str]:
+        return record["view_id"]
+
     @retry_with_backoff(retries=3, backoff_in_seconds=1)
     def _insert_batch(self):
         """Insert batch of page views into PostgreSQL"""
@@ -107,12 +130,30 @@ class PageViewsIngestionPipeline(BaseIngestionPipeline):
 
                 cur.executemany(insert_query, values)
                 logger.info(f"Inserted {len(self.batch)} page views into PostgreSQL")
-                self.batch.clear()
+                self._clear_batch()
 
 
 class InventoryIngestionPipeline(BaseIngestionPipeline):
     """Pipeline to ingest inventory changes from Kafka to data warehouse"""
 
+    # Only moves forward: older or replayed changes never overwrite newer stock
+    UPSERT_STOCK_QUERY = """
+        INSERT INTO product_stock_current (
+            product_id, current_stock, warehouse_id, last_event_at, last_offset
+        )
+        VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT (product_id) DO UPDATE SET
+            current_stock = EXCLUDED.current_stock,
+            warehouse_id = EXCLUDED.warehouse_id,
+            last_event_at = EXCLUDED.last_event_at,
+            last_offset = EXCLUDED.last_offset,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE (EXCLUDED.last_event_at, COALESCE(EXCLUDED.last_offset, -1)) >= (
+            product_stock_current.last_event_at,
+            COALESCE(product_stock_current.last_offset, -1)
+        )
+    """
+
     def __init__(self, consumer_group: str = "inventory_ingestion", batch_size: int = 100):
         super().__init__(
             topic=settings.KAFKA_TOPIC_INVENTORY,
@@ -148,5 +189,36 @@ class InventoryIngestionPipeline(BaseIngestionPipeline):
                 ]
 
                 cur.executemany(insert_query, values)
-                logger.info(f"Inserted {len(self.batch)} inventory changes into PostgreSQL")
-                self.batch.clear()
+
+                # Same transaction: the current-stock table never diverges from the log
+                stock_values = self._latest_stock_per_product(values)
+                cur.executemany(self.UPSERT_STOCK_QUERY, stock_values)
+
+                logger.info(
+                    f"Inserted {len(self.batch)} inventory changes into PostgreSQL "
+                    f"({len(stock_values)} products updated)"
+                )
+                self._clear_batch()
+
+    def _latest_stock_per_product(self, values: List[tuple]) -> List[tuple]:
+        """
+        Keep only the latest change per product, ordered by (event timestamp, offset).
+
+        Batches assembled outside the consumer have no offsets; their position in
+        the batch (arrival order) is used as the tie-breaker instead.
+        """
+        has_offsets = len(self.batch_offsets) == len(values)
+        latest: Dict[str, tuple] = {}
+
+        for position, (product_id, timestamp, _, current_stock, warehouse_id) in enumerate(values):
+            offset = self.batch_offsets[position] if has_offsets else None
+            sort_key = (timestamp, offset if has_offsets else position)
+            previous = latest.get(product_id)
+            if previous is None or sort_key >= previous[0]:
+                latest[product_id] = (
+                    sort_key,
+                    (product_id, current_stock, warehouse_id, timestamp, offset),
+                )
+
+        # Stable lock order across concurrent consumers
+        return sorted((row for _, row in latest.values()), key=lambda row: row[0])
@@ -20,6 +20,8 @@ from ingestion.kafka_consumer import (  # noqa: E402
     PageViewsIngestionPipeline,
     InventoryIngestionPipeline,
 )
+from shared.cache import IdempotencyFilter, RedisClientPool  # noqa: E402
+from config import settings  # noqa: E402
 
 # Global pipeline instances
 pipelines = []
@@ -36,10 +38,25 @@ def signal_handler(sig, frame):
     sys.exit(0)
 
 
-def run_pipeline(pipeline_class, name: str):
+def make_dedup_filter(topic: str):
+    """Redis idempotency filter for a topic, or None when dedup is disabled"""
+    if not settings.INGESTION_DEDUP_MODE:
+        return None
+    RedisClientPool.initialize(settings=settings)
+    return IdempotencyFilter(
+        namespace=f"dedup:{topic}",
+        ttl_seconds=settings.INGESTION_DEDUP_TTL_SECONDS,
+        mode=settings.INGESTION_DEDUP_MODE,
+    )
+
+
+def run_pipeline(pipeline_class, name: str, dedup_topic: str = None):
     """Run a single pipeline in a thread"""
     try:
-        pipeline = pipeline_class()
+        kwargs = {}
+        if dedup_topic:
+            kwargs["dedup_filter"] = make_dedup_filter(dedup_topic)
+        pipeline = pipeline_class(**kwargs)
         pipelines.append(pipeline)
         logger.info(f"Starting {name} pipeline...")
         pipeline.start()
@@ -59,8 +76,16 @@ if __name__ == "__main__":
 
     # Start pipelines in separate threads
     threads = [
-        Thread(target=run_pipeline, args=(OrdersIngestionPipeline, "Orders"), daemon=True),
-        Thread(target=run_pipeline, args=(PageViewsIngestionPipeline, "Page Views"), daemon=True),
+        Thread(
+            target=run_pipeline,
+            args=(OrdersIngestionPipeline, "Orders", settings.KAFKA_TOPIC_ORDERS),
+            daemon=True,
+        ),
+        Thread(
+            target=run_pipeline,
+            args=(PageViewsIngestionPipeline, "Page Views", settings.KAFKA_TOPIC_PAGE_VIEWS),
+            daemon=True,
+        ),
         Thread(target=run_pipeline, args=(InventoryIngestionPipeline, "Inventory"), daemon=True),
     ]
 
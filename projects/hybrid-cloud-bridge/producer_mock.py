@@ -10,17 +10,14 @@ TOPIC = 'events-stream'
 
 import uuid
 
-# User Database to maintain consistency (User 5 always comes from US)
-USER_DB = {}
-
 def get_user_profile(user_id):
-    if user_id not in USER_DB:
-        USER_DB[user_id] = {
-            'country': random.choice(['US', 'CA', 'UK', 'DE', 'FR', 'BR', 'JP']),
-            'device_type': random.choice(['mobile', 'desktop', 'tablet']),
-            'subscription_tier': random.choice(['free', 'premium', 'enterprise'])
-        }
-    return USER_DB[user_id]
+    """Profile derived from the user id, so it is consistent without storing every user"""
+    rng = random.Random(user_id)
+    return {
+        'country': rng.choice(['US', 'CA', 'UK', 'DE', 'FR', 'BR', 'JP']),
+        'device_type': rng.choice(['mobile', 'desktop', 'tablet']),
+        'subscription_tier': rng.choice(['free', 'premium', 'enterprise'])
+    }
 
 def generate_session_events(base_timestamp):
     """Generates a sequence of events for a single user session"""
@@ -6,106 +6,436 @@ Uses foundation/shared components for consistency
 import os
 import sys
 import tempfile
+from contextlib import ExitStack
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, List
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
-import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from loguru import logger
+from pydantic import BaseModel, Field
 
 # Add foundation to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../..")))
 
-from foundation.shared.config.settings import Settings
-from foundation.shared.messaging import RedpandaConsumer, BatchProcessor
-from foundation.shared.storage import GCSClient
+from foundation.shared.config.settings import Settings  # noqa: E402
+from foundation.shared.messaging import (  # noqa: E402
+    BatchProcessor,
+    MemoryBudget,
+    OffsetTracker,
+    RedpandaConsumer,
+    RedpandaProducer,
+    SpillLog,
+)
+from foundation.shared.models.arrow_convert import records_to_table  # noqa: E402
+from foundation.shared.models.bridge_event import (  # noqa: E402
+    ALLOWED_VALUES,
+    BRIDGE_EVENT_SCHEMA,
+    DICTIONARY_COLUMNS,
+    REQUIRED_COLUMNS,
+    VALUE_RANGES,
+)
+from foundation.shared.models.ecommerce_events import (  # noqa: E402
+    INVENTORY_DICTIONARY_COLUMNS,
+    INVENTORY_REQUIRED_COLUMNS,
+    INVENTORY_SCHEMA,
+    ORDER_ALLOWED_VALUES,
+    ORDER_DICTIONARY_COLUMNS,
+    ORDER_REQUIRED_COLUMNS,
+    ORDER_SCHEMA,
+    PAGE_VIEW_DICTIONARY_COLUMNS,
+    PAGE_VIEW_REQUIRED_COLUMNS,
+    PAGE_VIEW_SCHEMA,
+)
+from foundation.shared.storage import (  # noqa: E402
+    CommitLog,
+    GCSClient,
+    LocalStorageClient,
+    StorageClient,
+    Upload,
+)
+from foundation.shared.storage.commit_log import (  # noqa: E402
+    OFFSETS_METADATA_KEY,
+    OffsetRanges,
+    offset_ranges,
+    ranges_to_json,
+    ranges_token,
+)
+from foundation.shared.storage.layout import (  # noqa: E402
+    partition_by_event_time,
+    partition_file_name,
+)
+
+EVENTS_TOPIC = "events-stream"
+
+# Clickstream files land under raw/dt=.../hour=.../ (see shared.storage.layout)
+RAW_PREFIX = "raw/"
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    """How messages of one schema are validated and laid out"""
+
+    schema: pa.Schema
+    # Event-time column (epoch seconds or an Arrow timestamp) used for partitioning
+    time_column: str
+    # Columns that together identify a row; batches without offsets are named
+    # after a digest of these
+    key_columns: Tuple[str, ...]
+    required: Sequence[str] = ()
+    allowed_values: Dict[str, Sequence[Any]] = field(default_factory=dict)
+    value_ranges: Dict[str, Tuple[Any, Any]] = field(default_factory=dict)
+    dictionary_columns: Sequence[str] = ()
+
+
+# Schema names usable in routes
+TABLE_SPECS = {
+    "bridge_event": TableSpec(
+        BRIDGE_EVENT_SCHEMA,
+        "timestamp",
+        ("event_id",),
+        REQUIRED_COLUMNS,
+        ALLOWED_VALUES,
+        VALUE_RANGES,
+        DICTIONARY_COLUMNS,
+    ),
+    "order": TableSpec(
+        ORDER_SCHEMA,
+        "timestamp",
+        ("order_id",),
+        ORDER_REQUIRED_COLUMNS,
+        ORDER_ALLOWED_VALUES,
+        dictionary_columns=ORDER_DICTIONARY_COLUMNS,
+    ),
+    "page_view": TableSpec(
+        PAGE_VIEW_SCHEMA,
+        "timestamp",
+        ("view_id",),
+        PAGE_VIEW_REQUIRED_COLUMNS,
+        dictionary_columns=PAGE_VIEW_DICTIONARY_COLUMNS,
+    ),
+    "inventory": TableSpec(
+        INVENTORY_SCHEMA,
+        "timestamp",
+        # Inventory changes carry no id of their own
+        ("product_id", "timestamp", "warehouse_id"),
+        INVENTORY_REQUIRED_COLUMNS,
+        dictionary_columns=INVENTORY_DICTIONARY_COLUMNS,
+    ),
+}
+
+
+class Route(BaseModel):
+    """A topic, the schema its messages follow and where its files land"""
+
+    topic: str
+    schema_name: str = Field(alias="schema")
+    prefix: str
+    # Defaults to '<topic>-dlq'
+    dlq_topic: Optional[str] = None
+    # Flush policy overrides (the bridge-wide settings apply otherwise)
+    batch_size: Optional[int] = None
+    batch_timeout_seconds: Optional[int] = None
+    target_file_bytes: Optional[int] = None
+    max_batch_bytes: Optional[int] = None
+
+    @property
+    def spec(self) -> TableSpec:
+        if self.schema_name not in TABLE_SPECS:
+            raise ValueError(
+                f"Unknown schema {self.schema_name!r} for topic {self.topic}, "
+                f"expected one of {sorted(TABLE_SPECS)}"
+            )
+        return TABLE_SPECS[self.schema_name]
+
+
+def with_offset_ranges(table: pa.Table, ranges: OffsetRanges) -> pa.Table:
+    """Attach the batch's offset ranges as Parquet key-value metadata"""
+    metadata = dict(table.schema.metadata or {})
+    metadata[OFFSETS_METADATA_KEY.encode("utf-8")] = ranges_to_json(ranges).encode("utf-8")
+    return table.replace_schema_metadata(metadata)
 
 
 class BridgeSettings(Settings):
     """Bridge-specific settings extending foundation"""
     GCS_BUCKET_NAME: str = ""
     GCS_PROJECT_ID: str = ""
-    BATCH_SIZE: int = 5000
+    # Item count is only a backstop; batches are normally cut by bytes or time
+    BATCH_SIZE: int = 500000
     BATCH_TIMEOUT_SECONDS: int = 60
+    # Target Parquet bytes per flushed file. Parquet is 3-10x smaller than the
+    # buffered message bytes, so a file reaches this size only if its topic can
+    # buffer that many times more within MEMORY_BUDGET_BYTES (shared by all
+    # routes); otherwise the budget flushes first and files come out smaller.
+    # Compaction merges them up to COMPACTED_FILE_BYTES.
+    TARGET_FILE_BYTES: int = 32 * 1024 * 1024
+    # Hard cap on buffered message bytes per batch (0 = no cap)
+    MAX_BATCH_BYTES: int = 0
+    # Buffered message bytes across processors (memory peaks at about twice this
+    # while batches are in flight); caps what TARGET_FILE_BYTES can reach
+    MEMORY_BUDGET_BYTES: int = 128 * 1024 * 1024
+    # File size the compaction job merges small files into (what BigQuery likes)
+    COMPACTED_FILE_BYTES: int = 128 * 1024 * 1024
+    # Parquet is encoded in memory up to this size, then spills to a temp file
+    BUFFER_MAX_MEMORY_BYTES: int = 64 * 1024 * 1024
+    # Batches encoded/uploaded concurrently while consumption continues (0 = inline)
+    FLUSH_WORKERS: int = 2
+    SHUTDOWN_TIMEOUT_SECONDS: int = 120
+    # Batches GCS rejects are spilled here and replayed when it recovers ("" = off)
+    SPILL_DIR: str = "spill"
+    SPILL_MAX_BYTES: int = 10 * 1024 * 1024 * 1024
+    # Concurrent partition uploads per batch
+    UPLOAD_WORKERS: int = 4
+    # "gcs", or "local" to write the lake under LOCAL_STORAGE_DIR (offline runs, benchmarks)
+    STORAGE_BACKEND: str = "gcs"
+    LOCAL_STORAGE_DIR: str = "lake"
+    # Messages that do not conform to the event schema are sent here
+    DLQ_TOPIC: str = "events-stream-dlq"
+    # JSON list of routes, e.g. [{"topic": "ecommerce_orders", "schema": "order",
+    # "prefix": "ecommerce/orders/"}]; empty = events-stream into raw/ only
+    ROUTES: List[Route] = []
+    CONSUMER_GROUP: str = "bridge-group"
+    # Offset ranges of landed batches, so a restart never writes them twice ("" = off)
+    COMMIT_LOG_PREFIX: str = "manifests/commits/"
 
     model_config = {
         "env_file": ".env"
     }
 
+    def routes(self) -> List[Route]:
+        """Configured routes, or the clickstream route the bridge started with"""
+        if self.ROUTES:
+            return self.ROUTES
+        return [
+            Route(
+                topic=EVENTS_TOPIC,
+                schema="bridge_event",
+                prefix=RAW_PREFIX,
+                dlq_topic=self.DLQ_TOPIC,
+            )
+        ]
+
 
 class ParquetBatchProcessor(BatchProcessor):
-    """Processes batches by writing to Parquet and uploading to GCS"""
+    """Processes one topic's batches by writing to Parquet and uploading to GCS"""
 
-    def __init__(self, gcs_client: GCSClient, settings: BridgeSettings):
+    def __init__(
+        self,
+        gcs_client: StorageClient,
+        settings: BridgeSettings,
+        dlq_producer: Optional[RedpandaProducer] = None,
+        memory_budget: Optional[MemoryBudget] = None,
+        on_flushed: Optional[Callable[[List[Any]], None]] = None,
+        spill_log: Optional[SpillLog] = None,
+        commit_log: Optional[CommitLog] = None,
+        route: Optional[Route] = None,
+    ):
+        route = route or settings.routes()[0]
         super().__init__(
-            batch_size=settings.BATCH_SIZE,
-            batch_timeout_seconds=settings.BATCH_TIMEOUT_SECONDS,
+            batch_size=route.batch_size or settings.BATCH_SIZE,
+            batch_timeout_seconds=route.batch_timeout_seconds or settings.BATCH_TIMEOUT_SECONDS,
+            max_batch_bytes=route.max_batch_bytes or settings.MAX_BATCH_BYTES or None,
+            target_output_bytes=route.target_file_bytes or settings.TARGET_FILE_BYTES,
+            memory_budget=memory_budget,
+            flush_workers=settings.FLUSH_WORKERS,
+            on_flushed=on_flushed,
+            spill_log=spill_log,
         )
+        self.route = route
+        self.spec = route.spec
         self.gcs_client = gcs_client
+        self.buffer_max_memory = settings.BUFFER_MAX_MEMORY_BYTES
+        self.upload_workers = settings.UPLOAD_WORKERS
+        self.dlq_producer = dlq_producer
+        self.dlq_topic = route.dlq_topic or f"{route.topic}-dlq"
+        self.commit_log = commit_log
+
+    def _send_to_dlq(self, rejected: List[dict]) -> bool:
+        """Publish rejected messages with their reasons; True when all were accepted"""
+        if self.dlq_producer is None:
+            logger.warning(f"Dropping {len(rejected)} non-conforming events (no DLQ configured)")
+            return True
+        sent = self.dlq_producer.publish_batch(self.dlq_topic, rejected)
+        return sent == len(rejected)
 
     def _process_batch(self, batch: List[Any]) -> bool:
-        """Convert batch to Parquet and upload to GCS"""
-        df = pd.DataFrame(batch)
-        
-        # Enforce string types for IDs to prevent PyArrow conversion errors
-        # (e.g. if previous batches had ints and now we have UUID strings)
-        for col in ['event_id', 'session_id', 'user_id', 'country', 'action']:
-            if col in df.columns:
-                df[col] = df[col].astype(str)
-
-        # Generate paths
-        now = datetime.utcnow()
-        date_str = now.strftime("%Y-%m-%d")
-        timestamp_str = now.strftime("%H-%M-%S-%f")
-        blob_path = f"raw/{date_str}/{timestamp_str}.parquet"
-
-        # Write to temp file
-        with tempfile.NamedTemporaryFile(suffix=".parquet", delete=False) as tmp:
-            tmp_path = tmp.name
-            df.to_parquet(tmp_path, compression="snappy", index=False)
-
-        # Upload with retry
-        success = self.gcs_client.upload_file(
-            source_path=tmp_path,
-            destination_blob=blob_path,
-            content_type="application/octet-stream",
+        """Convert batch to Parquet with the route's schema and upload to GCS"""
+        records = [item for item in batch if isinstance(item, dict)]
+        failed_at = datetime.utcnow().isoformat()
+        rejected = [
+            {"error": "message is not a JSON object", "payload": item, "failed_at": failed_at}
+            for item in batch
+            if not isinstance(item, dict)
+        ]
+
+        spec = self.spec
+        table, rejects = records_to_table(
+            records, spec.schema, spec.required, spec.allowed_values, spec.value_ranges
+        )
+        rejected.extend(
+            {"error": reason, "payload": records[index], "failed_at": failed_at}
+            for index, reason in rejects
         )
 
-        # Cleanup
-        os.remove(tmp_path)
-        return success
+        # Dead-letter first: a failed batch is retried whole, and a duplicate
+        # DLQ entry is cheaper than a duplicate data file
+        if rejected:
+            logger.warning(
+                f"{len(rejected)}/{len(batch)} events rejected, first: {rejected[0]['error']}"
+            )
+            if not self._send_to_dlq(rejected):
+                return False
+
+        # Files are named after and tagged with the batch's offset ranges
+        ranges = offset_ranges(self.flushing_positions)
+        token = ranges_token(ranges) if ranges else None
+        partitions = partition_by_event_time(table, spec.time_column) if table.num_rows else []
+        names = [
+            f"{self.route.prefix}{partition}/{partition_file_name(rows, token, spec.key_columns)}"
+            for partition, rows in partitions
+        ]
+        if self.commit_log is not None and token and not self.commit_log.begin(token, names):
+            return False
+
+        # One file per event-time partition; the whole batch is retried on
+        # failure and deterministic names make re-uploads idempotent.
+        # Encode each partition in memory (rolling over to an anonymous temp
+        # file when oversized), then upload them concurrently; closing the
+        # buffers always frees them
+        with ExitStack() as stack:
+            uploads = []
+            for name, (partition, rows) in zip(names, partitions):
+                buffer = stack.enter_context(
+                    tempfile.SpooledTemporaryFile(max_size=self.buffer_max_memory)
+                )
+                if ranges:
+                    rows = with_offset_ranges(rows, ranges)
+                pq.write_table(
+                    rows,
+                    buffer,
+                    compression="snappy",
+                    use_dictionary=list(spec.dictionary_columns),
+                )
+                size = buffer.tell()
+                self.record_output_bytes(size)
+                if size > self.buffer_max_memory:
+                    logger.info(f"Partition of {size} bytes exceeded the memory buffer, spilled")
+                uploads.append(Upload(name, fileobj=buffer, size=size))
+
+            # Deterministic names make re-uploads of a retried batch no-ops
+            if not all(self.gcs_client.upload_many(uploads, max_workers=self.upload_workers)):
+                return False
+
+        # Commit point: from here on a restart skips this batch's offsets
+        if self.commit_log is not None and token:
+            return self.commit_log.commit(token, ranges, names)
+        return True
+
+
+def create_storage(settings: BridgeSettings) -> StorageClient:
+    """Storage backend selected by STORAGE_BACKEND"""
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorageClient(settings.LOCAL_STORAGE_DIR)
+    return GCSClient(settings=settings)
+
+
+def open_spill_log(settings: BridgeSettings, topic: str) -> Optional[SpillLog]:
+    """Spill log of one topic, in its own directory under SPILL_DIR"""
+    if not settings.SPILL_DIR:
+        return None
+    directory = os.path.join(settings.SPILL_DIR, topic)
+    # Before routing, the clickstream spilled into SPILL_DIR itself
+    if topic == EVENTS_TOPIC and os.path.isdir(settings.SPILL_DIR):
+        os.makedirs(directory, exist_ok=True)
+        for name in sorted(os.listdir(settings.SPILL_DIR)):
+            if name.endswith(".arrow"):
+                os.replace(os.path.join(settings.SPILL_DIR, name), os.path.join(directory, name))
+    return SpillLog(directory, settings.SPILL_MAX_BYTES)
 
 
 def main():
     settings = BridgeSettings()
-    logger.info("Starting Hybrid Cloud Bridge")
+    routes = settings.routes()
+    logger.info(f"Starting Hybrid Cloud Bridge for topics {[route.topic for route in routes]}")
 
-    gcs = GCSClient(settings=settings)
-    processor = ParquetBatchProcessor(gcs_client=gcs, settings=settings)
+    gcs = create_storage(settings)
+    dlq = RedpandaProducer(settings=settings)
+    commit_log = None
+    if settings.COMMIT_LOG_PREFIX:
+        # Undo batches a crash interrupted mid-upload, before anything is re-written
+        commit_log = CommitLog(gcs, settings.COMMIT_LOG_PREFIX)
+        commit_log.recover()
+
+    # One processor and offset tracker per topic, sharing the memory budget
+    budget = MemoryBudget(settings.MEMORY_BUDGET_BYTES)
+    offsets: Dict[str, OffsetTracker] = {}
+    processors: Dict[str, ParquetBatchProcessor] = {}
+    for route in routes:
+        offsets[route.topic] = OffsetTracker()
+        processors[route.topic] = ParquetBatchProcessor(
+            gcs_client=gcs,
+            settings=settings,
+            dlq_producer=dlq,
+            memory_budget=budget,
+            on_flushed=offsets[route.topic].complete,
+            spill_log=open_spill_log(settings, route.topic),
+            commit_log=commit_log,
+            route=route,
+        )
+        # Batches spilled before a restart were committed already; deliver them first
+        processors[route.topic].replay_spilled()
 
     consumer = RedpandaConsumer(
-        topics=["events-stream"],
-        group_id="bridge-group",
-        enable_auto_commit=False,  # Manual commit after successful flush
+        topics=list(processors),
+        group_id=settings.CONSUMER_GROUP,
+        enable_auto_commit=False,  # Manual commit of durable offsets only
         settings=settings,
     )
 
-    def handle_message(value, key, partition, offset):
-        flushed = processor.add(value)
-        if flushed:
-            consumer.commit()
-            logger.debug(f"Committed offset {offset}")
+    def commit_durable():
+        # Flushes finish out of order; only the contiguous durable prefix is committed
+        committable = {}
+        for tracker in offsets.values():
+            committable.update(tracker.pop_committable())
+        if committable:
+            consumer.commit(committable)
+            logger.debug(f"Committed offsets {committable}")
+            if commit_log is not None:
+                commit_log.prune(committable)
+
+    def handle_message(value, key, partition, offset, topic):
+        position = (topic, partition, offset)
+        offsets[topic].track(position)
+        if commit_log is not None and commit_log.covers(*position):
+            # Landed before a crash but never committed: durable already
+            offsets[topic].complete([position])
+        else:
+            processors[topic].add(value, position=position)
+        commit_durable()
+
+    def handle_idle():
+        # No new input: enforce the batch timeouts so the tails are not held back
+        for processor in processors.values():
+            processor.tick()
+        commit_durable()
 
     try:
-        consumer.consume(handler=handle_message)
+        consumer.consume(
+            handler=handle_message, on_idle=handle_idle, close_on_exit=False, pass_topic=True
+        )
     except KeyboardInterrupt:
         logger.info("Shutting down...")
     finally:
-        # Flush remaining buffer before exit
-        if processor.buffer_size > 0:
-            logger.info(f"Flushing remaining {processor.buffer_size} items")
-            if processor.flush():
-                consumer.commit()
+        # Flush remaining buffers and wait for in-flight uploads before exit
+        for topic, processor in processors.items():
+            logger.info(f"Flushing remaining {processor.buffer_size} items of {topic}")
+            if not processor.close(timeout=settings.SHUTDOWN_TIMEOUT_SECONDS):
+                pending = offsets[topic].pending_count
+                logger.warning(f"{pending} {topic} events not durable, left uncommitted")
+        commit_durable()
         consumer.close()
+        dlq.close()
 
 
 if __name__ == "__main__":
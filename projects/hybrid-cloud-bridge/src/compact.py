@@ -0,0 +1,116 @@
+"""
+Compact the bridge's small Parquet files, one event-time partition at a time
+
+Safe to run while the bridge is writing (see shared.storage.compaction);
+by default only hours that ended at least --settle-minutes ago are touched.
+
+    python src/compact.py --sort-by session_id,timestamp
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from loguru import logger
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bridge import BridgeSettings, Route, create_storage  # noqa: E402
+from foundation.shared.storage import CommitLog, StorageClient  # noqa: E402
+from foundation.shared.storage.compaction import (  # noqa: E402
+    CompactionResult,
+    compact_partition,
+    list_partitions,
+)
+
+MANIFEST_PREFIX = "manifests/"
+
+
+def manifest_path(partition: str) -> str:
+    """manifests/raw/dt=.../hour=.../manifest.json - outside the external table's prefix"""
+    return f"{MANIFEST_PREFIX}{partition}manifest.json"
+
+
+def partition_end(partition: str) -> datetime:
+    """End of the hour a '<prefix>dt=YYYY-MM-DD/hour=HH/' partition covers"""
+    fields = dict(part.split("=", 1) for part in partition.strip("/").split("/") if "=" in part)
+    start = datetime.strptime(f"{fields['dt']} {fields['hour']}", "%Y-%m-%d %H")
+    return start + timedelta(hours=1)
+
+
+def compact_lake(
+    storage: StorageClient,
+    routes: List[Route],
+    target_file_bytes: int,
+    sort_by: Optional[List[str]] = None,
+    settle_minutes: int = 15,
+    now: Optional[datetime] = None,
+    commit_log: Optional[CommitLog] = None,
+) -> List[CompactionResult]:
+    """
+    Compact every settled partition under the routes' prefixes
+
+    Args:
+        storage: Storage backend
+        routes: Bridge routes (prefix and schema of each topic)
+        target_file_bytes: Desired output file size
+        sort_by: Sort columns for the compacted row groups (default: event time)
+        settle_minutes: Skip hours that ended less than this long ago
+        now: Current UTC time (injectable for tests)
+        commit_log: The bridge's commit log (files of uncommitted batches are skipped)
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(minutes=settle_minutes)
+    results = []
+    for route in routes:
+        spec = route.spec
+        for partition in list_partitions(storage, route.prefix):
+            if partition_end(partition) > cutoff:
+                continue
+            try:
+                result = compact_partition(
+                    storage,
+                    partition,
+                    manifest_path(partition),
+                    target_file_bytes=target_file_bytes,
+                    sort_by=sort_by or [spec.time_column],
+                    schema=spec.schema,
+                    write_options={"use_dictionary": list(spec.dictionary_columns)},
+                    commit_log=commit_log,
+                )
+            except Exception as e:
+                logger.error(f"Compaction of {partition} failed: {e}")
+                continue
+            if result.committed:
+                results.append(result)
+    logger.info(f"Compacted {len(results)} partitions")
+    return results
+
+
+def main(argv=None):
+    settings = BridgeSettings()
+    parser = argparse.ArgumentParser(description="Compact small bridge Parquet files")
+    parser.add_argument("--target-file-bytes", type=int, default=settings.COMPACTED_FILE_BYTES)
+    parser.add_argument(
+        "--sort-by",
+        help="Comma-separated sort columns, e.g. session_id,timestamp (default: event time)",
+    )
+    parser.add_argument("--settle-minutes", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    storage = create_storage(settings)
+    compact_lake(
+        storage,
+        settings.routes(),
+        args.target_file_bytes,
+        args.sort_by.split(",") if args.sort_by else None,
+        settle_minutes=args.settle_minutes,
+        commit_log=(
+            CommitLog(storage, settings.COMMIT_LOG_PREFIX) if settings.COMMIT_LOG_PREFIX else None
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark the synthetic data generator
+Measures popular-product sampling cost as the catalog grows and compares
+object-at-a-time vs vectorized batch generation
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add project to path
+project_root = Path(__file__).parent.parent
+project_path = project_root / "projects" / "ecommerce-dbt"
+sys.path.insert(0, str(project_path))
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "foundation"))
+
+from data_generator.config import GeneratorConfig  # noqa: E402
+from data_generator.event_generator import EventGenerator  # noqa: E402
+from data_generator.product_generator import ProductGenerator  # noqa: E402
+from data_generator.vectorized import VectorizedEventGenerator, to_records  # noqa: E402
+
+CATALOG_SIZES = [500, 5_000, 50_000, 1_000_000]
+DRAWS = 20_000
+# Per-call weights are O(catalog) per draw - only time them where it finishes quickly
+LEGACY_MAX_DRAWS = 200
+
+
+def legacy_get_popular_products(product_gen: ProductGenerator, count: int):
+    """Previous implementation: fresh Pareto weights on every call"""
+    weights = [random.paretovariate(1.5) for _ in product_gen.products]
+    return random.choices(product_gen.products, weights=weights, k=count)
+
+
+def time_per_draw(fn, draws: int) -> float:
+    """Average seconds per single-product draw"""
+    start = time.perf_counter()
+    for _ in range(draws):
+        fn()
+    return (time.perf_counter() - start) / draws
+
+
+def benchmark_popular_products():
+    print("\n=== get_popular_products(1) ===")
+    print(f"{'catalog':>10} | {'legacy us/draw':>15} | {'current us/draw':>15} | {'speedup':>8}")
+    print("-" * 58)
+
+    for size in CATALOG_SIZES:
+        random.seed(42)
+        product_gen = ProductGenerator(total_products=size, rng=random.Random(42))
+
+        legacy_draws = max(1, min(LEGACY_MAX_DRAWS, 2_000_000 // size))
+        legacy = time_per_draw(lambda: legacy_get_popular_products(product_gen, 1), legacy_draws)
+        current = time_per_draw(lambda: product_gen.get_popular_products(1), DRAWS)
+
+        print(
+            f"{size:>10,} | {legacy * 1e6:>15,.1f} | {current * 1e6:>15,.2f} | "
+            f"{legacy / current:>7,.0f}x"
+        )
+
+
+def benchmark_batch_generation(duration_seconds: int = 86400):
+    print(f"\n=== generate_batch({duration_seconds:,}s) ===")
+    config = GeneratorConfig(seed=42)
+    event_gen = EventGenerator(config)
+    vector_gen = VectorizedEventGenerator(config, event_gen.user_gen, event_gen.product_gen)
+
+    start = time.perf_counter()
+    orders, page_views, inventory = event_gen.generate_batch(duration_seconds)
+    objects = time.perf_counter() - start
+    total = len(orders) + len(page_views) + len(inventory)
+
+    start = time.perf_counter()
+    batch = vector_gen.generate_batch(duration_seconds)
+    columns = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for stream in batch:
+        to_records(stream)
+    records = time.perf_counter() - start
+
+    print(f"events:              {total:>12,}")
+    print(f"objects:             {objects:>11.2f}s")
+    print(f"vectorized columns:  {columns:>11.2f}s ({objects / columns:,.0f}x)")
+    print(f"  + dicts at edge:   {columns + records:>11.2f}s")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("DATA GENERATOR BENCHMARK")
+    print("=" * 60)
+    benchmark_popular_products()
+    benchmark_batch_generation()
@@ -0,0 +1,26 @@
+"""
+Export operational tables to date-partitioned Parquet files
+Streams rows with a server-side cursor, so multi-GB tables export with bounded memory
+
+Usage:
+    python scripts/export_tables.py orders page_views --output-dir data/exports
+"""
+
+import sys
+from pathlib import Path
+
+# Add foundation to path
+project_root = Path(__file__).parent.parent
+foundation_path = project_root / "foundation"
+sys.path.insert(0, str(foundation_path))
+sys.path.insert(0, str(project_root))
+
+from shared.database import PostgreSQLConnectionPool  # noqa: E402
+from shared.database.export import main  # noqa: E402
+
+if __name__ == "__main__":
+    PostgreSQLConnectionPool.initialize()
+    try:
+        main()
+    finally:
+        PostgreSQLConnectionPool.close_all()
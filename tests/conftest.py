@@ -7,9 +7,13 @@ from unittest.mock import MagicMock, patch
 PROJECT_ROOT = Path(__file__).parent.parent
 FOUNDATION_PATH = PROJECT_ROOT / "foundation"
 ECOMMERCE_PATH = PROJECT_ROOT / "projects" / "ecommerce-dbt"
+BRIDGE_PATH = PROJECT_ROOT / "projects" / "hybrid-cloud-bridge" / "src"
 
+# The bridge imports foundation as a package (foundation.shared.*)
+sys.path.insert(0, str(PROJECT_ROOT))
 sys.path.insert(0, str(FOUNDATION_PATH))
 sys.path.insert(0, str(ECOMMERCE_PATH))
+sys.path.insert(0, str(BRIDGE_PATH))
 
 
 @pytest.fixture
@@ -0,0 +1,195 @@
+import threading
+import time
+
+from shared.messaging.batch_processor import BatchProcessor, MemoryBudget
+from shared.messaging.offset_tracker import OffsetTracker
+from shared.messaging.spill import SpillLog
+
+
+class RecordingProcessor(BatchProcessor):
+    def __init__(self, output_bytes_per_item=0, **kwargs):
+        super().__init__(**kwargs)
+        self.batches = []
+        self.output_bytes_per_item = output_bytes_per_item
+
+    def _process_batch(self, batch):
+        self.batches.append(batch)
+        self.record_output_bytes(len(batch) * self.output_bytes_per_item)
+        return True
+
+
+class TestBatchProcessor:
+
+    def test_tick_flushes_partial_batch_after_timeout(self):
+        processor = RecordingProcessor(batch_size=100, batch_timeout_seconds=0.05)
+        processor.add("a")
+
+        assert not processor.tick()  # Not due yet
+        time.sleep(0.06)
+        assert processor.tick()
+        assert processor.batches == [["a"]]
+        assert not processor.tick()  # Nothing buffered
+
+    def test_timer_flushes_without_new_input(self):
+        processor = RecordingProcessor(batch_size=100, batch_timeout_seconds=0.05)
+        flushed = threading.Event()
+        processor.start_timer(interval_seconds=0.01, on_flush=flushed.set)
+        try:
+            processor.add("a")
+            assert flushed.wait(timeout=2)
+        finally:
+            processor.stop_timer()
+        assert processor.batches == [["a"]]
+
+    def test_concurrent_adds_with_timer_lose_nothing(self):
+        processor = RecordingProcessor(batch_size=50, batch_timeout_seconds=0.001)
+        processor.start_timer(interval_seconds=0.001)
+
+        def produce(offset):
+            for i in range(500):
+                processor.add(offset + i)
+
+        threads = [threading.Thread(target=produce, args=(n * 1000,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        processor.stop_timer()
+        processor.flush()
+
+        items = [item for batch in processor.batches for item in batch]
+        assert sorted(items) == sorted(n * 1000 + i for n in range(4) for i in range(500))
+
+    def test_byte_trigger_learns_output_ratio_for_target_size(self):
+        processor = RecordingProcessor(
+            output_bytes_per_item=25, batch_size=10_000, target_output_bytes=1000
+        )
+        for _ in range(10):
+            processor.add("x" * 98)  # 100 bytes each with JSON quotes
+
+        # Before any measurement the target is taken 1:1 on input bytes
+        assert [len(batch) for batch in processor.batches] == [10]
+
+        for _ in range(40):
+            processor.add("x" * 98)
+        # 4:1 compression learned: the next batch holds ~4000 input bytes
+        assert [len(batch) for batch in processor.batches] == [10, 40]
+        assert processor.buffer_bytes == 0
+
+    def test_memory_budget_flushes_the_largest_buffer(self):
+        budget = MemoryBudget(limit_bytes=1000)
+        big = RecordingProcessor(batch_size=10_000, memory_budget=budget)
+        small = RecordingProcessor(batch_size=10_000, memory_budget=budget)
+
+        small.add("x" * 98)
+        for _ in range(8):
+            big.add("x" * 98)
+        assert not small.add("x" * 98)  # Over budget, but big holds more
+        assert big.tick()
+
+        assert [len(batch) for batch in big.batches] == [8]
+        assert small.batches == []
+        assert budget.used_bytes == 200
+
+    def test_in_flight_bytes_do_not_shrink_background_batches(self):
+        budget = MemoryBudget(limit_bytes=1000)
+        processor = RecordingProcessor(batch_size=10_000, memory_budget=budget, flush_workers=2)
+        for i in range(800):
+            processor.add(i, size=10)
+        assert processor.close(timeout=5)
+
+        sizes = [len(batch) for batch in processor.batches]
+        assert sum(sizes) == 800
+        assert sizes == [100] * 8  # Each flush waits for a full budget of buffered bytes
+        assert budget.used_bytes == 0
+
+    def test_background_flush_keeps_accepting_and_reports_positions(self):
+        release = threading.Event()
+        durable = []
+
+        class SlowProcessor(RecordingProcessor):
+            def _process_batch(self, batch):
+                release.wait(timeout=5)
+                return super()._process_batch(batch)
+
+        processor = SlowProcessor(batch_size=2, flush_workers=1, on_flushed=durable.extend)
+        processor.add("a", position=0)
+        assert processor.add("b", position=1)  # Handed off, not yet durable
+        processor.add("c", position=2)  # Accepted while the upload is in flight
+        assert durable == [] and processor.buffer_size == 1
+
+        release.set()
+        assert processor.close(timeout=5)
+        assert processor.batches == [["a", "b"], ["c"]]
+        assert durable == [0, 1, 2]
+
+    def test_failed_sync_flush_keeps_batch_without_regrowing_it(self):
+        outcomes = [False, True, True]
+
+        class FlakyProcessor(RecordingProcessor):
+            def _process_batch(self, batch):
+                self.batches.append(list(batch))
+                return outcomes.pop(0)
+
+        processor = FlakyProcessor(batch_size=2)
+        processor.add("a")
+        assert not processor.add("b")  # Upload failed, batch retained
+        processor.add("c")  # Retries the failed batch first, then flushes "c"
+
+        assert processor.batches == [["a", "b"], ["a", "b"], ["c"]]
+        assert processor.buffer_size == 0
+
+    def test_spills_while_sink_is_down_and_replays_on_recovery(self, tmp_path):
+        sink_up = [False]
+        durable = []
+
+        class OutageProcessor(RecordingProcessor):
+            def _process_batch(self, batch):
+                if not sink_up[0]:
+                    return False
+                return super()._process_batch(batch)
+
+        budget = MemoryBudget(limit_bytes=10_000)
+        processor = OutageProcessor(
+            batch_size=2,
+            memory_budget=budget,
+            spill_log=SpillLog(str(tmp_path)),
+            on_flushed=durable.extend,
+        )
+        for i, item in enumerate([{"id": 1}, {"id": 2}, {"id": 3}, {"id": 4}]):
+            processor.add(item, position=i)
+
+        # Spilled batches count as durable and free their memory
+        assert durable == [0, 1, 2, 3]
+        assert budget.used_bytes == 0
+        assert len(processor.spill_log) == 2
+
+        sink_up[0] = True
+        processor.add({"id": 5})
+        processor.add({"id": 6})
+
+        assert processor.batches == [
+            [{"id": 5}, {"id": 6}],
+            [{"id": 1}, {"id": 2}],
+            [{"id": 3}, {"id": 4}],
+        ]
+        assert len(processor.spill_log) == 0
+        assert SpillLog(str(tmp_path)).segments() == []
+
+
+class TestOffsetTracker:
+
+    def test_watermark_advances_only_over_contiguous_durable_offsets(self):
+        tracker = OffsetTracker()
+        for offset in range(6):
+            tracker.track(("events", 0, offset))
+        tracker.track(("events", 1, 10))
+
+        tracker.complete([("events", 0, 3), ("events", 0, 4)])  # Later batch first
+        assert tracker.pop_committable() == {}
+
+        tracker.complete([("events", 0, 0), ("events", 0, 1), ("events", 0, 2)])
+        tracker.complete([("events", 1, 10)])
+        assert tracker.pop_committable() == {("events", 0): 5, ("events", 1): 11}
+        assert tracker.pop_committable() == {}  # Nothing new
+        assert tracker.pending_count == 1
@@ -0,0 +1,159 @@
+import io
+from unittest.mock import MagicMock
+
+import pyarrow.parquet as pq
+import pytest
+
+from bridge import BridgeSettings, ParquetBatchProcessor, Route
+from foundation.shared.messaging import Batch
+from foundation.shared.models.bridge_event import BRIDGE_EVENT_SCHEMA
+from foundation.shared.storage import CommitLog, LocalStorageClient
+from foundation.shared.storage.commit_log import file_ranges
+
+
+def _event(**overrides):
+    event = {
+        "event_id": "evt_1",
+        "session_id": "sess_1",
+        "user_id": 42,
+        "country": "US",
+        "device_type": "mobile",
+        "action": "view",
+        "value": 0.01,
+        "timestamp": 1700000000.5,
+        "context": {"referrer": "google", "ad_id": None, "campaign_id": None, "url": "/home"},
+    }
+    event.update(overrides)
+    return event
+
+
+class TestParquetBatchProcessor:
+
+    @pytest.fixture
+    def gcs(self, tmp_path):
+        return LocalStorageClient(str(tmp_path / "lake"))
+
+    @pytest.fixture
+    def dlq(self):
+        producer = MagicMock()
+        producer.publish_batch.side_effect = lambda topic, events: len(events)
+        return producer
+
+    def _processor(self, gcs, dlq, **kwargs):
+        settings = BridgeSettings(BATCH_SIZE=100, GCS_BUCKET_NAME="test")
+        return ParquetBatchProcessor(gcs_client=gcs, settings=settings, dlq_producer=dlq, **kwargs)
+
+    def test_writes_declared_schema_and_routes_rejects(self, gcs, dlq):
+        batch = [
+            _event(),
+            _event(user_id="7"),  # Coerced to int64
+            _event(context=None),  # Missing struct stays null, schema unchanged
+            _event(user_id="not-a-number"),
+            _event(action="teleport"),
+            "not an object",
+        ]
+
+        assert self._processor(gcs, dlq)._process_batch(batch)
+
+        (blob,) = gcs.list_blobs("raw/")
+        table = pq.read_table(io.BytesIO(gcs.download_bytes(blob.name)))
+        assert table.schema.equals(BRIDGE_EVENT_SCHEMA)
+        assert table["user_id"].to_pylist() == [42, 7, 42]
+
+        topic, rejected = dlq.publish_batch.call_args[0]
+        assert topic == "events-stream-dlq"
+        assert [r["payload"] for r in rejected] == ["not an object", batch[3], batch[4]]
+        assert rejected[1]["error"].startswith("user_id")
+
+    def test_dlq_failure_fails_batch_before_upload(self, gcs, dlq):
+        dlq.publish_batch.side_effect = lambda topic, events: 0
+
+        assert not self._processor(gcs, dlq)._process_batch([_event(), _event(event_id=None)])
+        assert gcs.list_blobs() == []
+
+    def test_partitions_by_event_hour_with_deterministic_names(self, gcs, dlq):
+        processor = self._processor(gcs, dlq)
+        batch = [
+            _event(event_id="a", timestamp=1700003600.0),  # 2023-11-14 23:13
+            _event(event_id="b", timestamp=1700000000.0),  # 2023-11-14 22:13
+            _event(event_id="c", timestamp=1699999999.0),
+            _event(event_id="d", timestamp=-1.0),  # Cannot be partitioned
+        ]
+
+        assert processor._process_batch(batch)
+        first = gcs.list_blobs()
+        assert processor._process_batch(batch)  # Retried batch: same objects, untouched
+
+        assert gcs.list_blobs() == first
+        assert [blob.name.rsplit("/", 1)[0] for blob in first] == [
+            "raw/dt=2023-11-14/hour=22",
+            "raw/dt=2023-11-14/hour=23",
+        ]
+        hour_22 = pq.read_table(io.BytesIO(gcs.download_bytes(first[0].name)))
+        assert hour_22["event_id"].to_pylist() == ["c", "b"]  # Sorted by event time
+        assert dlq.publish_batch.call_args[0][1][0]["payload"]["event_id"] == "d"
+
+    def test_files_carry_offset_ranges_and_land_in_the_commit_log(self, gcs, dlq):
+        processor = self._processor(gcs, dlq, commit_log=CommitLog(gcs, "manifests/commits/"))
+        positions = [("events-stream", 0, offset) for offset in (100, 101, 102)]
+        batch = Batch([_event(event_id=str(offset)) for _, _, offset in positions], positions)
+
+        assert processor._process(batch)
+
+        (blob,) = gcs.list_blobs("raw/")
+        assert blob.name.endswith("/part-events-stream+0+100-102.parquet")
+        metadata = pq.read_schema(io.BytesIO(gcs.download_bytes(blob.name))).metadata
+        assert file_ranges(metadata) == {"events-stream": {0: [(100, 102)]}}
+
+        # After a restart the landed range is skipped until its offsets are committed
+        restarted = CommitLog(gcs, "manifests/commits/")
+        assert restarted.recover() == 0
+        assert restarted.covers("events-stream", 0, 102)
+        assert not restarted.covers("events-stream", 0, 103)
+        assert restarted.prune({("events-stream", 0): 103}) == 1
+        assert gcs.list_blobs("manifests/") == []
+
+    def test_routes_land_each_topic_with_its_own_schema(self, gcs, dlq, monkeypatch):
+        monkeypatch.setenv(
+            "ROUTES",
+            '[{"topic": "ecommerce_orders", "schema": "order", "prefix": "ecommerce/orders/"}]',
+        )
+        (route,) = BridgeSettings().routes()
+        assert isinstance(route, Route) and route.spec.key_columns == ("order_id",)
+
+        order = {
+            "order_id": "ord_1",
+            "user_id": "user_1",
+            "product_id": "prod_1",
+            "timestamp": "2024-01-31T09:15:00.250000",
+            "amount": 19.99,
+            "status": "confirmed",
+            "quantity": 2,
+        }
+        processor = self._processor(gcs, dlq, route=route)
+        assert processor._process_batch([order, {**order, "order_id": "ord_2", "status": "lost"}])
+
+        (blob,) = gcs.list_blobs()
+        assert blob.name.startswith("ecommerce/orders/dt=2024-01-31/hour=09/")
+        table = pq.read_table(io.BytesIO(gcs.download_bytes(blob.name)))
+        assert table["order_id"].to_pylist() == ["ord_1"]
+        assert dlq.publish_batch.call_args[0][0] == "ecommerce_orders-dlq"
+
+    def test_inventory_batches_of_one_product_get_distinct_files(self, gcs, dlq):
+        route = Route(topic="ecommerce_inventory", schema="inventory", prefix="inventory/")
+        change = {
+            "product_id": "prod_1",
+            "timestamp": "2024-01-31T09:15:00",
+            "stock_change": -1,
+            "current_stock": 9,
+            "warehouse_id": "wh_1",
+        }
+        processor = self._processor(gcs, dlq, route=route)
+        # Same product in the same hour, in two batches without offsets
+        assert processor._process_batch([change])
+        assert processor._process_batch(
+            [{**change, "timestamp": "2024-01-31T09:20:00", "current_stock": 8}]
+        )
+
+        blobs = gcs.list_blobs("inventory/dt=2024-01-31/hour=09/")
+        assert len(blobs) == 2
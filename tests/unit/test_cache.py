@@ -0,0 +1,133 @@
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from shared.cache import DimensionCache
+from shared.cache.dimension_cache import write_products
+from shared.cache import IdempotencyFilter
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the redis client calls used by the cache"""
+
+    def __init__(self):
+        self.data = {}
+        self.mget_calls = 0
+
+    def mget(self, keys):
+        self.mget_calls += 1
+        return [self.data.get(k) for k in keys]
+
+    def pipeline(self, transaction=True):
+        pipe = MagicMock()
+        pipe.set.side_effect = lambda key, value, ex=None: self.data.__setitem__(key, value)
+        return pipe
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+class TestDimensionCache:
+
+    def test_get_many_loads_misses_once_then_serves_from_cache(self):
+        client = FakeRedis()
+        loader = MagicMock(side_effect=lambda ids: {i: {"category": "Books"} for i in ids})
+        cache = DimensionCache("product", loader, client=client)
+
+        first = cache.get_many(["p1", "p2", "p1"])
+        second = cache.get_many(["p1", "p2"])
+
+        assert first == second == {"p1": {"category": "Books"}, "p2": {"category": "Books"}}
+        loader.assert_called_once_with(["p1", "p2"])
+        assert client.mget_calls == 1  # Second call served by the local LRU
+
+    def test_redis_tier_serves_other_processes(self):
+        client = FakeRedis()
+        loader = MagicMock(side_effect=lambda ids: {i: {"tier": "gold"} for i in ids})
+        DimensionCache("user", loader, client=client).get_many(["u1"])
+
+        # A fresh cache (empty LRU) sharing the same Redis does not hit the loader
+        other = DimensionCache("user", loader, client=client)
+        assert other.get("u1") == {"tier": "gold"}
+        assert loader.call_count == 1
+
+    def test_enrich_adds_fields_and_tolerates_unknown_ids(self):
+        loader = MagicMock(return_value={"p1": {"category": "Toys"}})
+        cache = DimensionCache("product", loader, client=FakeRedis())
+        records = [{"product_id": "p1"}, {"product_id": "p404"}, {"product_id": None}]
+
+        cache.enrich(records, "product_id", {"category": "product_category"})
+
+        assert [r["product_category"] for r in records] == ["Toys", None, None]
+
+    def test_invalidate_survives_redis_errors(self):
+        client = FakeRedis()
+        loader = MagicMock(side_effect=lambda ids: {i: {"category": "Toys"} for i in ids})
+        cache = DimensionCache("product", loader, client=client)
+        cache.get("p1")
+
+        client.delete = MagicMock(side_effect=ConnectionError("redis down"))
+        client.data.clear()
+        cache.invalidate(["p1"])
+
+        assert cache.get("p1") == {"category": "Toys"}
+        assert loader.call_count == 2  # Local entry dropped despite the Redis error
+
+    def test_put_many_writes_through_then_caches(self):
+        client = FakeRedis()
+        loader = MagicMock(return_value={})
+        writer = MagicMock()
+        cache = DimensionCache("product", loader, writer=writer, client=client)
+
+        cache.put_many({"p1": {"category": "Toys"}})
+
+        writer.assert_called_once_with({"p1": {"category": "Toys"}})
+        # A fresh process reads it from Redis without touching the database
+        other = DimensionCache("product", loader, client=client)
+        assert other.get("p1") == {"category": "Toys"}
+        loader.assert_not_called()
+
+    def test_failed_write_invalidates_both_tiers(self):
+        client = FakeRedis()
+        loader = MagicMock(side_effect=lambda ids: {i: {"category": "Books"} for i in ids})
+        writer = MagicMock(side_effect=RuntimeError("db down"))
+        cache = DimensionCache("product", loader, writer=writer, client=client)
+        cache.get("p1")
+
+        with pytest.raises(RuntimeError):
+            cache.put_many({"p1": {"category": "Toys"}})
+
+        assert client.data == {}
+        assert cache.get("p1") == {"category": "Books"}  # Re-read from the database
+        assert loader.call_count == 2
+
+    def test_product_writer_upserts_binary_copy_types(self):
+        with (
+            patch("shared.cache.dimension_cache.get_db_connection"),
+            patch("shared.cache.dimension_cache.upsert_rows") as upsert,
+        ):
+            write_products({"p1": {"category": "Toys", "price": 19.99, "supplier": "Acme"}})
+
+        _, table, columns, types, rows = upsert.call_args[0]
+        assert table == "products" and upsert.call_args[1]["key_columns"] == ["product_id"]
+        assert list(rows) == [("p1", "Toys", Decimal("19.99"), "Acme")]
+
+
+class TestIdempotencyFilter:
+
+    def test_seen_counts_hits_and_misses(self):
+        client = MagicMock()
+        client.pipeline.return_value.execute.return_value = [1, 0, 0]
+        dedup = IdempotencyFilter("dedup:orders", client=client)
+
+        assert dedup.seen(["a", "b", "c"]) == [True, False, False]
+        assert dedup.stats()["hits"] == 1 and dedup.stats()["misses"] == 2
+
+    def test_redis_failure_fails_open(self):
+        client = MagicMock()
+        client.pipeline.return_value.execute.side_effect = ConnectionError("down")
+        dedup = IdempotencyFilter("dedup:orders", client=client)
+
+        assert dedup.seen(["a", "b"]) == [False, False]
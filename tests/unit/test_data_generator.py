@@ -0,0 +1,346 @@
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pyarrow.parquet as pq
+
+from shared.models.bridge_event import BRIDGE_EVENT_SCHEMA
+from shared.models.order import OrderStatus
+
+from config import settings
+from data_generator.config import GeneratorConfig
+from data_generator.event_generator import EventGenerator
+from data_generator.main import DataGenerator
+from data_generator.parallel import generate_shard, plan_shards
+from data_generator.product_generator import ProductGenerator
+from data_generator.rate_controller import RateController, TokenBucket
+from data_generator.sessions import SessionManager
+from data_generator.sinks import DatabaseSink, ParquetSink
+from data_generator.traffic import FlashSale, TrafficProfile
+from data_generator.vectorized import VectorizedEventGenerator, to_orders, to_records
+
+
+class TestProductGenerator:
+
+    def test_popularity_is_fixed_per_catalog(self):
+        product_gen = ProductGenerator(total_products=1000, rng=random.Random(7))
+        weights = list(product_gen.popularity_weights)
+        draws = Counter(p.product_id for p in product_gen.get_popular_products(50_000))
+
+        # Same seed, same catalog and weights; drawing does not redraw them
+        rebuilt = ProductGenerator(total_products=1000, rng=random.Random(7))
+        assert rebuilt.popularity_weights == weights == product_gen.popularity_weights
+        assert rebuilt.products == product_gen.products
+
+        # Pareto shape: the top 20% of products by weight take most draws,
+        # the bottom half well under its uniform share
+        by_weight = sorted(range(len(weights)), key=weights.__getitem__, reverse=True)
+        shares = [draws[product_gen.products[i].product_id] / 50_000 for i in by_weight]
+        assert sum(shares[:200]) > 0.5
+        assert sum(shares[500:]) < 0.3
+
+
+class TestVectorizedEventGenerator:
+
+    def _generator(self, seed, **overrides):
+        config = GeneratorConfig(total_users=200, total_products=50, seed=seed, **overrides)
+        event_gen = EventGenerator(config)
+        return VectorizedEventGenerator(config, event_gen.user_gen, event_gen.product_gen)
+
+    def test_seeded_batches_are_reproducible(self):
+        start = datetime(2024, 1, 1)
+        first = self._generator(11).generate_batch(600, start)
+        second = self._generator(11).generate_batch(600, start)
+
+        assert to_records(first[0]) == to_records(second[0])
+        assert to_records(first[1]) == to_records(second[1])
+
+    def test_columns_match_object_model(self):
+        orders, page_views, inventory = self._generator(3, traffic_shaping=False).generate_batch(
+            600, datetime(2024, 1, 1)
+        )
+
+        assert len(orders["order_id"]) == int(600 * 0.5)
+        assert (np.diff(orders["timestamp"].astype(np.int64)) >= 0).all()
+        # Amount is price x quantity, status within the enum
+        assert to_orders(orders)[0].amount > 0
+        assert set(orders["status"]) <= {s.value for s in OrderStatus}
+        assert (inventory["current_stock"] >= 0).all()
+        # Product pages carry a product id, homepage views do not
+        for view in to_records(page_views)[:500]:
+            if view["page_url"].startswith("/product/"):
+                assert view["page_url"] == f"/product/{view['product_id']}"
+            elif view["page_url"] == "/":
+                assert view["product_id"] is None
+
+
+class TestIterEvents:
+
+    def test_events_are_time_ordered_and_bounded(self):
+        config = GeneratorConfig(total_users=100, total_products=20, seed=5, traffic_shaping=False)
+        start = datetime(2024, 1, 1)
+
+        events = list(EventGenerator(config).iter_events(start, duration_seconds=600))
+        timestamps = [event.timestamp for _, event in events]
+        kinds = Counter(kind for kind, _ in events)
+
+        assert timestamps == sorted(timestamps)
+        assert start <= timestamps[0] and timestamps[-1] < start + timedelta(seconds=600)
+        # Poisson counts around rate x duration (5/s and 0.5/s)
+        assert 2700 < kinds["page_view"] < 3300
+        assert 220 < kinds["order"] < 380
+
+    def test_stream_follows_traffic_profile(self):
+        sale = FlashSale(datetime(2024, 1, 4, 20), duration_minutes=10, multiplier=4.0)
+        config = GeneratorConfig(total_users=100, total_products=20, seed=5, flash_sales=[sale])
+        profile = TrafficProfile.from_config(config)
+
+        def page_views(start):
+            events = EventGenerator(config).iter_events(start, duration_seconds=600)
+            return sum(kind == "page_view" for kind, _ in events)
+
+        for start in (datetime(2024, 1, 4, 4), datetime(2024, 1, 4, 20)):
+            expected = 5 * 600 * profile.intensity_at(start)
+            assert abs(page_views(start) - expected) < 5 * expected**0.5
+
+    def test_endless_stream_is_lazy(self):
+        config = GeneratorConfig(total_users=100, total_products=20, seed=5)
+        events = EventGenerator(config).iter_events(datetime(2024, 1, 1))
+
+        first = [next(events) for _ in range(10)]
+        assert len(first) == 10
+
+    def test_seed_reproduces_stream_without_touching_global_random(self):
+        config = GeneratorConfig(total_users=100, total_products=20, seed=5)
+        start = datetime(2024, 1, 1)
+
+        def stream():
+            return [
+                (kind, event.timestamp, event.product_id)
+                for kind, event in EventGenerator(config).iter_events(start, duration_seconds=60)
+            ]
+
+        state = random.getstate()
+        first = stream()
+        assert random.getstate() == state
+        assert stream() == first
+
+
+class TestParallelHistory:
+
+    def _plan(self, days=3):
+        config = GeneratorConfig(total_users=100, total_products=30, seed=9)
+        event_gen = EventGenerator(config)
+        shards = plan_shards(
+            config, event_gen.user_gen, event_gen.product_gen, datetime(2024, 1, 1), days, 9
+        )
+        return config, event_gen, shards
+
+    def test_opening_stock_carries_over_between_days(self):
+        config, event_gen, shards = self._plan()
+
+        for shard, next_shard in zip(shards, shards[1:]):
+            _, _, inventory = generate_shard(
+                config, event_gen.user_gen, event_gen.product_gen, shard
+            )
+            closing = dict(shard.opening_stock)
+            closing.update(
+                zip(inventory["product_id"].tolist(), inventory["current_stock"].tolist())
+            )
+            assert closing == next_shard.opening_stock
+
+    def test_shard_output_does_not_depend_on_process(self):
+        config, event_gen, shards = self._plan(days=2)
+        args = (config, event_gen.user_gen, event_gen.product_gen, shards[1])
+
+        local = generate_shard(*args)
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            remote = pool.submit(generate_shard, *args).result()
+
+        for local_columns, remote_columns in zip(local, remote):
+            assert to_records(local_columns) == to_records(remote_columns)
+
+
+class TestDatabaseSink:
+
+    def test_write_merges_each_table_with_binary_types(self):
+        config = GeneratorConfig(total_users=50, total_products=16, seed=2)
+        event_gen = EventGenerator(config)
+        batch = VectorizedEventGenerator(
+            config, event_gen.user_gen, event_gen.product_gen
+        ).generate_batch(60, datetime(2024, 1, 1))
+
+        loaded = {}
+
+        def fake_upsert(conn, table, columns, types, rows, key_columns, update_existing=True):
+            # A re-run must keep existing rows rather than fail or overwrite them
+            assert not update_existing
+            loaded[table] = (columns, types, list(rows), key_columns)
+            return len(loaded[table][2])
+
+        def fake_insert_missing(conn, table, columns, types, rows, match_columns):
+            loaded[table] = (columns, types, list(rows), match_columns)
+            return len(loaded[table][2])
+
+        with (
+            patch("data_generator.sinks.get_db_connection") as get_conn,
+            patch("data_generator.sinks.upsert_rows", side_effect=fake_upsert),
+            patch("data_generator.sinks.insert_missing_rows", side_effect=fake_insert_missing),
+        ):
+            get_conn.return_value.__enter__.return_value = MagicMock()
+            DatabaseSink().write(*batch)
+
+        assert {table: keys for table, (*_, keys) in loaded.items()} == {
+            "orders": ["order_id"],
+            "page_views": ["view_id"],
+            "inventory_changes": ["product_id", "timestamp", "stock_change", "current_stock"],
+        }
+        columns, types, rows, _ = loaded["orders"]
+        amount = rows[0][columns.index("amount")]
+        assert types[columns.index("amount")] == "numeric"
+        assert isinstance(amount, Decimal) and amount == round(Decimal(batch[0]["amount"][0]), 2)
+        assert isinstance(rows[0][columns.index("timestamp")], datetime)
+
+
+class TestParquetSink:
+
+    def test_writes_bridge_schema_partitioned_by_event_hour(self, tmp_path):
+        config = GeneratorConfig(total_users=50, total_products=16, seed=4)
+        event_gen = EventGenerator(config)
+        vector_gen = VectorizedEventGenerator(config, event_gen.user_gen, event_gen.product_gen)
+        # Window crosses midnight, so two date partitions
+        batch = vector_gen.generate_batch(3600, datetime(2024, 1, 1, 23, 30))
+        sink = ParquetSink(str(tmp_path), event_gen.user_gen.users, row_group_size=500)
+        sink.write(*batch)
+
+        files = sorted(tmp_path.glob("dt=*/hour=*/*.parquet"))
+        assert [f.parent.relative_to(tmp_path).as_posix() for f in files] == [
+            "dt=2024-01-01/hour=23",
+            "dt=2024-01-02/hour=00",
+        ]
+        sink.write(*batch)  # Seeded re-run overwrites the same files
+        assert sorted(tmp_path.glob("dt=*/hour=*/*.parquet")) == files
+        first = pq.ParquetFile(files[0])
+        assert first.schema_arrow.equals(BRIDGE_EVENT_SCHEMA)
+        assert first.metadata.num_row_groups > 1
+        total = sum(pq.ParquetFile(f).metadata.num_rows for f in files)
+        assert total == len(batch[0]["order_id"]) + len(batch[1]["view_id"])
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRateController:
+
+    def test_bucket_paces_to_rate_and_caps_burst(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=100, burst=50, clock=clock)
+
+        clock.now = 0.25
+        assert bucket.take_available() == 25
+        clock.now = 10.0  # Long stall: only one burst is released
+        assert bucket.take_available() == 50
+
+    def test_ramp_up_and_achieved_rate(self):
+        clock = FakeClock()
+        controller = RateController({"page_view": 1000}, ramp_up_seconds=2, clock=clock)
+
+        emitted = 0
+        for step in range(1, 41):  # 4 seconds in 100ms ticks
+            clock.now = step * 0.1
+            count = controller.take()["page_view"]
+            controller.record("page_view", count)
+            emitted += count
+
+        # Ramp: 1000 events in the first 2s (average 500/s), then 2000 at full rate
+        assert 2990 <= emitted <= 3000
+        assert controller.stats()["page_view"]["achieved_eps"] == emitted / 4.0
+
+    def test_stream_counts_only_acknowledged_events(self):
+        config = GeneratorConfig(
+            total_users=50,
+            total_products=16,
+            seed=6,
+            orders_per_second=200,
+            page_views_per_second=200,
+            inventory_updates_per_second=200,
+        )
+        producer = MagicMock()
+        # The broker rejects every order; other topics are fully acknowledged
+        producer.publish_batch.side_effect = lambda topic, events, key_extractor: (
+            0 if topic == settings.KAFKA_TOPIC_ORDERS else len(events)
+        )
+
+        stats = DataGenerator(config, producer=producer).generate_and_publish_stream(
+            duration_seconds=0.5, tick_seconds=0.05
+        )
+
+        assert stats["order"]["emitted"] == 0 and stats["order"]["failed"] > 0
+        assert stats["page_view"]["emitted"] > 0 and stats["page_view"]["failed"] == 0
+
+
+class TestTrafficProfile:
+
+    def test_shaped_arrivals_follow_profile_and_keep_daily_mean(self):
+        config = GeneratorConfig(business_hours_multiplier=3.0)
+        profile = TrafficProfile.from_config(config)
+        rng = np.random.default_rng(1)
+
+        # Thursday 2024-01-04 (weekday multiplier 1.0 after normalization ~= 0.99)
+        ts = profile.sample_timestamps(rng, datetime(2024, 1, 4), 86400, rate=10.0)
+        hours = np.bincount(ts.astype("datetime64[h]").astype(np.int64) % 24, minlength=24)
+
+        expected_total = 864_000 * profile.weekday[3]
+        assert abs(len(ts) - expected_total) < 5 * np.sqrt(expected_total)
+        assert (np.diff(ts.astype(np.int64)) >= 0).all()
+        assert hours[12] > 2.5 * hours[20] > 2.5 * 2.5 * hours[3]
+
+    def test_flash_sale_multiplies_intensity(self):
+        sale = FlashSale(datetime(2024, 1, 4, 20), duration_minutes=30, multiplier=4.0)
+        profile = TrafficProfile([1.0] * 24, [1.0] * 7, [sale])
+
+        assert profile.intensity_at(datetime(2024, 1, 4, 20, 10)) == 4.0
+        assert profile.intensity_at(datetime(2024, 1, 4, 20, 30)) == 1.0
+
+
+class TestSessionManager:
+
+    def test_inactivity_splits_sessions_across_batches(self):
+        sessions = SessionManager(3, timeout_seconds=60, exit_probability=0.0)
+
+        first = sessions.assign(np.array([0, 1, 0]), np.array([0.0, 10.0, 30.0]))
+        second = sessions.assign(np.array([0, 0, 1]), np.array([50.0, 200.0, 500.0]))
+
+        assert first[0] == first[2] == second[0]  # Gaps under the timeout
+        assert second[1] != second[0]  # 150s idle starts a new session
+        assert second[2] != first[1]
+        assert sessions.evict(now=1000.0) == 2 and sessions.active_sessions() == 0
+
+    def test_batches_that_only_continue_sessions(self):
+        sessions = SessionManager(3, exit_probability=0.0)
+
+        tokens = [sessions.assign(np.array([0]), np.array([t])) for t in (100.0, 200.0, 300.0)]
+        assert len({int(t[0]) for t in tokens}) == 1
+
+    def test_many_small_stream_batches(self):
+        config = GeneratorConfig(seed=1)
+        event_gen = EventGenerator(config)
+        gen = VectorizedEventGenerator(config, event_gen.user_gen, event_gen.product_gen)
+
+        start = datetime(2024, 1, 1)
+        for tick in range(100):
+            gen.generate_page_views(start + timedelta(seconds=tick * 0.5), 0.5, 2)
+
+    def test_exit_probability_ends_sessions(self):
+        sessions = SessionManager(1, exit_probability=1.0)
+        tokens = sessions.assign(np.zeros(5, dtype=np.int64), np.arange(5, dtype=np.float64))
+        assert len(set(tokens.tolist())) == 5
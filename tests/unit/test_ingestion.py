@@ -1,6 +1,10 @@
 import pytest
-from unittest.mock import patch
-from ingestion.kafka_consumer import OrdersIngestionPipeline
+from unittest.mock import MagicMock, patch
+from ingestion.kafka_consumer import (
+    InventoryIngestionPipeline,
+    OrdersIngestionPipeline,
+    PageViewsIngestionPipeline,
+)
 
 
 class TestOrdersIngestionPipeline:
@@ -95,3 +99,66 @@ class TestOrdersIngestionPipeline:
         assert (
             len(pipeline.batch) == 1
         )  # Batch should NOT be cleared on error (so it can be retried)
+
+
+class TestInventoryIngestionPipeline:
+
+    @pytest.fixture
+    def pipeline(self):
+        return InventoryIngestionPipeline(batch_size=10)
+
+    def test_stock_upsert_keeps_latest_change_per_product(self, pipeline, mock_db_connection):
+        mock_conn, mock_cursor = mock_db_connection
+
+        def change(product_id, timestamp, current_stock):
+            return {
+                "product_id": product_id,
+                "timestamp": timestamp,
+                "stock_change": 1,
+                "current_stock": current_stock,
+                "warehouse_id": "WH-001",
+            }
+
+        pipeline.batch = [
+            change("p1", "2023-01-01T12:05:00", 10),
+            change("p1", "2023-01-01T12:00:00", 99),  # Older event arriving late
+            change("p2", "2023-01-01T12:00:00", 5),
+            change("p2", "2023-01-01T12:00:00", 6),  # Same timestamp, higher offset
+        ]
+        pipeline.batch_offsets = [10, 11, 12, 13]
+
+        pipeline._insert_batch()
+
+        log_call, stock_call = mock_cursor.executemany.call_args_list
+        assert len(log_call[0][1]) == 4
+        stock_rows = stock_call[0][1]
+        assert [(row[0], row[1], row[4]) for row in stock_rows] == [("p1", 10, 10), ("p2", 6, 13)]
+        assert pipeline.batch == [] and pipeline.batch_offsets == []
+
+
+class TestIngestionDedup:
+
+    def test_known_records_dropped_and_new_marked_after_insert(self, mock_db_connection):
+        mock_conn, mock_cursor = mock_db_connection
+        dedup = MagicMock()
+        dedup.seen.return_value = [True, False]
+        pipeline = PageViewsIngestionPipeline(batch_size=10, dedup_filter=dedup)
+
+        def view(view_id):
+            return {
+                "view_id": view_id,
+                "user_id": "u1",
+                "timestamp": "2023-01-01T12:00:00",
+                "session_id": "s1",
+                "page_url": "/",
+            }
+
+        pipeline.batch = [view("v_replayed"), view("v_new")]
+        pipeline.batch_offsets = [5, 6]
+
+        pipeline._flush_batch()
+
+        dedup.seen.assert_called_once_with(["v_replayed", "v_new"])
+        inserted = mock_cursor.executemany.call_args[0][1]
+        assert [row[0] for row in inserted] == ["v_new"]
+        dedup.mark.assert_called_once_with(["v_new"])
@@ -0,0 +1,50 @@
+import pytest
+from shared.database.init_db import (
+    get_pending_migrations,
+    load_migrations,
+    split_sql_statements,
+)
+
+
+class TestMigrations:
+
+    def test_split_keeps_function_bodies_intact(self):
+        sql = """
+            -- comment; with semicolon
+            CREATE TABLE t (id INT);
+            CREATE FUNCTION f() RETURNS trigger AS $$
+            BEGIN
+                NEW.updated_at = now();
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql;
+            INSERT INTO t VALUES (';');
+        """
+        statements = split_sql_statements(sql)
+
+        assert len(statements) == 3
+        assert "RETURN NEW;" in statements[1]
+        assert statements[2] == "INSERT INTO t VALUES (';')"
+
+    def test_load_detects_no_transaction_marker(self, tmp_path):
+        (tmp_path / "001_init.sql").write_text("CREATE TABLE a (id INT);")
+        (tmp_path / "002_index.sql").write_text(
+            "-- migrate:no-transaction\nCREATE INDEX CONCURRENTLY IF NOT EXISTS i ON a(id);"
+        )
+
+        migrations = load_migrations(tmp_path)
+
+        assert [m.version for m in migrations] == ["001", "002"]
+        assert migrations[0].transactional
+        assert not migrations[1].transactional
+
+    def test_pending_skips_applied_and_rejects_edits(self, tmp_path):
+        (tmp_path / "001_init.sql").write_text("CREATE TABLE a (id INT);")
+        (tmp_path / "002_more.sql").write_text("CREATE TABLE b (id INT);")
+        migrations = load_migrations(tmp_path)
+
+        pending = get_pending_migrations(migrations, {"001": migrations[0].checksum})
+        assert [m.version for m in pending] == ["002"]
+
+        with pytest.raises(RuntimeError):
+            get_pending_migrations(migrations, {"001": "0" * 64})
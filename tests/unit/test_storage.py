@@ -0,0 +1,164 @@
+import io
+from unittest.mock import MagicMock
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from google.api_core import exceptions as gcp_exceptions
+
+from shared.storage import CommitLog, GCSClient, LocalStorageClient, Upload
+from shared.storage.commit_log import OFFSETS_METADATA_KEY, file_ranges, offset_ranges
+from shared.storage.compaction import compact_partition, load_manifest
+
+
+class TestLocalStorageClient:
+
+    def test_uploads_are_idempotent_and_cas_is_strict(self, tmp_path):
+        client = LocalStorageClient(str(tmp_path))
+
+        assert client.upload_bytes(b"v1", "a/obj.bin")
+        generation = client.get_blob("a/obj.bin").generation
+        assert client.upload_fileobj(io.BytesIO(b"v1"), "a/obj.bin")  # Identical: no rewrite
+        assert client.get_blob("a/obj.bin").generation == generation
+
+        assert not client.upload_bytes(b"v2", "a/obj.bin", if_generation_match=generation - 1)
+        assert client.upload_bytes(b"v2", "a/obj.bin", if_generation_match=generation)
+        assert client.download_bytes("a/obj.bin") == b"v2"
+        assert not client.delete("a/obj.bin", if_generation_match=generation)
+
+    def test_upload_many_runs_all_uploads(self, tmp_path):
+        client = LocalStorageClient(str(tmp_path))
+        uploads = [Upload(f"p/{i}.bin", data=bytes([i]) * 100) for i in range(10)]
+
+        assert client.upload_many(uploads, max_workers=4) == [True] * 10
+        assert [blob.name for blob in client.list_blobs("p/")] == [f"p/{i}.bin" for i in range(10)]
+        assert [blob.size for blob in client.list_blobs("p/")] == [100] * 10
+
+
+class TestCompaction:
+
+    def _write(self, client, name, timestamps, offsets=None):
+        table = pa.table({"timestamp": pa.array(timestamps, pa.float64())})
+        if offsets:
+            ranges = '{"events": {"0": [[%d, %d]]}}' % offsets
+            table = table.replace_schema_metadata({OFFSETS_METADATA_KEY: ranges})
+        buffer = io.BytesIO()
+        pq.write_table(table, buffer)
+        client.upload_bytes(buffer.getvalue(), name)
+
+    def test_merges_small_files_sorted_and_commits_manifest(self, tmp_path):
+        client = LocalStorageClient(str(tmp_path))
+        prefix = "raw/dt=2024-01-31/hour=09/"
+        self._write(client, prefix + "part-a.parquet", [3.0, 1.0], offsets=(0, 1))
+        self._write(client, prefix + "part-b.parquet", [2.0], offsets=(2, 2))
+
+        result = compact_partition(client, prefix, "manifests/" + prefix + "manifest.json")
+        assert result.committed and result.rows == 3
+
+        # Written after the compaction read the partition: must survive the next one
+        self._write(client, prefix + "part-c.parquet", [0.5])
+        remaining = {blob.name for blob in client.list_blobs(prefix)}
+        assert remaining == {*result.outputs, prefix + "part-c.parquet"}
+        compacted = pq.read_table(io.BytesIO(client.download_bytes(result.outputs[0])))
+        assert compacted["timestamp"].to_pylist() == [1.0, 2.0, 3.0]
+        assert file_ranges(compacted.schema.metadata) == {"events": {0: [(0, 2)]}}
+
+        manifest = load_manifest(client, "manifests/" + prefix + "manifest.json")
+        assert sorted(manifest.replaced) == [prefix + "part-a.parquet", prefix + "part-b.parquet"]
+        assert list(manifest.outputs) == result.outputs
+
+    def test_replaced_inputs_left_by_a_crash_are_never_merged_again(self, tmp_path, monkeypatch):
+        client = LocalStorageClient(str(tmp_path))
+        prefix = "raw/dt=2024-01-31/hour=09/"
+        manifest_path = "manifests/" + prefix + "manifest.json"
+        self._write(client, prefix + "part-a.parquet", [1.0])
+        self._write(client, prefix + "part-b.parquet", [2.0])
+
+        # Two runs whose input deletes never happen (crash right after the commit)
+        delete = client.delete
+        monkeypatch.setattr(client, "delete", lambda *args, **kwargs: False)
+        assert compact_partition(client, prefix, manifest_path).committed
+        self._write(client, prefix + "part-c.parquet", [4.0])
+        assert compact_partition(client, prefix, manifest_path).committed
+        monkeypatch.setattr(client, "delete", delete)
+
+        compact_partition(client, prefix, manifest_path)
+
+        manifest = load_manifest(client, manifest_path)
+        live = [blob.name for blob in client.list_blobs(prefix) if manifest.is_live(blob)]
+        tables = [pq.read_table(io.BytesIO(client.download_bytes(name))) for name in live]
+        rows = [value for table in tables for value in table["timestamp"].to_pylist()]
+        assert sorted(rows) == [1.0, 2.0, 4.0]
+        assert {blob.name for blob in client.list_blobs(prefix)} == set(live)
+
+    def test_files_of_uncommitted_batches_are_not_merged(self, tmp_path):
+        client = LocalStorageClient(str(tmp_path))
+        prefix = "raw/dt=2024-01-31/hour=09/"
+        commit_log = CommitLog(client, "manifests/commits/")
+        self._write(client, prefix + "part-a.parquet", [1.0])
+        self._write(client, prefix + "part-c.parquet", [3.0])
+        # A batch that crashed after uploading, before its commit
+        assert commit_log.begin("events+0+5-5", [prefix + "part-b.parquet"])
+        self._write(client, prefix + "part-b.parquet", [2.0])
+
+        result = compact_partition(
+            client, prefix, "manifests/" + prefix + "manifest.json", commit_log=commit_log
+        )
+
+        assert result.inputs == [prefix + "part-a.parquet", prefix + "part-c.parquet"]
+        # Recovery rolls the batch back; its rows are not in any compacted file
+        assert CommitLog(client, "manifests/commits/").recover() == 1
+        assert {blob.name for blob in client.list_blobs(prefix)} == set(result.outputs)
+
+
+class TestCommitLog:
+
+    def test_recovery_rolls_back_batches_without_a_commit(self, tmp_path):
+        client = LocalStorageClient(str(tmp_path))
+        log = CommitLog(client, "commits/")
+        assert offset_ranges([("t", 1, 9), ("t", 0, 5), ("t", 0, 4)]) == {
+            "t": {0: [(4, 5)], 1: [(9, 9)]}
+        }
+
+        # Crash after uploading, before the commit: the file is a would-be duplicate
+        assert log.begin("t+0+4-5", ["raw/part-t+0+4-5.parquet"])
+        client.upload_bytes(b"rows", "raw/part-t+0+4-5.parquet")
+
+        restarted = CommitLog(client, "commits/")
+        assert restarted.recover() == 1
+        assert client.list_blobs() == []
+        assert not restarted.covers("t", 0, 4)
+
+
+class TestGCSClient:
+
+    def _client(self):
+        client = GCSClient.__new__(GCSClient)
+        client.bucket_name = "test"
+        client.bucket = MagicMock()
+        client.max_retries = 3
+        client.resumable_threshold = 1024
+        client.chunk_size = 256 * 1024
+        return client
+
+    def test_retry_after_lost_response_is_a_no_op(self):
+        client = self._client()
+        upload = Upload("obj.bin", data=b"payload")
+        blob = client.bucket.blob.return_value
+        blob.upload_from_string.side_effect = gcp_exceptions.PreconditionFailed("exists")
+        stored = MagicMock(generation=7, size=7, md5_hash=None)
+        stored.name = "obj.bin"
+        stored.crc32c = upload.checksums()["crc32c"]
+        client.bucket.get_blob.return_value = stored
+
+        assert client.upload(upload)
+        assert blob.upload_from_string.call_count == 1
+        assert blob.upload_from_string.call_args.kwargs["if_generation_match"] == 0
+        assert blob.upload_from_string.call_args.kwargs["checksum"] == "crc32c"
+
+    def test_large_uploads_are_resumable(self):
+        client = self._client()
+        client.upload(Upload("big.bin", data=b"x" * 4096))
+        client.upload(Upload("small.bin", data=b"x"))
+
+        chunk_sizes = [call.kwargs["chunk_size"] for call in client.bucket.blob.call_args_list]
+        assert chunk_sizes == [256 * 1024, None]
@@ -0,0 +1,123 @@
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from shared.database.export import export_table_to_parquet
+from shared.database.streaming import stream_query_arrow
+
+Column = namedtuple("Column", "name type_code precision scale")
+
+
+def fake_cursor(description, rows, chunk_size):
+    """Server-side cursor returning rows in chunks of chunk_size"""
+    chunks = iter([rows[i : i + chunk_size] for i in range(0, len(rows), chunk_size)] + [[]])
+    cursor = MagicMock()
+    cursor.description = description
+    cursor.fetchmany.side_effect = lambda size: next(chunks)
+    conn = MagicMock()
+    conn.cursor.return_value.__enter__.return_value = cursor
+    return patch(
+        "shared.database.streaming.get_db_connection",
+        return_value=MagicMock(__enter__=MagicMock(return_value=conn)),
+    )
+
+
+class TestStreamQueryArrow:
+
+    def test_schema_is_fixed_across_chunks(self):
+        description = [
+            Column("amount", 1700, 10, 2),
+            Column("score", 1700, None, None),
+            Column("timestamp", 1114, None, None),
+            Column("paid_at", 1184, None, None),
+        ]
+        # First chunk is all NULLs, which inferring from data would type as null
+        rows = [(None, None, None, None)] * 2 + [
+            (
+                Decimal("19.99"),
+                Decimal("0.125"),
+                datetime(2024, 1, 1, 12),
+                datetime(2024, 1, 1, 12, tzinfo=timezone.utc),
+            )
+        ] * 2
+        with fake_cursor(description, rows, chunk_size=2):
+            batches = list(stream_query_arrow("SELECT 1", chunk_size=2))
+
+        assert len(batches) == 2
+        assert batches[0].schema == batches[1].schema
+        assert batches[0].schema.types == [
+            pa.decimal128(10, 2),
+            pa.float64(),
+            pa.timestamp("us"),
+            pa.timestamp("us", tz="UTC"),
+        ]
+        assert batches[1].to_pylist()[0] == {
+            "amount": Decimal("19.99"),
+            "score": 0.125,
+            "timestamp": datetime(2024, 1, 1, 12),
+            "paid_at": datetime(2024, 1, 1, 12, tzinfo=timezone.utc),
+        }
+
+    def test_uuid_json_interval_and_array_values(self):
+        description = [
+            Column("id", 2950, None, None),
+            Column("payload", 3802, None, None),
+            Column("ttl", 1186, None, None),
+            Column("tags", 1009, None, None),
+            Column("refs", 2951, None, None),
+        ]
+        key = uuid.UUID(int=1)
+        rows = [(key, {"b": 1, "a": [2]}, timedelta(hours=1), ["x", None], [key, None])]
+        with fake_cursor(description, rows, chunk_size=10):
+            (batch,) = stream_query_arrow("SELECT 1", chunk_size=10)
+
+        assert batch.schema.types == [
+            pa.string(),
+            pa.string(),
+            pa.duration("us"),
+            pa.list_(pa.string()),
+            pa.list_(pa.string()),
+        ]
+        assert batch.to_pylist() == [
+            {
+                "id": str(key),
+                "payload": '{"a": [2], "b": 1}',
+                "ttl": timedelta(hours=1),
+                "tags": ["x", None],
+                "refs": [str(key), None],
+            }
+        ]
+
+    def test_unknown_type_fails_before_conversion(self):
+        description = [Column("id", 23, None, None), Column("location", 600, None, None)]
+        with fake_cursor(description, [(1, "(0,0)")], chunk_size=10):
+            with pytest.raises(ValueError, match="location::text"):
+                list(stream_query_arrow("SELECT 1"))
+
+
+class TestExportTable:
+
+    def test_partitions_by_event_date_with_one_schema(self, tmp_path):
+        description = [
+            Column("order_id", 1043, None, None),
+            Column("timestamp", 1114, None, None),
+            Column("amount", 1700, 10, 2),
+        ]
+        start = datetime(2024, 1, 1, 22)
+        rows = [(f"o{i}", start + timedelta(hours=i), Decimal(f"{i}.50")) for i in range(5)]
+        with fake_cursor(description, rows, chunk_size=2):
+            exported = export_table_to_parquet("orders", str(tmp_path), chunk_size=2)
+
+        assert exported == 5
+        files = sorted((tmp_path / "orders").glob("dt=*/*.parquet"))
+        assert [f.parent.name for f in files] == ["dt=2024-01-01", "dt=2024-01-02"]
+        tables = [pq.read_table(f) for f in files]
+        assert [t.num_rows for t in tables] == [2, 3]
+        assert tables[0].schema == tables[1].schema
+        assert tables[0].schema.field("amount").type == pa.decimal128(10, 2)
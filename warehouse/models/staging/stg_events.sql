@@ -24,7 +24,11 @@ renamed as (
         cast(value as float64) as value,
         
         -- Timestamps
-        timestamp_seconds(cast(timestamp as int64)) as event_at
+        timestamp_seconds(cast(timestamp as int64)) as event_at,
+
+        -- Hive partition columns (filter on these to prune GCS files)
+        dt as event_date,
+        hour as event_hour
 
     from source
 )